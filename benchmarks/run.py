@@ -0,0 +1,341 @@
+"""Benchmarks of the REST, signing, screening and strategy hot paths.
+
+Every REST call is answered in-process by a MockExchange through
+MockSessionPool, so the numbers measure this code and not the network.
+
+    python benchmarks/run.py                      # all benchmarks, JSON to stdout
+    python benchmarks/run.py -o base.json         # write the results to a file
+    python benchmarks/run.py -k signature depth   # only benchmarks matching a name
+    python benchmarks/run.py --compare base.json  # ratio against an earlier run
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+
+PATH_TO_ADD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if PATH_TO_ADD not in sys.path:
+    sys.path.insert(0, PATH_TO_ADD)
+
+from trade.context import TradeContext  # noqa: E402
+from trade.market_data import MarketData  # noqa: E402
+from trade.strategy.spread_trading import SpreadTrading  # noqa: E402
+from wazirx.mock import MockExchange, MockSessionPool, OrderFlow  # noqa: E402
+from wazirx.rest import Client, ClientMetrics  # noqa: E402
+from wazirx.websocket import WebsocketClient  # noqa: E402
+
+API_KEY = "bench_api_key"
+SECRET_KEY = "bench_secret_key"
+
+BENCHMARKS = {}
+
+
+def benchmark(name, number=1):
+    """Register fn(state) -> callable; the callable is timed `number` times per repeat."""
+    def _register(fn):
+        BENCHMARKS[name] = (fn, number)
+        return fn
+    return _register
+
+
+def synthetic_symbols(count, seed=7):
+    rng = random.Random(seed)
+    symbols = {}
+    for i in range(count):
+        base = f"s{i:03d}"
+        symbols[base + "inr"] = {
+            "baseAsset": base,
+            "quoteAsset": "inr",
+            "price": round(10 ** rng.uniform(-2, 6), 4),
+        }
+    return symbols
+
+
+def build_exchange(symbols, levels=10, trades=20, seed=7):
+    exchange = MockExchange(
+        symbols=symbols, accounts={API_KEY: SECRET_KEY}, rate_limits=False)
+    for i, symbol in enumerate(symbols):
+        flow = OrderFlow(exchange.engine, symbol, levels=levels, seed=seed + i)
+        flow.seed_book()
+        for _ in range(trades):
+            flow.step()
+    return exchange
+
+
+def build_context(exchange):
+    context = TradeContext(
+        API_KEY, SECRET_KEY, session_pool=MockSessionPool(exchange), api_url=exchange.api_url)
+    # the exchange budget would dominate every timing, the mock does not enforce it here
+    context.client.rate_limiter = None
+    return context
+
+
+def signed_params():
+    return {
+        "symbol": "btcinr",
+        "side": "buy",
+        "type": "limit",
+        "quantity": 0.0015,
+        "price": 2500000.5,
+        "recvWindow": 2000,
+        "timestamp": int(time.time() * 1000),
+    }
+
+
+@benchmark("signature", number=2000)
+def bench_signature(state):
+    client = Client(API_KEY, SECRET_KEY)
+    payload = urllib.parse.urlencode(sorted(signed_params().items()))
+    return lambda: client._get_signature(payload)
+
+
+@benchmark("prepare_request.signed", number=2000)
+def bench_prepare_signed(state):
+    client = Client(API_KEY, SECRET_KEY)
+    endpoint = client._get_api_detail("create_order")
+    params = signed_params()
+    return lambda: client._prepare_request(endpoint, params)
+
+
+@benchmark("prepare_request.public", number=2000)
+def bench_prepare_public(state):
+    client = Client(API_KEY, SECRET_KEY)
+    endpoint = client._get_api_detail("depth")
+    params = {"symbol": "btcinr", "limit": 20}
+    return lambda: client._prepare_request(endpoint, params)
+
+
+@benchmark("json_decode.depth", number=500)
+def bench_decode_depth(state):
+    exchange = build_exchange({"btcinr": {"baseAsset": "btc", "quoteAsset": "inr",
+                                          "price": 2500000.0}}, levels=500, trades=0)
+    payload = json.dumps(exchange.engine.depth("btcinr", 1000)).encode()
+    state["depth_bytes"] = len(payload)
+    return lambda: json.loads(payload)
+
+
+@benchmark("json_decode.tickers", number=100)
+def bench_decode_tickers(state):
+    exchange = build_exchange(synthetic_symbols(500), levels=2, trades=2)
+    payload = json.dumps(exchange.tickers("GET", {}, None)[1]).encode()
+    state["tickers_bytes"] = len(payload)
+    return lambda: json.loads(payload)
+
+
+def _depth_frame(exchange, symbol, levels=20):
+    depth = exchange.engine.depth(symbol, levels)
+    return json.dumps({"data": {"E": int(time.time() * 1000), "s": symbol,
+                                "b": depth["bids"], "a": depth["asks"]},
+                       "stream": symbol + "@depth"})
+
+
+def _websocket_frames(state, compact=False, consumer=True):
+    exchange = build_exchange(synthetic_symbols(1), levels=20, trades=0)
+    symbol = next(iter(exchange.symbols))
+    frame = _depth_frame(exchange, symbol)
+    state["frame_bytes"] = len(frame)
+    websocket_client = WebsocketClient(compact=compact)
+    if consumer:
+        websocket_client.on(symbol + "@depth", lambda data: None)
+    return lambda: websocket_client._handle_message(frame)
+
+
+@benchmark("websocket.frame.depth", number=5000)
+def bench_frame_depth(state):
+    return _websocket_frames(state)
+
+
+@benchmark("websocket.frame.depth.compact", number=5000)
+def bench_frame_depth_compact(state):
+    return _websocket_frames(state, compact=True)
+
+
+@benchmark("websocket.frame.depth.unconsumed", number=5000)
+def bench_frame_depth_unconsumed(state):
+    return _websocket_frames(state, consumer=False)
+
+
+@benchmark("websocket.frame.tickers", number=100)
+def bench_frame_tickers(state):
+    exchange = build_exchange(synthetic_symbols(500), levels=2, trades=2)
+    frame = json.dumps({"data": exchange.tickers("GET", {}, None)[1], "stream": "!ticker@arr"})
+    state["frame_bytes"] = len(frame)
+    websocket_client = WebsocketClient()
+    websocket_client.on("!ticker@arr", lambda data: None)
+    return lambda: websocket_client._handle_message(frame)
+
+
+@benchmark("client.send.depth", number=500)
+def bench_send_depth(state):
+    exchange = build_exchange(synthetic_symbols(1), levels=20, trades=0)
+    client = build_context(exchange).client
+    symbol = next(iter(exchange.symbols))
+    return lambda: client.send("depth", {"symbol": symbol, "limit": 20})
+
+
+@benchmark("client.send.depth.metrics", number=500)
+def bench_send_depth_metrics(state):
+    exchange = build_exchange(synthetic_symbols(1), levels=20, trades=0)
+    client = build_context(exchange).client
+    client.metrics = ClientMetrics()
+    symbol = next(iter(exchange.symbols))
+    return lambda: client.send("depth", {"symbol": symbol, "limit": 20})
+
+
+@benchmark("client.send.create_order", number=500)
+def bench_send_order(state):
+    exchange = build_exchange(synthetic_symbols(1), levels=20, trades=0)
+    client = build_context(exchange).client
+    symbol = next(iter(exchange.symbols))
+
+    def _run():
+        params = signed_params()
+        params["symbol"] = symbol
+        params["price"] = 0.0001
+        return client.send("create_order", params)
+    return _run
+
+
+def _process_symbol(bulk, workers):
+    exchange = build_exchange(synthetic_symbols(500), levels=3, trades=5)
+    market_data = MarketData(context=build_context(exchange))
+
+    def _run():
+        market_data.process_symbol(
+            apply_filter=True, amount_limit=10 ** 7, symbol_limit=10,
+            depth_limit=1, workers=workers, bulk=bulk)
+        return market_data.filtered_asset
+    return _run
+
+
+@benchmark("process_symbol.500")
+def bench_process_symbol(state):
+    return _process_symbol(bulk=False, workers=None)
+
+
+@benchmark("process_symbol.500.workers8")
+def bench_process_symbol_workers(state):
+    return _process_symbol(bulk=False, workers=8)
+
+
+@benchmark("process_symbol.500.bulk")
+def bench_process_symbol_bulk(state):
+    return _process_symbol(bulk=True, workers=None)
+
+
+@benchmark("spread_trading.trade_asset")
+def bench_trade_asset(state, assets=10, open_orders=40):
+    """One trade_asset pass over `assets` symbols holding `open_orders`
+    resting buy orders each, rebuilt before every repeat."""
+    symbols = synthetic_symbols(assets)
+    state["open_orders"] = assets * open_orders
+
+    def _setup():
+        exchange = build_exchange(symbols, levels=5, trades=0)
+        asset_list = {symbol: {"trade_limit": open_orders + 2, "quantity": 1.0}
+                      for symbol in symbols}
+        strategy = SpreadTrading(
+            API_KEY, SECRET_KEY, context=build_context(exchange), asset_list=asset_list)
+        for symbol in symbols:
+            best_bid = float(exchange.engine.depth(symbol, 1)["bids"][0][0])
+            for i in range(open_orders):
+                # half join the best bid and are kept, half sit below it and
+                # are queried and cancelled by check_rival_orders
+                price = best_bid if i % 2 == 0 else round(best_bid * (0.9 - i * 0.001), 8)
+                order = exchange.engine.place(API_KEY, symbol, "buy", price, 1.0)
+                strategy.trade_history.add(order.id, symbol, "buy", order.price, 1.0)
+        return strategy
+
+    state["setup"] = _setup
+    return lambda strategy: strategy.trade_asset()
+
+
+def run_benchmark(name, repeat):
+    fn, number = BENCHMARKS[name]
+    state = {}
+    target = fn(state)
+    setup = state.pop("setup", None)
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            arg = setup()
+            start = time.perf_counter()
+            target(arg)
+        else:
+            target()
+            start = time.perf_counter()
+            for _ in range(number):
+                target()
+        timings.append((time.perf_counter() - start) / number)
+    result = {
+        "number": number,
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "unit": "s/op",
+    }
+    result.update(state)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-k", nargs="*", default=None, help="run benchmarks whose name contains one of these")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare medians against")
+    args = parser.parse_args()
+
+    # the trade.* loggers would write every screened symbol to logs/
+    logging.disable(logging.CRITICAL)
+
+    names = [name for name in BENCHMARKS
+             if not args.k or any(pattern in name for pattern in args.k)]
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "benchmarks": {},
+    }
+    for name in names:
+        results["benchmarks"][name] = run_benchmark(name, args.repeat)
+        print(f"{name:32s} {results['benchmarks'][name]['median'] * 1e6:12.1f} us/op",
+              file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["benchmarks"]
+        for name, result in results["benchmarks"].items():
+            if name in baseline:
+                result["baseline_ratio"] = result["median"] / baseline[name]["median"]
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
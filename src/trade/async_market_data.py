@@ -0,0 +1,164 @@
+import asyncio
+import traceback
+
+from .market_data import MarketData
+
+
+class AsyncMarketData(MarketData):
+    def __init__(self, api_key=None, api_secret=None, context=None):
+        """_summary_
+        asyncio counterpart of MarketData, sending through the context's AsyncClient.
+
+        Args:
+            api_key (str): wazirx api key
+            api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
+        Returns:
+            self.client: AsyncClient instance
+            self.filtered_asset (dict): symbols qualified for trading
+        """
+        super().__init__(api_key, api_secret, context)
+        self.client = self.context.async_client
+
+    async def symbol_chart_24hr(self, symbol=None):
+        """_summary_
+
+        24 hour rolling window price change statistics.
+
+        Rate limit: 1 per second
+        Args:
+            symbol: crypto name
+        Returns:
+            dict: {}
+        """
+        if symbol:
+            self.validate(symbol=symbol)
+            return await self.client.send("ticker", {"symbol": symbol})
+        else:
+            return await self.client.send("tickers")
+
+    async def trades(self, symbol, limit):
+        """_summary_
+
+        Get recent trades.
+
+        Rate limit: 1 per second
+        Args:
+            symbol: crypto name
+            limit: no of records
+        Returns:
+            dict: {}
+        """
+        self.validate(symbol=symbol, get_symbol_depth=True, limit=limit)
+        return await self.client.send("trades", {"symbol": symbol, "limit": limit})
+
+    async def get_symbol_depth(self, symbol=None, limit=None):
+        """_summary_
+
+        Get symbol depth.
+
+        Rate limit: 1 per second
+        Args:
+            symbol: crypto name
+            limit: no of records
+        Returns:
+            dict: {}
+        """
+        self.validate(symbol=symbol, get_symbol_depth=True, limit=limit)
+        return await self.client.send("depth", {"symbol": symbol, "limit": limit})
+
+    async def fetch_and_screen(self, symbol, apply_filter=None, depth_limit=None):
+        """_summary_
+        Requests the depth and 24hr ticker of a symbol together and screens it.
+        Request failures are logged and the symbol is skipped.
+
+        Args:
+            symbol (str): crypto name
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+        Returns:
+            dict: screening entry or None
+        """
+        try:
+            depth, symbol_24hour_data = await asyncio.gather(
+                self.get_symbol_depth(symbol, 1),
+                self.symbol_chart_24hr(symbol),
+            )
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+        return self.screen_symbol(
+            symbol, depth, symbol_24hour_data, apply_filter, depth_limit)
+
+    async def screen_symbols(self, symbol_list, apply_filter=None, depth_limit=None, workers=32):
+        """_summary_
+        Screens symbols concurrently on the running loop and yields each result
+        as soon as it arrives. At most `workers` symbols are in flight; the
+        client's rate limiter keeps them within the exchange budget.
+
+        Args:
+            symbol_list (list): symbols to be screened
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): maximum symbols in flight
+        Returns:
+            async generator: (symbol, screening entry) tuples in completion order
+        """
+        semaphore = asyncio.Semaphore(workers)
+
+        async def _screen(symbol):
+            async with semaphore:
+                return symbol, await self.fetch_and_screen(
+                    symbol, apply_filter, depth_limit)
+
+        tasks = [asyncio.ensure_future(_screen(symbol))
+                 for symbol in symbol_list]
+        try:
+            for task in asyncio.as_completed(tasks):
+                symbol, asset = await task
+                if asset is not None:
+                    yield symbol, asset
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def process_symbol(
+        self,
+        symbols=None,
+        apply_filter=None,
+        amount_limit=None,
+        symbol_limit=None,
+        depth_limit=None,
+        workers=32,
+    ):
+        """_summary_
+        Same screening as MarketData.process_symbol, with up to `workers`
+        symbols screened concurrently on the running loop.
+
+        Args:
+            symbols (list, optional): cryptocurrencies that the user would like to trade
+            apply_filter (bool, optional): If True, below filters will be applied
+            amount_limit (int, optional): filters out cryptocurrencies based on their amount
+            symbol_limit (int, optional): filters out the top performing cryptocurrencies
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): maximum symbols in flight
+        """
+        self.validate(
+            process_symbol=True,
+            symbols=symbols,
+            apply_filter=apply_filter,
+            amount_limit=amount_limit,
+            symbol_limit=symbol_limit,
+            depth_limit=depth_limit,
+            workers=workers,
+        )
+
+        symbol_list = self.get_symbol_list(symbols)
+
+        self.filtered_asset = {}
+        async for symbol, asset in self.screen_symbols(
+                symbol_list, apply_filter, depth_limit, workers):
+            self.filtered_asset[symbol] = asset
+
+        if apply_filter:
+            self.rank_assets(amount_limit, symbol_limit)
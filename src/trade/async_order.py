@@ -0,0 +1,155 @@
+import asyncio
+import time
+import traceback
+
+from .order import Order
+
+
+class AsyncOrder(Order):
+    def __init__(self, api_key=None, api_secret=None, context=None):
+        """_summary_
+        asyncio counterpart of Order, sending through the context's AsyncClient.
+
+        Args:
+            api_key (str): wazirx api key
+            api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
+        Returns:
+            self.client: AsyncClient instance
+        """
+        super().__init__(api_key, api_secret, context)
+        self.client = self.context.async_client
+
+    async def test_order(
+        self,
+        symbol=None,
+        side=None,
+        order_type=None,
+        quantity=None,
+        price=None,
+        stop_price=None,
+    ):
+        """_summary_
+        Test new order creation without sending it into the matching engine.
+
+        Rate limit: 2 per second
+        Returns:
+            response (tuple): (status code, {})
+        """
+        return await self.client.send(
+            "create_test_order",
+            self.order_params(symbol, side, order_type,
+                              quantity, price, stop_price),
+        )
+
+    async def new_order(
+        self,
+        symbol=None,
+        side=None,
+        order_type=None,
+        quantity=None,
+        price=None,
+        stop_price=None,
+    ):
+        """_summary_
+        Send in a new order.
+
+        Rate limit: 10 per second
+        Returns:
+            response (tuple): (status code, {})
+        """
+        return await self.client.send(
+            "create_order",
+            self.order_params(symbol, side, order_type,
+                              quantity, price, stop_price),
+        )
+
+    async def query_order(self, order_id=None):
+        """_summary_
+        Check an order's status.
+
+        Rate limit: 2 per second
+        Returns:
+            response (tuple): (status code, {})
+        """
+        return await self.client.send(
+            "query_order",
+            {"orderId": order_id, "recvWindow": self.recvWindow,
+             "timestamp": self.timestamp()},
+        )
+
+    async def cancel_order(self, symbol=None, order_id=None):
+        """_summary_
+        Cancel an active order.
+
+        Rate limit: 10 per second
+        Returns:
+            response (tuple): (status code, {})
+        """
+        return await self.client.send(
+            "cancel_order",
+            {
+                "symbol": symbol,
+                "orderId": order_id,
+                "recvWindow": self.recvWindow,
+                "timestamp": self.timestamp(),
+            },
+        )
+
+    async def process_order(self, process_type=None, data=None):
+        """_summary_
+
+        Args:
+            process_type (str): type of process to be executed
+            data (dict): contains order related details
+
+        Returns:
+            response (tuple): order response
+        """
+        request = self.prepare_process_order(process_type, data)
+        if request is None:
+            return (404, {"error": "invalid process type"})
+
+        method, kwargs, error = request
+        try:
+            return await getattr(self, method)(**kwargs)
+        except Exception:
+            self.log.critical(traceback.format_exc())
+            return (404, {"error": error})
+
+    async def replace(self, order_id=None, new_price=None, symbol=None, side=None, quantity=None,
+                      order_type="limit", state=None, submit=None):
+        """_summary_
+        asyncio counterpart of Order.replace; with overlap the cancel and the
+        new order are in flight together.
+
+        Args:
+            submit (coroutine function, optional): submit(process_type, data) used
+                instead of process_order, e.g. OrderGateway.asubmit
+        Returns:
+            dict: order_id, cancel and new responses, overlapped, excess and the combined
+                latency in seconds, see Order.replace
+        """
+        submit = submit or self.process_order
+        started = time.monotonic()
+        plan = self.replace_plan(quantity, state)
+        if plan is None:
+            return self.replace_report(order_id, (404, {"error": "order is not open"}),
+                                       None, False, started)
+        overlap, quantity = plan
+        cancel_data = {"symbol": symbol, "order_id": order_id}
+        new_data = {"symbol": symbol, "side": side, "order_type": order_type,
+                    "quantity": quantity, "price": new_price, "stop_price": new_price}
+
+        if overlap:
+            cancel, new = await asyncio.gather(
+                submit("cancel_order", cancel_data), submit("new_order", new_data))
+            return self.replace_report(order_id, cancel, new, True, started)
+
+        cancel = await submit("cancel_order", cancel_data)
+        new = None
+        if cancel[0] == 200:
+            new_data["quantity"] = self.replacement_quantity(quantity, cancel)
+            if new_data["quantity"]:
+                new = await submit("new_order", new_data)
+        return self.replace_report(order_id, cancel, new, False, started)
@@ -0,0 +1,41 @@
+from .user import User
+
+
+class AsyncUser(User):
+    def __init__(self, api_key=None, api_secret=None, context=None):
+        """_summary_
+        asyncio counterpart of User, sending through the context's AsyncClient.
+
+        Args:
+            api_key (str): wazirx api key
+            api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
+        Returns:
+            self.client: AsyncClient instance
+        """
+        super().__init__(api_key, api_secret, context)
+        self.client = self.context.async_client
+
+    async def user_info(self):
+        """_summary_
+
+        Get current account information.
+
+        Rate limit: 1 per second
+        Query Parameters: None
+        Returns:
+            dict: {}
+        """
+        return await self.client.send("account_info", self.account_params())
+
+    async def user_funds(self):
+        """_summary_
+
+        Get fund details for current account.
+
+        Rate limit: 1 per second
+        Query Parameters: None
+        Returns:
+            list: [{}, {}]
+        """
+        return await self.client.send("funds_info", self.account_params())
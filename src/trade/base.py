@@ -1,17 +1,21 @@
-from wazirx.rest.client import Client
+from .context import TradeContext
 
 
 class Base:
-    def __init__(self, api_key=None, api_secret=None):
+    def __init__(self, api_key=None, api_secret=None, context=None):
         """_summary_
 
         Args:
             api_key (str): wazirx api key
             api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context
         Returns:
             self.client: obj instance
         """
-        self.client = Client(api_key=api_key, secret_key=api_secret)
+        if context is None:
+            context = TradeContext(api_key, api_secret)
+        self.context = context
+        self.client = context.client
 
     def ping(self):
         """_summary_
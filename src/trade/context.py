@@ -0,0 +1,97 @@
+from wazirx.rest.async_client import AsyncClient
+from wazirx.rest.cache import AsyncResponseCache
+from wazirx.rest.client import Client
+from wazirx.rest.clock import ServerClock
+from wazirx.rest.session import get_session_pool
+
+
+class TradeContext:
+    def __init__(self, api_key=None, api_secret=None, session_pool=None, api_url=None, cache=None,
+                 clock=None, metrics=None, transport=None):
+        """_summary_
+        Holds the connection resources shared by every trade.* class so one
+        process keeps a single keep-alive pool instead of one per object.
+
+        Args:
+            api_key (str): wazirx api key
+            api_secret (str): wazirx secret key
+            session_pool (SessionPool, optional): pool to reuse, defaults to the process-wide pool
+            api_url (str, optional): REST base url, e.g. a local MockExchange, defaults to Client.API_URL
+            cache (ResponseCache, optional): TTL cache of the public endpoints, off by default.
+                The async client gets an AsyncResponseCache with the same TTLs.
+            clock (ServerClock/bool, optional): exchange clock stamping the signed requests of both
+                clients, started by the caller. True creates a ServerClock sampling this context's
+                api_url through its session pool and transport, started here and stopped by close().
+            metrics (ClientMetrics, optional): request metrics shared by both clients, off by default
+            transport (RecordingTransport/ReplayTransport, optional): record or replay the REST calls
+        Returns:
+            self.client: obj instance shared by Base, MarketData, Order, User and Symbol
+            self.async_client: AsyncClient shared by the async counterparts, created on first use
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.session_pool = session_pool or get_session_pool()
+        self.api_url = api_url
+        self._owns_clock = clock is True
+        if self._owns_clock:
+            clock = ServerClock(Client(session_pool=self.session_pool, api_url=api_url,
+                                       transport=transport))
+            clock.start()
+        self.client = Client(
+            api_key=api_key or "",
+            secret_key=api_secret or "",
+            session_pool=self.session_pool,
+            api_url=api_url,
+            cache=cache,
+            clock=clock,
+            metrics=metrics,
+            transport=transport,
+        )
+        self.cache = cache
+        self.clock = clock
+        self.metrics = metrics
+        self.transport = transport
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        """_summary_
+        AsyncClient bound to the same keys, with its own aiohttp connection pool.
+
+        Args: NONE
+        Returns:
+            AsyncClient: obj instance
+        """
+        if self._async_client is None:
+            self._async_client = AsyncClient(
+                api_key=self.api_key or "",
+                secret_key=self.api_secret or "",
+                api_url=self.api_url,
+                cache=AsyncResponseCache(self.cache.ttls, self.cache.maxsize) if self.cache is not None else None,
+                clock=self.clock,
+                metrics=self.metrics,
+                transport=self.transport,
+            )
+        return self._async_client
+
+    def close(self):
+        """_summary_
+        Closes the keep-alive connections held by the session pool, and stops
+        the ServerClock created by clock=True.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._owns_clock:
+            self.clock.stop()
+        self.session_pool.close()
+
+    async def aclose(self):
+        """_summary_
+        Closes the aiohttp connection pool of the async client, if one was created.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._async_client is not None:
+            await self._async_client.close()
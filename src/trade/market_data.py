@@ -1,32 +1,35 @@
 import itertools
 import traceback
 from collections import OrderedDict
-from time import sleep
-
-from wazirx.rest.client import Client
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .context import TradeContext
 from .exception import MissingAttributeError
 from .log import setup_logger
 
 
 class MarketData:
-    def __init__(self, api_key=None, api_secret=None):
+    def __init__(self, api_key=None, api_secret=None, context=None):
         """_summary_
 
         Args:
             api_key (str): wazirx api key
             api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
         Returns:
             self.client: obj instance
             self.filtered_asset (dict): symbols qualified for trading
         """
 
-        if not api_key:
-            raise MissingAttributeError("api_key required")
-        if not api_secret:
-            raise MissingAttributeError("api_secret required")
+        if context is None:
+            if not api_key:
+                raise MissingAttributeError("api_key required")
+            if not api_secret:
+                raise MissingAttributeError("api_secret required")
+            context = TradeContext(api_key, api_secret)
 
-        self.client = Client(api_key=api_key, secret_key=api_secret)
+        self.context = context
+        self.client = context.client
         self.filtered_asset = {}
         self.log = setup_logger()
 
@@ -41,6 +44,7 @@ class MarketData:
         amount_limit=None,
         symbol_limit=None,
         depth_limit=None,
+        workers=None,
     ):
         """_summary_
 
@@ -48,6 +52,11 @@ class MarketData:
         accepts multiple arguments and raise MissingAttributeError & TypeError if missing/invalid
         """
         if process_symbol:
+            if workers is not None:
+                if not isinstance(workers, int):
+                    raise TypeError(
+                        f"Expected a int for 'workers' but received a {type(workers).__name__}."
+                    )
             if symbols:
                 if not isinstance(symbols, list):
                     raise TypeError(
@@ -162,6 +171,8 @@ class MarketData:
         amount_limit=None,
         symbol_limit=None,
         depth_limit=None,
+        workers=None,
+        bulk=False,
     ):
         """_summary_
         The function will process and filter symbols, either those provided by the user or those found in a symbol file.
@@ -173,6 +184,8 @@ class MarketData:
             amount_limit (int, optional): filters out cryptocurrencies based on their amount
             symbol_limit (int, optional): filters out the top performing cryptocurrencies
             depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): if given, symbols are screened concurrently by this many workers
+            bulk (bool, optional): If True, screen from one whole-market ticker snapshot (see process_tickers)
         """
 
         self.validate(
@@ -182,64 +195,289 @@ class MarketData:
             amount_limit=amount_limit,
             symbol_limit=symbol_limit,
             depth_limit=depth_limit,
+            workers=workers,
         )
 
+        if bulk and self.process_tickers(
+                symbols, apply_filter, amount_limit, symbol_limit, depth_limit, workers):
+            return
+
+        symbol_list = self.get_symbol_list(symbols)
+
+        self.filtered_asset = {}
+        if workers:
+            for symbol, asset in self.screen_symbols(
+                    symbol_list, apply_filter, depth_limit, workers):
+                self.filtered_asset[symbol] = asset
+        else:
+            for symbol in symbol_list:
+                asset = self.fetch_and_screen(symbol, apply_filter, depth_limit)
+                if asset is not None:
+                    self.filtered_asset[symbol] = asset
+
+        if apply_filter:
+            self.rank_assets(amount_limit, symbol_limit)
+
+    def get_symbol_list(self, symbols=None):
+        """_summary_
+        Returns the symbols given by the user, or every INR symbol listed on WazirX.
+
+        Args:
+            symbols (list, optional): cryptocurrencies that the user would like to trade
+        Returns:
+            list: symbols to be screened
+        """
+        if symbols is not None:
+            return symbols
+        from .symbol import Symbol
+        return Symbol(context=self.context).symbol_list
+
+    def fetch_and_screen(self, symbol, apply_filter=None, depth_limit=None):
+        """_summary_
+        Requests the depth and 24hr ticker of a symbol and screens it.
+        Request failures are logged and the symbol is skipped.
+
+        Args:
+            symbol (str): crypto name
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+        Returns:
+            dict: screening entry or None
+        """
+        try:
+            depth = self.get_symbol_depth(symbol, 1)
+            symbol_24hour_data = self.symbol_chart_24hr(symbol)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+        return self.screen_symbol(
+            symbol, depth, symbol_24hour_data, apply_filter, depth_limit)
+
+    def screen_symbols(self, symbol_list, apply_filter=None, depth_limit=None, workers=8):
+        """_summary_
+        Screens symbols on a pool of worker threads and yields each result as
+        soon as it arrives. The client's rate limiter keeps the workers within
+        the exchange budget; a failing symbol is dropped without holding up the rest.
+
+        Args:
+            symbol_list (list): symbols to be screened
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): number of worker threads
+        Returns:
+            generator: (symbol, screening entry) tuples in completion order
+        """
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                executor.submit(self.fetch_and_screen, symbol, apply_filter, depth_limit): symbol
+                for symbol in symbol_list
+            }
+            for future in as_completed(futures):
+                asset = future.result()
+                if asset is not None:
+                    yield futures[future], asset
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def screen_symbol(self, symbol, depth, symbol_24hour_data, apply_filter=None, depth_limit=None):
+        """_summary_
+        Builds the screening entry of a symbol from its depth and 24hr ticker responses.
+
+        Args:
+            symbol (str): crypto name
+            depth (tuple): response of get_symbol_depth
+            symbol_24hour_data (tuple): response of symbol_chart_24hr
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+        Returns:
+            dict: {"depth", "volume", "buy", "sell"} or None if the symbol is filtered out
+        """
+        try:
+            volume = float(symbol_24hour_data[1]["volume"])
+        except Exception:
+            # exception occurs in case of newly listed symbol
+            self.log.warning(traceback.format_exc())
+            volume = 0
+        try:
+            sell = float(depth[1]["asks"][0][0])
+            buy = float(depth[1]["bids"][0][0])
+
+            return self.build_asset(buy, sell, volume, apply_filter, depth_limit)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+    def build_asset(self, buy, sell, volume, apply_filter=None, depth_limit=None):
+        """_summary_
+        Builds the screening entry of a symbol from its top of book and volume.
+
+        Args:
+            buy (float): best bid
+            sell (float): best ask
+            volume (float): 24hr volume
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+        Returns:
+            dict: {"depth", "volume", "buy", "sell"} or None if the symbol is filtered out
+        """
+        depth_percentage = self.symbol_depth_calculator(buy, sell)
+        if apply_filter and depth_percentage < depth_limit:
+            return None
+        return {
+            "depth": depth_percentage,
+            "volume": volume,
+            "buy": buy,
+            "sell": sell,
+        }
+
+    def index_tickers(self, tickers):
+        """_summary_
+        Indexes the whole-market 24hr ticker array by symbol.
+
+        Args:
+            tickers (list): body of the "tickers" response
+        Returns:
+            dict: {symbol: ticker}
+        """
+        return {ticker["symbol"]: ticker for ticker in tickers if ticker.get("symbol")}
+
+    def process_tickers(
+        self,
+        symbols=None,
+        apply_filter=None,
+        amount_limit=None,
+        symbol_limit=None,
+        depth_limit=None,
+        workers=None,
+    ):
+        """_summary_
+        Bulk screening path of process_symbol. One "tickers" call supplies the
+        volume and bid/ask of every symbol; depth is only requested for symbols
+        missing a quote in the snapshot and for the shortlisted candidates,
+        which are re-screened against the live book. A full screen costs
+        roughly 1 + K requests instead of 2N.
+
+        Args:
+            symbols (list, optional): cryptocurrencies that the user would like to trade
+            apply_filter (bool, optional): If True, below filters will be applied
+            amount_limit (int, optional): filters out cryptocurrencies based on their amount
+            symbol_limit (int, optional): filters out the top performing cryptocurrencies
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): if given, depth calls are made concurrently by this many workers
+        Returns:
+            bool: False if the ticker snapshot was unavailable and nothing was screened
+        """
+        try:
+            status_code, tickers = self.symbol_chart_24hr()
+            if status_code != 200:
+                return False
+            ticker_index = self.index_tickers(tickers)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return False
+
         if symbols is not None:
             symbol_list = symbols
         else:
-            from .symbol import Symbol
-            symbol_list = Symbol().symbol_list
+            symbol_list = [symbol for symbol, ticker in ticker_index.items()
+                           if ticker.get("quoteAsset") == "inr"]
 
         self.filtered_asset = {}
+        missing_quote = []
         for symbol in symbol_list:
-            depth = self.get_symbol_depth(symbol, 1)
-            sleep(1)
-            symbol_24hour_data = self.symbol_chart_24hr(symbol)
+            ticker = ticker_index.get(symbol, {})
             try:
-                volume = float(symbol_24hour_data[1]["volume"])
-            except Exception:
-                # exception occurs in case of newly listed symbol
-                self.log.warning(traceback.format_exc())
-                volume = 0
-            try:
-                sell = float(depth[1]["asks"][0][0])
-                buy = float(depth[1]["bids"][0][0])
-
-                depth_percentage = self.symbol_depth_calculator(buy, sell)
-                if apply_filter:
-                    if depth_percentage >= depth_limit:
-                        self.filtered_asset[symbol] = {
-                            "depth": depth_percentage,
-                            "volume": volume,
-                            "buy": buy,
-                            "sell": sell,
-                        }
+                buy = float(ticker["bidPrice"])
+                sell = float(ticker["askPrice"])
+                volume = float(ticker.get("volume") or 0)
+            except (KeyError, TypeError, ValueError):
+                missing_quote.append(symbol)
+                continue
+            if buy <= 0 or sell <= 0:
+                missing_quote.append(symbol)
+                continue
+            asset = self.build_asset(buy, sell, volume, apply_filter, depth_limit)
+            if asset is not None:
+                self.filtered_asset[symbol] = asset
+
+        if missing_quote:
+            self.log.info(f"{len(missing_quote)} symbols without a snapshot quote, requesting depth")
+            for symbol, asset in self.confirm_symbols(
+                    missing_quote, ticker_index, apply_filter, depth_limit, workers):
+                if asset is not None:
+                    self.filtered_asset[symbol] = asset
+
+        if apply_filter:
+            self.rank_assets(amount_limit, symbol_limit)
+            shortlist = list(self.filtered_asset)
+            for symbol, asset in self.confirm_symbols(
+                    shortlist, ticker_index, apply_filter, depth_limit, workers):
+                if asset is None:
+                    del self.filtered_asset[symbol]
                 else:
-                    self.filtered_asset[symbol] = {
-                        "depth": depth_percentage,
-                        "volume": volume,
-                        "buy": buy,
-                        "sell": sell,
-                    }
+                    self.filtered_asset[symbol] = asset
+            self.rank_assets(amount_limit, symbol_limit)
+        return True
+
+    def confirm_symbols(self, symbol_list, ticker_index, apply_filter=None, depth_limit=None, workers=None):
+        """_summary_
+        Screens symbols against their live depth, taking the volume from the
+        ticker snapshot so no per-symbol ticker call is made.
+
+        Args:
+            symbol_list (list): symbols to be screened
+            ticker_index (dict): {symbol: ticker} from index_tickers
+            apply_filter (bool, optional): If True, depth_limit will be applied
+            depth_limit (int, optional): filters out cryptocurrencies based on their market depth
+            workers (int, optional): if given, depth calls are made concurrently by this many workers
+        Returns:
+            generator: (symbol, screening entry or None) tuples
+        """
+        def _confirm(symbol):
+            try:
+                depth = self.get_symbol_depth(symbol, 1)
             except Exception:
                 self.log.error(traceback.format_exc())
+                return symbol, None
+            return symbol, self.screen_symbol(
+                symbol, depth, (200, ticker_index.get(symbol, {})),
+                apply_filter, depth_limit)
 
-        if apply_filter:
-            self.filtered_asset = OrderedDict(
-                sorted(
-                    self.filtered_asset.items(),
-                    key=lambda x: x[1]["volume"],
-                    reverse=True,
-                )
-            )
+        if not workers:
+            for symbol in symbol_list:
+                yield _confirm(symbol)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(_confirm, symbol_list):
+                yield result
 
-            self.filtered_asset = OrderedDict(
-                filter(
-                    lambda item: item[1]["buy"] < amount_limit,
-                    self.filtered_asset.items(),
-                )
+    def rank_assets(self, amount_limit, symbol_limit):
+        """_summary_
+        Sorts the screened symbols by volume, drops the ones above amount_limit
+        and keeps the top symbol_limit of them.
+
+        Args:
+            amount_limit (int): filters out cryptocurrencies based on their amount
+            symbol_limit (int): filters out the top performing cryptocurrencies
+        Returns: NONE
+        """
+        self.filtered_asset = OrderedDict(
+            sorted(
+                self.filtered_asset.items(),
+                key=lambda x: x[1]["volume"],
+                reverse=True,
             )
+        )
 
-            self.filtered_asset = OrderedDict(
-                itertools.islice(self.filtered_asset.items(), symbol_limit)
+        self.filtered_asset = OrderedDict(
+            filter(
+                lambda item: item[1]["buy"] < amount_limit,
+                self.filtered_asset.items(),
             )
+        )
+
+        self.filtered_asset = OrderedDict(
+            itertools.islice(self.filtered_asset.items(), symbol_limit)
+        )
@@ -1,28 +1,39 @@
-from datetime import datetime
+import time
 import traceback
-from .log import setup_logger
-from wazirx.rest.client import Client
+from concurrent.futures import ThreadPoolExecutor
 
+from .log import setup_logger
+from .context import TradeContext
 from .exception import MissingAttributeError
 
 
+# Threads sending the cancel of a replace() while the caller sends the new order.
+_replace_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="order-replace")
+
+FINAL_STATUSES = ("done", "cancel")
+
+
 class Order:
-    def __init__(self, api_key=None, api_secret=None):
+    def __init__(self, api_key=None, api_secret=None, context=None):
         """_summary_
 
         Args:
             api_key (str): wazirx api key
             api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
         Returns:
             self.client: obj instance
             self.recvWindow (int): WazirX has a predetermined value that must be received for an order to be processed. If the order time falls below this value, it will not be processed.
         """
-        if not api_key:
-            raise MissingAttributeError("api_key required")
-        if not api_secret:
-            raise MissingAttributeError("api_secret required")
-
-        self.client = Client(api_key=api_key, secret_key=api_secret)
+        if context is None:
+            if not api_key:
+                raise MissingAttributeError("api_key required")
+            if not api_secret:
+                raise MissingAttributeError("api_secret required")
+            context = TradeContext(api_key, api_secret)
+
+        self.context = context
+        self.client = context.client
         self.recvWindow = 2000
         self.log = setup_logger()
 
@@ -139,6 +150,50 @@ class Order:
                         f"Expected a dict for 'data' but received a {type(data).__name__}."
                     )
 
+    def timestamp(self):
+        """_summary_
+        Current time in milliseconds, used to stamp signed requests.
+        Corrected to the exchange clock when the context has a ServerClock.
+
+        Args: NONE
+        Returns:
+            int: epoch milliseconds
+        """
+        return self.client.timestamp()
+
+    def order_params(
+        self,
+        symbol=None,
+        side=None,
+        order_type=None,
+        quantity=None,
+        price=None,
+        stop_price=None,
+    ):
+        """_summary_
+        Builds the signed request parameters of a new/test order.
+
+        Args:
+            symbol: crypto name
+            side: buy/sell side
+            order_type: limit/stop_limit
+            quantity: order quantity
+            price: order price
+            stop_price: if any
+        Returns:
+            dict: request parameters
+        """
+        return {
+            "symbol": symbol,
+            "side": side,
+            "type": order_type,
+            "quantity": quantity,
+            "price": price,
+            "stopPrice": stop_price,
+            "recvWindow": self.recvWindow,
+            "timestamp": self.timestamp(),
+        }
+
     def test_order(
         self,
         symbol=None,
@@ -162,20 +217,10 @@ class Order:
         Returns:
             response (tuple): (status code, {})
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
         return self.client.send(
             "create_test_order",
-            {
-                "symbol": symbol,
-                "side": side,
-                "type": order_type,
-                "quantity": quantity,
-                "price": price,
-                "stopPrice": stop_price,
-                "recvWindow": self.recvWindow,
-                "timestamp": ts,
-            },
+            self.order_params(symbol, side, order_type,
+                              quantity, price, stop_price),
         )
 
     def new_order(
@@ -201,20 +246,10 @@ class Order:
         Returns:
             response (tuple): (status code, {})
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
         return self.client.send(
             "create_order",
-            {
-                "symbol": symbol,
-                "side": side,
-                "type": order_type,
-                "quantity": quantity,
-                "price": price,
-                "stopPrice": stop_price,
-                "recvWindow": self.recvWindow,
-                "timestamp": ts,
-            },
+            self.order_params(symbol, side, order_type,
+                              quantity, price, stop_price),
         )
 
     def query_order(self, order_id=None):
@@ -233,11 +268,10 @@ class Order:
         Returns:
             response (tuple): (status code, {})
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
         return self.client.send(
             "query_order",
-            {"orderId": order_id, "recvWindow": self.recvWindow, "timestamp": ts},
+            {"orderId": order_id, "recvWindow": self.recvWindow,
+             "timestamp": self.timestamp()},
         )
 
     def cancel_order(self, symbol=None, order_id=None):
@@ -251,84 +285,47 @@ class Order:
         Returns:
             response (tuple): (status code, {})
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
         return self.client.send(
             "cancel_order",
             {
                 "symbol": symbol,
                 "orderId": order_id,
                 "recvWindow": self.recvWindow,
-                "timestamp": ts,
+                "timestamp": self.timestamp(),
             },
         )
 
-    def process_order(self, process_type=None, data=None):
+    def prepare_process_order(self, process_type=None, data=None):
         """_summary_
+        Validates a process_order call and resolves the order method to run.
 
         Args:
             process_type (str): type of process to be executed
             data (dict): contains order related details
 
         Returns:
-            response (tuple): order response
+            tuple: (method name, method kwargs, error message) or None for an invalid process type
         """
         self.validate(process_order=True, process_type=process_type, data=data)
 
-        if process_type == "test_order":
-            self.validate(
-                new_order=True,
-                symbol=data.get("symbol"),
-                side=data.get("side"),
-                order_type=data.get("order_type"),
-                quantity=data.get("quantity"),
-                price=data.get("price"),
-                stop_price=data.get("stop_price"),
-            )
-            try:
-                return self.test_order(
-                    symbol=data.get("symbol"),
-                    side=data.get("side"),
-                    order_type=data.get("order_type"),
-                    quantity=data.get("quantity"),
-                    price=data.get("price"),
-                    stop_price=data.get("stop_price"),
-                )
-            except Exception:
-                self.log.critical(traceback.format_exc())
-                return (404, {"error": "unable to create test order"})
-
-        elif process_type == "new_order":
-            self.validate(
-                new_order=True,
-                symbol=data.get("symbol"),
-                side=data.get("side"),
-                order_type=data.get("order_type"),
-                quantity=data.get("quantity"),
-                price=data.get("price"),
-                stop_price=data.get("stop_price"),
-            )
-            try:
-                return self.new_order(
-                    symbol=data.get("symbol"),
-                    side=data.get("side"),
-                    order_type=data.get("order_type"),
-                    quantity=data.get("quantity"),
-                    price=data.get("price"),
-                    stop_price=data.get("stop_price"),
-                )
-            except Exception:
-                self.log.critical(traceback.format_exc())
-                return (404, {"error": "unable to create order"})
+        if process_type in ("test_order", "new_order"):
+            order = {
+                "symbol": data.get("symbol"),
+                "side": data.get("side"),
+                "order_type": data.get("order_type"),
+                "quantity": data.get("quantity"),
+                "price": data.get("price"),
+                "stop_price": data.get("stop_price"),
+            }
+            self.validate(new_order=True, **order)
+            if process_type == "test_order":
+                return process_type, order, "unable to create test order"
+            return process_type, order, "unable to create order"
 
         elif process_type == "query_order":
             self.validate(query_order=True, order_id=data.get("order_id"))
-
-            try:
-                return self.query_order(order_id=data.get("order_id"))
-            except Exception:
-                self.log.critical(traceback.format_exc())
-                return (404, {"error": "order doesn't exists"})
+            return (process_type, {"order_id": data.get("order_id")},
+                    "order doesn't exists")
 
         elif process_type == "cancel_order":
             self.validate(
@@ -336,13 +333,150 @@ class Order:
                 symbol=data.get("symbol"),
                 order_id=data.get("order_id"),
             )
-            try:
-                return self.cancel_order(
-                    symbol=data.get("symbol"), order_id=data.get("order_id")
-                )
-            except Exception:
-                self.log.critical(traceback.format_exc())
-                return (404, {"error": "unable to cancel order"})
-
-        else:
+            return (process_type,
+                    {"symbol": data.get("symbol"),
+                     "order_id": data.get("order_id")},
+                    "unable to cancel order")
+
+        return None
+
+    def process_order(self, process_type=None, data=None):
+        """_summary_
+
+        Args:
+            process_type (str): type of process to be executed
+            data (dict): contains order related details
+
+        Returns:
+            response (tuple): order response
+        """
+        request = self.prepare_process_order(process_type, data)
+        if request is None:
             return (404, {"error": "invalid process type"})
+
+        method, kwargs, error = request
+        try:
+            return getattr(self, method)(**kwargs)
+        except Exception:
+            self.log.critical(traceback.format_exc())
+            return (404, {"error": error})
+
+    def replace_plan(self, quantity=None, state=None):
+        """_summary_
+        Decides from the locally known state of an order (e.g. OrderTracker.get)
+        whether its cancel and its replacement can be sent together. That is
+        only safe while the order is open with nothing executed; otherwise the
+        replacement waits for the cancel and is sized from what is left.
+
+        Args:
+            quantity (float, optional): replacement quantity, defaults to the order's original quantity
+            state (dict, optional): status, origQty, executedQty and tradedQty of the order
+        Returns:
+            tuple: (overlap, quantity), None if the order is known to be done or cancelled
+        """
+        state = state or {}
+        if state.get("status") in FINAL_STATUSES:
+            return None
+        if quantity is None:
+            quantity = state.get("origQty")
+        executed = state.get("executedQty")
+        if executed is not None:
+            # own trades can be reported before the orderUpdate raising executedQty
+            executed = max(float(executed), float(state.get("tradedQty") or 0))
+        overlap = bool(quantity) and state.get("status") == "wait" and executed == 0
+        return overlap, quantity
+
+    def replacement_quantity(self, quantity, cancel_response):
+        """_summary_
+        Quantity left to replace once a cancel was acknowledged.
+
+        Args:
+            quantity (float): requested replacement quantity, None for the order's remaining quantity
+            cancel_response (tuple): (status code, order) of cancel_order
+        Returns:
+            float: quantity to place, 0 when nothing is left
+        """
+        order = cancel_response[1] if cancel_response[0] == 200 else {}
+        executed = float(order.get("executedQty") or 0)
+        if quantity is None:
+            return max(float(order.get("origQty") or 0) - executed, 0)
+        return max(float(quantity) - executed, 0)
+
+    def replace_report(self, order_id, cancel, new, overlapped, started):
+        """_summary_
+        Outcome of a replace. When the replacement went out together with the
+        cancel, the quantity the old order executed before its cancel landed is
+        placed twice; it is reported as excess so the caller can re-size or
+        cancel the replacement. If the cancel failed, e.g. because the old order
+        filled completely, the whole replacement is excess.
+
+        Args:
+            order_id (int): replaced order id
+            cancel (tuple): (status code, order) of cancel_order
+            new (tuple): (status code, order) of new_order, None if it was not sent
+            overlapped (bool): whether the cancel and the new order were sent together
+            started (float): time.monotonic() when the replace began
+        Returns:
+            dict: order_id, cancel, new, overlapped, excess and latency in seconds
+        """
+        excess = 0.0
+        if overlapped and new is not None and new[0] in (200, 201):
+            if cancel[0] == 200:
+                excess = float(cancel[1].get("executedQty") or 0)
+            else:
+                excess = float(new[1].get("origQty") or 0)
+        return {
+            "order_id": order_id,
+            "cancel": cancel,
+            "new": new,
+            "overlapped": overlapped,
+            "excess": excess,
+            "latency": time.monotonic() - started,
+        }
+
+    def replace(self, order_id=None, new_price=None, symbol=None, side=None, quantity=None,
+                order_type="limit", state=None):
+        """_summary_
+        Re-prices a resting order: cancels it and places the same order at new_price.
+
+        No query_order is sent; the order's locally known state decides (see
+        replace_plan) whether the new order goes out together with the cancel,
+        keeping a quote in the market, or after the cancel is acknowledged.
+
+        Rate limit: 10 per second for each of the cancel and the new order
+        Args:
+            order_id: unique order id
+            new_price: price of the replacement
+            symbol: crypto name
+            side: buy/sell side
+            quantity: replacement quantity, defaults to the remaining quantity of the order
+            order_type: limit/stop_limit
+            state (dict, optional): locally known order state
+        Returns:
+            dict: order_id, cancel and new responses (new is None if it was not sent),
+                overlapped, excess (quantity an overlapped replacement placed twice, see
+                replace_report) and the combined latency in seconds
+        """
+        started = time.monotonic()
+        plan = self.replace_plan(quantity, state)
+        if plan is None:
+            return self.replace_report(order_id, (404, {"error": "order is not open"}),
+                                       None, False, started)
+        overlap, quantity = plan
+        cancel_data = {"symbol": symbol, "order_id": order_id}
+        new_data = {"symbol": symbol, "side": side, "order_type": order_type,
+                    "quantity": quantity, "price": new_price, "stop_price": new_price}
+
+        if overlap:
+            cancel_future = _replace_executor.submit(
+                self.process_order, "cancel_order", cancel_data)
+            new = self.process_order("new_order", new_data)
+            return self.replace_report(order_id, cancel_future.result(), new, True, started)
+
+        cancel = self.process_order("cancel_order", cancel_data)
+        new = None
+        if cancel[0] == 200:
+            new_data["quantity"] = self.replacement_quantity(quantity, cancel)
+            if new_data["quantity"]:
+                new = self.process_order("new_order", new_data)
+        return self.replace_report(order_id, cancel, new, False, started)
@@ -0,0 +1,320 @@
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from operator import neg
+
+from sortedcontainers import SortedDict
+from wazirx.websocket import DepthFrame, WebsocketClient
+
+from .log import setup_logger
+
+
+class OrderBook:
+    def __init__(self, symbol):
+        """_summary_
+        Local order book of one symbol. Price levels are kept in sorted dicts
+        (O(log n) updates) with the best level at index 0 (O(1) top of book).
+        Levels keep the exchange's price/quantity strings so callers get the
+        same shape as the REST depth response.
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            self.synced (bool): False until a snapshot is applied and after a sequence gap
+        """
+        self.symbol = symbol
+        self.bids = SortedDict(neg)
+        self.asks = SortedDict()
+        self.synced = False
+        self.last_event_time = 0
+        self.last_update_id = None
+        self.lock = threading.Lock()
+
+    def _apply_levels(self, side, levels):
+        for price, quantity in levels:
+            key = float(price)
+            if float(quantity) == 0:
+                side.pop(key, None)
+            else:
+                side[key] = [price, quantity]
+
+    def apply_snapshot(self, bids, asks, event_time=0, update_id=None):
+        """_summary_
+        Replaces the book with a REST depth snapshot.
+
+        Args:
+            bids (list): [[price, quantity], ...]
+            asks (list): [[price, quantity], ...]
+            event_time (int): snapshot timestamp in ms, older updates are ignored
+            update_id (int, optional): last update id covered by the snapshot
+        Returns: NONE
+        """
+        with self.lock:
+            self.bids.clear()
+            self.asks.clear()
+            self._apply_levels(self.bids, bids)
+            self._apply_levels(self.asks, asks)
+            self.last_event_time = event_time or 0
+            self.last_update_id = update_id
+            self.synced = True
+
+    def apply_update(self, bids, asks, event_time=0, first_update_id=None, last_update_id=None):
+        """_summary_
+        Applies an incremental depth update; a quantity of 0 removes the level.
+
+        Updates carrying update ids must continue the previous one. Without ids,
+        updates older than the book are ignored and a crossed book after an
+        update is treated as a gap.
+
+        Args:
+            bids (list): [[price, quantity], ...]
+            asks (list): [[price, quantity], ...]
+            event_time (int): exchange event time in ms
+            first_update_id (int, optional): first update id in the event
+            last_update_id (int, optional): last update id in the event
+        Returns:
+            bool: False if a gap was detected and the book needs a resync
+        """
+        with self.lock:
+            if not self.synced:
+                return False
+            if last_update_id is not None and self.last_update_id is not None:
+                if last_update_id <= self.last_update_id:
+                    return True
+                if first_update_id is not None and first_update_id > self.last_update_id + 1:
+                    self.synced = False
+                    return False
+            elif event_time and event_time < self.last_event_time:
+                return True
+
+            self._apply_levels(self.bids, bids)
+            self._apply_levels(self.asks, asks)
+            self.last_event_time = event_time or self.last_event_time
+            if last_update_id is not None:
+                self.last_update_id = last_update_id
+
+            if self.bids and self.asks and self.bids.peekitem(0)[0] >= self.asks.peekitem(0)[0]:
+                self.synced = False
+                return False
+            return True
+
+    def best_bid(self):
+        """_summary_
+
+        Args: NONE
+        Returns:
+            list: [price, quantity] of the best bid or None
+        """
+        with self.lock:
+            if not self.bids:
+                return None
+            return self.bids.peekitem(0)[1]
+
+    def best_ask(self):
+        """_summary_
+
+        Args: NONE
+        Returns:
+            list: [price, quantity] of the best ask or None
+        """
+        with self.lock:
+            if not self.asks:
+                return None
+            return self.asks.peekitem(0)[1]
+
+    def levels(self, n=5):
+        """_summary_
+
+        Args:
+            n (int): number of levels per side
+        Returns:
+            dict: {"bids": [[price, quantity], ...], "asks": [...]}, best first
+        """
+        with self.lock:
+            return {
+                "bids": [self.bids.peekitem(i)[1] for i in range(min(n, len(self.bids)))],
+                "asks": [self.asks.peekitem(i)[1] for i in range(min(n, len(self.asks)))],
+            }
+
+
+class OrderBookManager:
+    def __init__(self, market_data, symbols=None, websocket_client=None, snapshot_limit=20,
+                 stream_url=None):
+        """_summary_
+        Keeps an OrderBook per symbol up to date from the @depth websocket
+        stream, resyncing a book from a REST snapshot whenever a gap is found.
+
+        Args:
+            market_data (MarketData): used for REST depth snapshots
+            symbols (list): symbols to maintain
+            websocket_client (WebsocketClient, optional): defaults to a public client
+            snapshot_limit (int): levels requested per snapshot
+            stream_url (str, optional): websocket url, e.g. a local MockExchange, defaults to the
+                WebsocketClient.connect url
+        Returns:
+            self.books (dict): {symbol: OrderBook}
+            self.listeners (list): callables called with the OrderBook after every applied update or snapshot
+        """
+        self.market_data = market_data
+        self.symbols = list(symbols or [])
+        self.websocket_client = websocket_client or WebsocketClient()
+        self.snapshot_limit = snapshot_limit
+        self.stream_url = stream_url
+        self.books = {symbol: OrderBook(symbol) for symbol in self.symbols}
+        self.resyncs = 0
+        self.listeners = []
+        self.log = setup_logger()
+        self._resyncing = set()
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._thread = None
+        for symbol in self.symbols:
+            self.websocket_client.on(symbol + "@depth", self.handle_message)
+
+    def add_listener(self, listener):
+        """_summary_
+        Registers listener(book), called after every applied update or snapshot.
+        Listeners run on the stream thread and must be quick.
+
+        Args:
+            listener (callable): callback
+        Returns: NONE
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """_summary_
+        Unregisters a listener added with add_listener.
+
+        Args:
+            listener (callable): callback
+        Returns: NONE
+        """
+        # a new list, so a notification iterating over the old one is not disturbed
+        self.listeners = [known for known in self.listeners if known != listener]
+
+    def book(self, symbol):
+        return self.books.get(symbol)
+
+    def best_bid(self, symbol):
+        return self.books[symbol].best_bid()
+
+    def best_ask(self, symbol):
+        return self.books[symbol].best_ask()
+
+    def levels(self, symbol, n=5):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+            n (int): number of levels per side
+        Returns:
+            dict: levels of a synced book, None while the book is resyncing
+        """
+        book = self.books.get(symbol)
+        if book is None or not book.synced:
+            return None
+        return book.levels(n)
+
+    def handle_message(self, message):
+        """_summary_
+        Applies a websocket frame to its book if it is a depth update.
+
+        Args:
+            message (dict/DepthFrame): decoded websocket frame, a DepthFrame
+                when the client decodes compact frames
+        Returns: NONE
+        """
+        if isinstance(message, DepthFrame):
+            symbol = message.symbol or message.stream.split("@", 1)[0]
+            update = (message.bids, message.asks, message.event_time,
+                      message.first_update_id, message.last_update_id)
+        else:
+            stream = message.get("stream", "")
+            if not stream.endswith("@depth"):
+                return
+            data = message.get("data") or {}
+            symbol = data.get("s") or stream.split("@", 1)[0]
+            update = (data.get("b", []), data.get("a", []), data.get("E", 0),
+                      data.get("U"), data.get("u"))
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        applied = book.apply_update(*update)
+        if not applied:
+            self.request_resync(symbol)
+        else:
+            self._notify(book)
+
+    def _notify(self, book):
+        for listener in self.listeners:
+            try:
+                listener(book)
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+    def request_resync(self, symbol):
+        """_summary_
+        Schedules a REST snapshot for a book off the socket reader's thread.
+
+        Args:
+            symbol (str): crypto name
+        Returns: NONE
+        """
+        if symbol in self._resyncing:
+            return
+        self._resyncing.add(symbol)
+        self._executor.submit(self.resync, symbol)
+
+    def resync(self, symbol):
+        """_summary_
+        Reloads a book from a REST depth snapshot.
+
+        Args:
+            symbol (str): crypto name
+        Returns: NONE
+        """
+        try:
+            status_code, depth = self.market_data.get_symbol_depth(
+                symbol=symbol, limit=self.snapshot_limit)
+            if status_code == 200:
+                self.books[symbol].apply_snapshot(
+                    depth.get("bids", []),
+                    depth.get("asks", []),
+                    depth.get("timestamp", 0),
+                    depth.get("lastUpdateId"),
+                )
+                self.resyncs += 1
+                self._notify(self.books[symbol])
+        except Exception:
+            self.log.error(traceback.format_exc())
+        finally:
+            self._resyncing.discard(symbol)
+
+    async def run(self):
+        """_summary_
+        Connects the websocket, subscribes to depth for every symbol and loads
+        the initial snapshots. Runs until the connection ends.
+
+        Args: NONE
+        Returns: NONE
+        """
+        kwargs = {"uri": self.stream_url} if self.stream_url else {}
+        connection = asyncio.ensure_future(self.websocket_client.connect(**kwargs))
+        await self.websocket_client.depth(symbol=self.symbols)
+        for symbol in self.symbols:
+            self.request_resync(symbol)
+        await connection
+
+    def start(self):
+        """_summary_
+        Runs the feed on its own event loop in a daemon thread so synchronous
+        strategies can read the books without polling.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=asyncio.run, args=(self.run(),), daemon=True)
+            self._thread.start()
@@ -0,0 +1,277 @@
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+import traceback
+
+from wazirx.rest.metrics import Histogram
+from wazirx.rest.rate_limit import current_flow, flow
+
+from .async_order import AsyncOrder
+from .log import setup_logger
+
+CANCEL = 0
+NEW = 1
+QUERY = 2
+LANE_NAMES = ("cancel", "new", "query")
+
+# Lane of every process_order type; cancels pre-empt the other lanes.
+LANES = {
+    "cancel_order": CANCEL,
+    "new_order": NEW,
+    "test_order": NEW,
+    "query_order": QUERY,
+}
+
+# Upper bounds, in seconds, of the time in queue and latency buckets.
+GATEWAY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class OrderIntent:
+    __slots__ = ("lane", "process_type", "data", "future", "enqueued", "flow")
+
+    def __init__(self, lane, process_type, data, future, flow=None):
+        self.lane = lane
+        self.process_type = process_type
+        self.data = data
+        self.future = future
+        self.enqueued = time.monotonic()
+        # rate limiter flow of the submitting thread, see rate_limit.flow
+        self.flow = flow
+
+
+class LaneStats:
+    __slots__ = ("submitted", "completed", "errors", "max_depth", "time_in_queue", "latency")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.time_in_queue = Histogram(GATEWAY_BUCKETS)
+        self.latency = Histogram(GATEWAY_BUCKETS)
+
+
+class OrderGateway:
+    def __init__(self, api_key=None, api_secret=None, context=None, concurrency=10):
+        """_summary_
+        Accepts order intents from any thread and submits them concurrently
+        through an AsyncOrder, whose rate limiter keeps them within the 10/s
+        order budget. Intents wait in three lanes: cancels are dispatched as
+        soon as they arrive, new orders and queries in FIFO order while fewer
+        than `concurrency` of them are in flight.
+
+        Args:
+            api_key (str): wazirx api key
+            api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys
+                when given; the caller keeps owning it and closes it
+            concurrency (int): new orders and queries in flight at once
+        Returns:
+            self.order: AsyncOrder instance
+        """
+        self.order = AsyncOrder(api_key, api_secret, context)
+        # a context created here is closed when the gateway stops
+        self._owns_context = context is None
+        self.concurrency = concurrency
+        self.lanes = [collections.deque() for _ in LANE_NAMES]
+        self.stats_by_lane = [LaneStats() for _ in LANE_NAMES]
+        self.in_flight = 0
+        self.log = setup_logger()
+        self._loop = None
+        self._wakeup = None
+        self._tasks = set()
+        self._main = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def submit(self, process_type=None, data=None):
+        """_summary_
+        Queues an intent; safe to call from any thread.
+
+        Args:
+            process_type (str): new_order, cancel_order, query_order or test_order
+            data (dict): arguments of Order.process_order
+        Returns:
+            concurrent.futures.Future: resolves to the (status code, body) acknowledgement
+        """
+        if process_type not in LANES:
+            raise ValueError(f"Unknown process type '{process_type}'")
+        if self._loop is None:
+            raise RuntimeError("OrderGateway is not running, call start() or await run()")
+        future = concurrent.futures.Future()
+        intent = OrderIntent(LANES[process_type], process_type, data or {}, future, current_flow())
+        self._loop.call_soon_threadsafe(self._enqueue, intent)
+        return future
+
+    async def asubmit(self, process_type=None, data=None):
+        """_summary_
+        Queues an intent from a coroutine and waits for its acknowledgement.
+
+        Returns:
+            response (tuple): (status code, {})
+        """
+        return await asyncio.wrap_future(self.submit(process_type, data))
+
+    def replace(self, order_id=None, new_price=None, symbol=None, side=None, quantity=None,
+                order_type="limit", state=None):
+        """_summary_
+        Queues an AsyncOrder.replace whose cancel and new order go through the
+        cancel and new lanes; safe to call from any thread.
+
+        Returns:
+            concurrent.futures.Future: resolves to the replace report
+        """
+        if self._loop is None:
+            raise RuntimeError("OrderGateway is not running, call start() or await run()")
+        return asyncio.run_coroutine_threadsafe(self.order.replace(
+            order_id, new_price, symbol, side, quantity, order_type, state,
+            submit=self.asubmit), self._loop)
+
+    def _enqueue(self, intent):
+        lane = self.lanes[intent.lane]
+        lane.append(intent)
+        stats = self.stats_by_lane[intent.lane]
+        stats.submitted += 1
+        stats.max_depth = max(stats.max_depth, len(lane))
+        self._wakeup.set()
+
+    def _next(self):
+        if self.lanes[CANCEL]:
+            return self.lanes[CANCEL].popleft()
+        if self.in_flight < self.concurrency:
+            for lane in (NEW, QUERY):
+                if self.lanes[lane]:
+                    self.in_flight += 1
+                    return self.lanes[lane].popleft()
+        return None
+
+    def _release(self, intent):
+        if intent.lane != CANCEL:
+            self.in_flight -= 1
+            self._wakeup.set()
+
+    async def _execute(self, intent):
+        if not intent.future.set_running_or_notify_cancel():
+            # cancelled by the caller while queued
+            self._release(intent)
+            return
+        started = time.monotonic()
+        stats = self.stats_by_lane[intent.lane]
+        stats.time_in_queue.observe(started - intent.enqueued)
+        try:
+            with flow(intent.flow):
+                response = await self.order.process_order(intent.process_type, intent.data)
+            if response[0] not in (200, 201):
+                stats.errors += 1
+            intent.future.set_result(response)
+        except asyncio.CancelledError as error:
+            stats.errors += 1
+            intent.future.set_exception(error)
+            raise
+        except Exception as error:
+            stats.errors += 1
+            self.log.error(traceback.format_exc())
+            intent.future.set_exception(error)
+        finally:
+            stats.completed += 1
+            stats.latency.observe(time.monotonic() - started)
+            self._release(intent)
+
+    async def run(self):
+        """_summary_
+        Dispatches intents on the running loop until cancelled.
+
+        Args: NONE
+        Returns: NONE
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._main = asyncio.current_task()
+        self._ready.set()
+        try:
+            while True:
+                intent = self._next()
+                if intent is None:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                task = asyncio.ensure_future(self._execute(intent))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for lane in self.lanes:
+                while lane:
+                    lane.popleft().future.cancel()
+            if self._owns_context:
+                await self.order.context.aclose()
+            self._loop = None
+            self._main = None
+            self._ready.clear()
+
+    def start(self):
+        """_summary_
+        Runs the gateway on its own event loop in a daemon thread, so synchronous
+        strategies can submit() and wait on the returned futures.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=asyncio.run, args=(self.run(),), daemon=True)
+            self._thread.start()
+            self._ready.wait()
+
+    def stop(self, timeout=5):
+        """_summary_
+        Stops dispatching; queued intents are cancelled, in-flight ones fail
+        with CancelledError.
+
+        Args:
+            timeout (int): seconds to wait for the gateway thread
+        Returns: NONE
+        """
+        loop, main = self._loop, self._main
+        if loop is not None and main is not None:
+            loop.call_soon_threadsafe(main.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def queue_depth(self):
+        """_summary_
+
+        Args: NONE
+        Returns:
+            dict: intents waiting per lane
+        """
+        return {name: len(lane) for name, lane in zip(LANE_NAMES, self.lanes)}
+
+    def stats(self):
+        """_summary_
+
+        Args: NONE
+        Returns:
+            dict: per lane queue depth, submitted, completed and error counts, and
+                time in queue and latency histograms in seconds, plus the intents in flight
+        """
+        output = {"in_flight": self.in_flight}
+        for name, lane, stats in zip(LANE_NAMES, self.lanes, self.stats_by_lane):
+            output[name] = {
+                "depth": len(lane),
+                "max_depth": stats.max_depth,
+                "submitted": stats.submitted,
+                "completed": stats.completed,
+                "errors": stats.errors,
+                "time_in_queue": stats.time_in_queue.snapshot(),
+                "latency": stats.latency.snapshot(),
+            }
+        return output
@@ -0,0 +1,240 @@
+import threading
+
+from sortedcontainers import SortedList
+
+OPEN = "open"
+FILLED = "filled"
+STATUSES = (OPEN, FILLED)
+
+
+class OrderRecord:
+    __slots__ = ("order_id", "symbol", "side", "price", "quantity", "status")
+
+    def __init__(self, order_id, symbol, side, price, quantity=None, status=OPEN):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.status = status
+
+    def __repr__(self):
+        return (f"OrderRecord({self.order_id!r}, {self.symbol!r}, {self.side!r}, "
+                f"{self.price!r}, {self.quantity!r}, {self.status!r})")
+
+
+class OrderStore:
+    def __init__(self):
+        """_summary_
+        In-memory store of the strategy's resting orders. Records are indexed by
+        (symbol, side, status), so lookups, open counts and status changes touch
+        one index entry instead of copying per-symbol dicts, and every symbol
+        and side keeps a price-sorted list (O(log n) updates).
+
+        Each symbol is a partition with its own lock, so workers trading
+        different symbols never wait on each other.
+
+        Args: NONE
+        Returns:
+            self.orders (dict): {order_id: OrderRecord}
+        """
+        self.orders = {}
+        self.symbols = set()
+        self._locks = {}
+        self._index = {}
+        self._prices = {}
+
+    def lock(self, symbol):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            threading.RLock: lock of the symbol's partition
+        """
+        lock = self._locks.get(symbol)
+        if lock is None:
+            lock = self._locks.setdefault(symbol, threading.RLock())
+        return lock
+
+    def _bucket(self, symbol, side, status):
+        key = (symbol, side, status)
+        bucket = self._index.get(key)
+        if bucket is None:
+            bucket = self._index[key] = {}
+        return bucket
+
+    def _price_list(self, symbol, side):
+        key = (symbol, side)
+        prices = self._prices.get(key)
+        if prices is None:
+            prices = self._prices[key] = SortedList()
+        return prices
+
+    def add(self, order_id, symbol, side, price, quantity=None, status=OPEN):
+        """_summary_
+        Stores an order, replacing any record with the same id.
+
+        Args:
+            order_id (int): unique order id
+            symbol (str): crypto name
+            side (str): buy/sell side
+            price (float): order price
+            quantity (float, optional): order quantity
+            status (str): open/filled
+        Returns:
+            OrderRecord: the stored record
+        """
+        record = OrderRecord(order_id, symbol, side, price, quantity, status)
+        self.remove(order_id)
+        with self.lock(symbol):
+            self.orders[order_id] = record
+            self.symbols.add(symbol)
+            self._bucket(symbol, side, status)[order_id] = record
+            self._price_list(symbol, side).add((price, order_id))
+        return record
+
+    def get(self, order_id):
+        """_summary_
+
+        Args:
+            order_id (int): unique order id
+        Returns:
+            OrderRecord: the record, None if the order is unknown
+        """
+        return self.orders.get(order_id)
+
+    def set_status(self, order_id, status):
+        """_summary_
+        Moves an order to another status index.
+
+        Args:
+            order_id (int): unique order id
+            status (str): open/filled
+        Returns:
+            bool: False if the order is unknown
+        """
+        record = self.orders.get(order_id)
+        if record is None:
+            return False
+        with self.lock(record.symbol):
+            if record.status != status:
+                del self._index[(record.symbol, record.side, record.status)][order_id]
+                record.status = status
+                self._bucket(record.symbol, record.side, status)[order_id] = record
+            return True
+
+    def mark_filled(self, order_id):
+        return self.set_status(order_id, FILLED)
+
+    def remove(self, order_id):
+        """_summary_
+
+        Args:
+            order_id (int): unique order id
+        Returns:
+            OrderRecord: the removed record, None if the order is unknown
+        """
+        record = self.orders.get(order_id)
+        if record is None:
+            return None
+        with self.lock(record.symbol):
+            if self.orders.pop(order_id, None) is None:
+                return None
+            del self._index[(record.symbol, record.side, record.status)][order_id]
+            self._prices[(record.symbol, record.side)].remove((record.price, order_id))
+        return record
+
+    def remove_filled(self, symbol, side):
+        """_summary_
+        Removes the filled orders of a symbol and side.
+
+        Args:
+            symbol (str): crypto name
+            side (str): buy/sell side
+        Returns:
+            list: removed OrderRecords
+        """
+        with self.lock(symbol):
+            removed = list(self._index.get((symbol, side, FILLED), {}).values())
+            for record in removed:
+                self.remove(record.order_id)
+            return removed
+
+    def orders_for(self, symbol=None, side=None, status=None):
+        """_summary_
+        Records matching the given filters, in insertion order. The result is a
+        list, so the store can be updated while iterating over it.
+
+        Args:
+            symbol (str, optional): crypto name, all symbols if None
+            side (str, optional): buy/sell side, both if None
+            status (str, optional): open/filled, both if None
+        Returns:
+            list: OrderRecords
+        """
+        symbols = self.symbols if symbol is None else (symbol,)
+        sides = ("buy", "sell") if side is None else (side,)
+        statuses = STATUSES if status is None else (status,)
+        records = []
+        for symbol in list(symbols):
+            with self.lock(symbol):
+                records.extend(record for side in sides for status in statuses
+                               for record in self._index.get((symbol, side, status), {}).values())
+        return records
+
+    def count(self, symbol, side=None, status=None):
+        """_summary_
+        Number of orders of a symbol, in O(1).
+
+        Args:
+            symbol (str): crypto name
+            side (str, optional): buy/sell side, both if None
+            status (str, optional): open/filled, both if None
+        Returns:
+            int: order count
+        """
+        sides = ("buy", "sell") if side is None else (side,)
+        statuses = STATUSES if status is None else (status,)
+        return sum(len(self._index.get((symbol, side, status), ()))
+                   for side in sides for status in statuses)
+
+    def open_count(self, symbol, side=None):
+        return self.count(symbol, side, OPEN)
+
+    def by_price(self, symbol, side):
+        """_summary_
+        Orders of a symbol and side from the best price: highest first for
+        buys, lowest first for sells.
+
+        Args:
+            symbol (str): crypto name
+            side (str): buy/sell side
+        Returns:
+            list: OrderRecords
+        """
+        with self.lock(symbol):
+            prices = self._prices.get((symbol, side), ())
+            ordered = reversed(prices) if side == "buy" else iter(prices)
+            return [self.orders[order_id] for _, order_id in ordered]
+
+    def best(self, symbol, side):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+            side (str): buy/sell side
+        Returns:
+            OrderRecord: order with the best price, None if there are none
+        """
+        with self.lock(symbol):
+            prices = self._prices.get((symbol, side))
+            if not prices:
+                return None
+            return self.orders[prices[-1 if side == "buy" else 0][1]]
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
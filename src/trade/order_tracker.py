@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+import traceback
+
+from wazirx.websocket import WebsocketClient
+
+from .log import setup_logger
+from .order import FINAL_STATUSES
+SIDES = {"bid": "buy", "ask": "sell"}
+
+
+class OrderTracker:
+    def __init__(self, order, websocket_client=None, reconcile_interval=30, reconcile_batch=2,
+                 stream_url=None):
+        """_summary_
+        Order state cache fed by the orderUpdate and ownTrade user streams.
+        REST query_order is only used to reconcile open orders the stream has
+        not reported on for reconcile_interval seconds.
+
+        Args:
+            order (Order): used for REST reconciliation and for the api keys of the user stream
+            websocket_client (WebsocketClient, optional): defaults to a private client with the order's keys
+            reconcile_interval (int): seconds without a stream update before an open order is queried
+            reconcile_batch (int): maximum orders queried per reconcile call (query_order allows 2 per second)
+            stream_url (str, optional): websocket url, e.g. a local MockExchange, defaults to the
+                WebsocketClient.connect url
+        Returns:
+            self.orders (dict): {order_id: state dict}
+        """
+        self.order = order
+        self.websocket_client = websocket_client or WebsocketClient(
+            api_key=order.context.api_key, secret_key=order.context.api_secret,
+            api_url=order.context.api_url)
+        self.stream_url = stream_url
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_batch = reconcile_batch
+        self.orders = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self._reconciling = threading.Lock()
+        self.log = setup_logger()
+        self._seen_trades = set()
+        self._thread = None
+
+        self.websocket_client.on("orderUpdate", self.handle_order_update)
+        self.websocket_client.on("ownTrade", self.handle_own_trade)
+
+    def add_listener(self, listener):
+        """_summary_
+        Registers listener(order_id, state), called when an order changes status.
+        Listeners run on the stream thread and must be quick.
+
+        Args:
+            listener (callable): callback
+        Returns: NONE
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """_summary_
+        Unregisters a listener added with add_listener.
+
+        Args:
+            listener (callable): callback
+        Returns: NONE
+        """
+        # a new list, so a notification iterating over the old one is not disturbed
+        self.listeners = [known for known in self.listeners if known != listener]
+
+    def _state(self, order_id):
+        state = self.orders.get(order_id)
+        if state is None:
+            state = {
+                "symbol": None,
+                "side": None,
+                "price": None,
+                "origQty": 0.0,
+                "executedQty": 0.0,
+                "tradedQty": 0.0,
+                "status": "wait",
+                "updated": time.monotonic(),
+            }
+            self.orders[order_id] = state
+        return state
+
+    def _update(self, order_id, status=None, **fields):
+        with self.lock:
+            state = self._state(order_id)
+            previous = state["status"]
+            state.update({k: v for k, v in fields.items() if v is not None})
+            if status is not None:
+                state["status"] = status
+            state["updated"] = time.monotonic()
+            changed = state["status"] != previous
+            snapshot = dict(state)
+        if changed:
+            for listener in self.listeners:
+                try:
+                    listener(order_id, snapshot)
+                except Exception:
+                    self.log.error(traceback.format_exc())
+
+    def track(self, order_id, symbol=None, side=None, price=None, quantity=None):
+        """_summary_
+        Starts tracking an order placed over REST, before the stream reports it.
+
+        Args:
+            order_id (int): unique order id
+            symbol (str): crypto name
+            side (str): buy/sell
+            price (float): order price
+            quantity (float): order quantity
+        Returns: NONE
+        """
+        with self.lock:
+            state = self._state(order_id)
+            state.update({k: v for k, v in (("symbol", symbol), ("side", side),
+                                            ("price", price), ("origQty", quantity)) if v is not None})
+
+    def forget(self, order_id):
+        with self.lock:
+            self.orders.pop(order_id, None)
+
+    def get(self, order_id):
+        """_summary_
+
+        Args:
+            order_id (int): unique order id
+        Returns:
+            dict: copy of the order state, None if the order is unknown
+        """
+        with self.lock:
+            state = self.orders.get(order_id)
+            return dict(state) if state is not None else None
+
+    def status(self, order_id):
+        state = self.orders.get(order_id)
+        return state["status"] if state is not None else None
+
+    def is_filled(self, order_id):
+        return self.status(order_id) == "done"
+
+    def handle_order_update(self, message):
+        """_summary_
+        Applies an orderUpdate frame: X status, i order id, s symbol, S side (bid/ask),
+        p price, q original quantity, v executed quantity.
+
+        Args:
+            message (dict): decoded websocket frame
+        Returns: NONE
+        """
+        data = message.get("data") or {}
+        if "i" not in data:
+            return
+        self._update(
+            data["i"],
+            status=data.get("X"),
+            symbol=data.get("s"),
+            side=SIDES.get(data.get("S")),
+            price=float(data["p"]) if data.get("p") else None,
+            origQty=float(data["q"]) if data.get("q") else None,
+            executedQty=float(data["v"]) if data.get("v") else None,
+        )
+
+    def handle_own_trade(self, message):
+        """_summary_
+        Applies an ownTrade frame: o order id, t trade id, q traded quantity.
+        The executed quantity is raised to the traded one at once, as the
+        orderUpdate of the fill may come later, and the order is marked done
+        once its traded quantity covers the original one.
+
+        Args:
+            message (dict): decoded websocket frame
+        Returns: NONE
+        """
+        data = message.get("data") or {}
+        if "o" not in data or data.get("t") in self._seen_trades:
+            return
+        if len(self._seen_trades) > 100000:
+            self._seen_trades.clear()
+        self._seen_trades.add(data.get("t"))
+        order_id = data["o"]
+        with self.lock:
+            state = self._state(order_id)
+            traded = state["tradedQty"] + float(data.get("q") or 0)
+            executed = max(traded, state["executedQty"])
+            filled = state["origQty"] and executed >= state["origQty"]
+        self._update(order_id, status="done" if filled else None,
+                     symbol=data.get("s"), tradedQty=traded, executedQty=executed)
+
+    def reconcile(self, now=None):
+        """_summary_
+        Queries over REST the open orders the stream has been silent about for
+        reconcile_interval seconds, at most reconcile_batch per call.
+
+        Called from every symbol worker: only one call reconciles at a time,
+        the others return at once, and the chosen orders are marked updated
+        before they are queried, so no order is queried twice per interval.
+
+        Args:
+            now (float, optional): monotonic time, defaults to now
+        Returns:
+            int: number of orders queried
+        """
+        if not self._reconciling.acquire(blocking=False):
+            return 0
+        try:
+            now = now or time.monotonic()
+            with self.lock:
+                stale = sorted(
+                    (state["updated"], order_id)
+                    for order_id, state in self.orders.items()
+                    if state["status"] not in FINAL_STATUSES
+                    and now - state["updated"] >= self.reconcile_interval
+                )[:self.reconcile_batch]
+                for _, order_id in stale:
+                    self.orders[order_id]["updated"] = now
+
+            for _, order_id in stale:
+                response = self.order.process_order(
+                    process_type="query_order", data={"order_id": order_id})
+                if response[0] == 200 and order_id in self.orders:
+                    self._update(
+                        order_id,
+                        status=response[1].get("status"),
+                        executedQty=float(response[1].get("executedQty") or 0),
+                    )
+            return len(stale)
+        finally:
+            self._reconciling.release()
+
+    async def run(self):
+        """_summary_
+        Connects the websocket and subscribes to the orderUpdate and ownTrade
+        user streams. Runs until the connection ends.
+
+        Args: NONE
+        Returns: NONE
+        """
+        kwargs = {"uri": self.stream_url} if self.stream_url else {}
+        connection = asyncio.ensure_future(self.websocket_client.connect(**kwargs))
+        await self.websocket_client.user_stream(streams=["orderUpdate", "ownTrade"])
+        await connection
+
+    def start(self):
+        """_summary_
+        Runs the user stream on its own event loop in a daemon thread.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=asyncio.run, args=(self.run(),), daemon=True)
+            self._thread.start()
@@ -0,0 +1,461 @@
+"""Top of book and recent trades shared between processes of one host.
+
+One ingest process owns the websocket connection, keeps the order books and
+publishes into a multiprocessing.shared_memory block with a fixed layout:
+
+    header         magic, version, symbol count, trade capacity
+    symbol table   32 byte names
+    book slots     seq, event time, receipt time, bid, bid qty, ask, ask qty, updates
+    trade rings    head, then `capacity` entries of
+                   seq, trade id, event time, price, quantity, side
+
+Every book slot and trade entry is a seqlock: the writer makes `seq` odd,
+writes the fields and makes it even again. Readers unpack straight from the
+shared buffer and retry when `seq` was odd or changed meanwhile, so they
+never lock and never block the writer.
+
+`seq` and the ring heads are written as single aligned 8 byte stores through
+a "Q" view of the block. struct.pack_into clears its target before packing,
+so a field written with it goes through 0 for readers in other processes;
+only the fields behind `seq` are packed. A book slot holds data once its
+update count, read under the seqlock, is non zero.
+"""
+import asyncio
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import traceback
+from multiprocessing import resource_tracker, shared_memory
+
+from wazirx.websocket import TradeFrame, WebsocketClient
+
+from .context import TradeContext
+from .log import setup_logger
+from .market_data import MarketData
+from .order_book import OrderBookManager
+
+MAGIC = b"WZXF"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIIIqd")
+HEADER_SIZE = 64
+NAME_SIZE = 32
+# Fields following the 8 byte seq of a book slot and of a trade entry.
+BOOK = struct.Struct("<qdddddq")
+TRADE = struct.Struct("<qqddq")
+SEQ_SIZE = 8
+BOOK_SIZE = SEQ_SIZE + BOOK.size
+TRADE_SIZE = SEQ_SIZE + TRADE.size
+HEAD_SIZE = 64
+
+# Attempts of a reader to get a consistent copy before giving up, e.g. when
+# the writer died in the middle of an update.
+SPIN_LIMIT = 10000
+
+BUY = 1
+SELL = -1
+
+
+def _block_size(symbols, capacity):
+    return (HEADER_SIZE + symbols * (NAME_SIZE + BOOK_SIZE)
+            + symbols * (HEAD_SIZE + capacity * TRADE_SIZE))
+
+
+class SharedFeed:
+    def __init__(self, shm, owner):
+        """_summary_
+        Shared memory block holding the feed; use SharedFeed.create() in the
+        process that publishes and SharedFeed.attach() in the readers.
+
+        Args:
+            shm (SharedMemory): mapped block
+            owner (bool): True if this process created the block and unlinks it on close
+        Returns:
+            self.symbols (list): symbols in slot order
+            self.capacity (int): trades kept per symbol
+        """
+        magic, version, count, capacity, self.pid, self.created = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{shm.name}' is not a version {VERSION} shared feed")
+        self.shm = shm
+        self.name = shm.name
+        self.buf = shm.buf
+        # 8 byte words of the block; every seq and ring head is word aligned
+        self.words = shm.buf.cast("Q")
+        self.owner = owner
+        self.capacity = capacity
+        self.symbols = []
+        for index in range(count):
+            offset = HEADER_SIZE + index * NAME_SIZE
+            raw = bytes(self.buf[offset:offset + NAME_SIZE])
+            self.symbols.append(raw.rstrip(b"\0").decode())
+        self.slots = {symbol: index for index, symbol in enumerate(self.symbols)}
+        books = HEADER_SIZE + count * NAME_SIZE
+        rings = books + count * BOOK_SIZE
+        ring_size = HEAD_SIZE + capacity * TRADE_SIZE
+        self.book_offsets = {symbol: books + index * BOOK_SIZE
+                             for symbol, index in self.slots.items()}
+        self.ring_offsets = {symbol: rings + index * ring_size
+                             for symbol, index in self.slots.items()}
+
+    @classmethod
+    def create(cls, symbols, capacity=1024, name=None):
+        """_summary_
+
+        Args:
+            symbols (list): symbols published in the block
+            capacity (int): trades kept per symbol before the oldest is overwritten
+            name (str, optional): shared memory name, random when None
+        Returns:
+            SharedFeed: writable block owned by this process
+        """
+        symbols = list(symbols)
+        for symbol in symbols:
+            if len(symbol.encode()) > NAME_SIZE:
+                raise ValueError(f"Symbol '{symbol}' longer than {NAME_SIZE} bytes")
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_block_size(len(symbols), capacity))
+        shm.buf[:shm.size] = bytes(shm.size)
+        for index, symbol in enumerate(symbols):
+            offset = HEADER_SIZE + index * NAME_SIZE
+            shm.buf[offset:offset + len(symbol.encode())] = symbol.encode()
+        HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, len(symbols), capacity,
+                         os.getpid(), time.time())
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, untrack=True):
+        """_summary_
+
+        Args:
+            name (str): name of a block created by SharedFeed.create()
+            untrack (bool): False in multiprocessing children of the creator,
+                which share its resource tracker
+        Returns:
+            SharedFeed: view of the block, left in place on close
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            # the creator owns the block; without this the resource tracker
+            # of an unrelated reader unlinks it when the reader exits
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def close(self):
+        self.words.release()
+        self.words = None
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SharedFeedWriter:
+    def __init__(self, feed):
+        """_summary_
+        Publishes into a SharedFeed. Readers are lock free; the lock only
+        serialises writers of this process (socket reader and resync thread).
+
+        Args:
+            feed (SharedFeed): block created by this process
+        Returns: NONE
+        """
+        self.feed = feed
+        self.lock = threading.Lock()
+
+    def publish_top(self, symbol, bid, bid_quantity, ask, ask_quantity, event_time=0):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+            bid, bid_quantity, ask, ask_quantity (float): top of book, 0 for an empty side
+            event_time (int): exchange event time in ms
+        Returns: NONE
+        """
+        offset = self.feed.book_offsets.get(symbol)
+        if offset is None:
+            return
+        buf = self.feed.buf
+        words = self.feed.words
+        word = offset // SEQ_SIZE
+        with self.lock:
+            seq = words[word]
+            updates = BOOK.unpack_from(buf, offset + SEQ_SIZE)[-1]
+            words[word] = seq + 1
+            BOOK.pack_into(buf, offset + SEQ_SIZE, event_time, time.time(),
+                           bid, bid_quantity, ask, ask_quantity, updates + 1)
+            words[word] = seq + 2
+
+    def publish_book(self, book):
+        """_summary_
+        Publishes the top of an OrderBook, usable as an OrderBookManager listener.
+
+        Args:
+            book (OrderBook): updated book
+        Returns: NONE
+        """
+        bid = book.best_bid() or (0, 0)
+        ask = book.best_ask() or (0, 0)
+        self.publish_top(book.symbol, float(bid[0]), float(bid[1]),
+                         float(ask[0]), float(ask[1]), book.last_event_time)
+
+    def publish_trade(self, symbol, trade_id, price, quantity, side, event_time=0):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+            trade_id (int): exchange trade id
+            price, quantity (float): trade price and quantity
+            side (str): taker side, "buy" or "sell"
+            event_time (int): exchange event time in ms
+        Returns: NONE
+        """
+        offset = self.feed.ring_offsets.get(symbol)
+        if offset is None:
+            return
+        buf = self.feed.buf
+        words = self.feed.words
+        with self.lock:
+            head = words[offset // SEQ_SIZE]
+            entry = offset + HEAD_SIZE + (head % self.feed.capacity) * TRADE_SIZE
+            # entry n is complete when its seq is 2n + 2
+            words[entry // SEQ_SIZE] = 2 * head + 1
+            TRADE.pack_into(buf, entry + SEQ_SIZE, trade_id, event_time, price, quantity,
+                            BUY if side == "buy" else SELL)
+            words[entry // SEQ_SIZE] = 2 * head + 2
+            words[offset // SEQ_SIZE] = head + 1
+
+    def handle_trades(self, message):
+        """_summary_
+        Publishes the trades of a websocket @trades frame.
+
+        Args:
+            message (dict/TradeFrame): decoded websocket frame, a TradeFrame
+                when the client decodes compact frames
+        Returns: NONE
+        """
+        if isinstance(message, TradeFrame):
+            trades = message.trades
+        else:
+            trades = (message.get("data") or {}).get("trades", [])
+        for trade in trades:
+            self.publish_trade(trade["s"], int(trade["t"]), float(trade["p"]),
+                               float(trade["q"]), trade["S"], trade.get("E", 0))
+
+
+class SharedFeedReader:
+    def __init__(self, name):
+        """_summary_
+        Lock free reader of a feed published by another process. Mirrors the
+        best_bid/best_ask interface of OrderBookManager with float levels.
+
+        Args:
+            name (str): shared memory name of the feed
+        Returns:
+            self.retries (int): seqlock retries, a measure of contention
+        """
+        self.feed = SharedFeed.attach(name)
+        self.symbols = self.feed.symbols
+        self.retries = 0
+
+    def top(self, symbol):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            dict: bid, bid_quantity, ask, ask_quantity, event_time, received and
+                updates, None before the first update
+        """
+        offset = self.feed.book_offsets[symbol]
+        buf = self.feed.buf
+        words = self.feed.words
+        word = offset // SEQ_SIZE
+        for _ in range(SPIN_LIMIT):
+            seq = words[word]
+            record = BOOK.unpack_from(buf, offset + SEQ_SIZE)
+            if seq & 1 or words[word] != seq:
+                self.retries += 1
+                # the writer may be switched out mid update, let it run
+                time.sleep(0)
+                continue
+            event_time, received, bid, bid_quantity, ask, ask_quantity, updates = record
+            if not updates:
+                return None
+            return {
+                "bid": bid, "bid_quantity": bid_quantity,
+                "ask": ask, "ask_quantity": ask_quantity,
+                "event_time": event_time, "received": received, "updates": updates,
+            }
+        return None
+
+    def best_bid(self, symbol):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            list: [price, quantity] of the best bid or None
+        """
+        top = self.top(symbol)
+        if top is None or not top["bid_quantity"]:
+            return None
+        return [top["bid"], top["bid_quantity"]]
+
+    def best_ask(self, symbol):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            list: [price, quantity] of the best ask or None
+        """
+        top = self.top(symbol)
+        if top is None or not top["ask_quantity"]:
+            return None
+        return [top["ask"], top["ask_quantity"]]
+
+    def trade_head(self, symbol):
+        """_summary_
+
+        Args:
+            symbol (str): crypto name
+        Returns:
+            int: number of trades published so far, a cursor for trades()
+        """
+        return self.feed.words[self.feed.ring_offsets[symbol] // SEQ_SIZE]
+
+    def trades(self, symbol, since=0):
+        """_summary_
+        Trades published after cursor `since`. Trades overwritten before they
+        were read are skipped and counted.
+
+        Args:
+            symbol (str): crypto name
+            since (int): cursor returned by the previous call, 0 for every trade still in the ring
+        Returns:
+            tuple: ([(trade_id, event_time, price, quantity, side), ...], next cursor, lost trades)
+        """
+        offset = self.feed.ring_offsets[symbol]
+        capacity = self.feed.capacity
+        buf = self.feed.buf
+        words = self.feed.words
+        head = words[offset // SEQ_SIZE]
+        start = max(since, head - capacity)
+        lost = start - since
+        trades = []
+        for index in range(start, head):
+            entry = offset + HEAD_SIZE + (index % capacity) * TRADE_SIZE
+            seq = words[entry // SEQ_SIZE]
+            trade_id, event_time, price, quantity, side = TRADE.unpack_from(buf, entry + SEQ_SIZE)
+            if seq != 2 * index + 2 or words[entry // SEQ_SIZE] != seq:
+                # lapped by the writer while reading
+                lost += 1
+                continue
+            trades.append((trade_id, event_time, price, quantity,
+                           "buy" if side == BUY else "sell"))
+        return trades, head, lost
+
+    def close(self):
+        self.feed.close()
+
+
+def run_ingest(name, symbols, api_url=None, stream_url=None, snapshot_limit=20):
+    """_summary_
+    Body of the ingest process: maintains the books of `symbols` from one
+    websocket connection and publishes them into the feed `name`.
+
+    Args:
+        name (str): shared memory name created by the parent
+        symbols (list): symbols to publish
+        api_url (str, optional): REST base url for snapshots
+        stream_url (str, optional): websocket url
+        snapshot_limit (int): levels per REST snapshot
+    Returns: NONE
+    """
+    log = setup_logger()
+    feed = SharedFeed.attach(name, untrack=False)
+    writer = SharedFeedWriter(feed)
+    websocket_client = WebsocketClient(api_url=api_url)
+    manager = OrderBookManager(
+        MarketData(context=TradeContext(api_url=api_url)), symbols,
+        websocket_client=websocket_client, snapshot_limit=snapshot_limit)
+    manager.listeners.append(writer.publish_book)
+    for symbol in symbols:
+        websocket_client.on(symbol + "@trades", writer.handle_trades)
+
+    async def _run():
+        kwargs = {"uri": stream_url} if stream_url else {}
+        connection = asyncio.ensure_future(websocket_client.connect(**kwargs))
+        await websocket_client.depth(symbol=symbols)
+        await websocket_client.trades(symbol=symbols)
+        for symbol in symbols:
+            manager.request_resync(symbol)
+        await connection
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        log.error(traceback.format_exc())
+    finally:
+        feed.close()
+
+
+class IngestProcess:
+    def __init__(self, symbols, name=None, capacity=1024, api_url=None, stream_url=None,
+                 snapshot_limit=20):
+        """_summary_
+        Runs run_ingest() in a child process publishing into a SharedFeed owned
+        by this process. Strategy processes on the host read it with
+        SharedFeedReader(ingest.name) instead of opening their own websocket.
+
+        Args:
+            symbols (list): symbols to publish
+            name (str, optional): shared memory name, random when None
+            capacity (int): trades kept per symbol
+            api_url (str, optional): REST base url for snapshots
+            stream_url (str, optional): websocket url
+            snapshot_limit (int): levels per REST snapshot
+        Returns:
+            self.name (str): shared memory name for the readers
+        """
+        self.symbols = list(symbols)
+        self.feed = SharedFeed.create(self.symbols, capacity, name)
+        self.name = self.feed.name
+        self.api_url = api_url
+        self.stream_url = stream_url
+        self.snapshot_limit = snapshot_limit
+        self.process = None
+
+    def start(self):
+        if self.process is None:
+            self.process = multiprocessing.Process(
+                target=run_ingest,
+                args=(self.name, self.symbols, self.api_url, self.stream_url,
+                      self.snapshot_limit),
+                daemon=True)
+            self.process.start()
+
+    def stop(self, timeout=5):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(timeout)
+            self.process = None
+        self.feed.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,3 +1,4 @@
+from trade.context import TradeContext
 from trade.quantity import Quantity
 from trade.market_data import MarketData
 from trade.database import DataBase
@@ -7,7 +8,7 @@ class CollectInfo:
     def __init__(self, api_key=None, api_secret=None, db_url=None,
                  symbols=None, apply_filter=False,
                  amount_limit=None, symbol_limit=None, depth_limit=None,
-                 base_amount=None, share_percent=33):
+                 base_amount=None, share_percent=33, bulk=False):
 
         self.api_key = api_key
         self.api_secret = api_secret
@@ -20,8 +21,11 @@ class CollectInfo:
         self.apply_filter = apply_filter
         self.base_amount = base_amount
         self.share_percent = share_percent
+        self.bulk = bulk
 
-        self.market_data = MarketData(self.api_key, self.api_secret)
+        self.context = TradeContext(self.api_key, self.api_secret)
+        self.market_data = MarketData(
+            self.api_key, self.api_secret, context=self.context)
         self.db = DataBase(self.db_url)
         self.asset_list = {}
 
@@ -31,7 +35,8 @@ class CollectInfo:
     def collect_info(self):
         # get market data
         self.market_data.process_symbol(self.symbols, self.apply_filter,
-                                        self.amount_limit, self.symbol_limit, self.depth_limit)
+                                        self.amount_limit, self.symbol_limit, self.depth_limit,
+                                        bulk=self.bulk)
 
         self.asset_list = self.market_data.filtered_asset
 
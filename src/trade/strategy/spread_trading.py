@@ -1,42 +1,127 @@
-import threading
+import concurrent.futures
+import itertools
 import traceback
-from time import sleep
 
+from trade.context import TradeContext
 from trade.database import DataBase
+from trade.exception import MissingAttributeError
 from trade.market_data import MarketData
-from trade.order import Order
+from trade.order import FINAL_STATUSES, Order
+from trade.order_book import OrderBookManager
+from trade.order_store import OPEN, OrderStore
+from trade.order_tracker import OrderTracker
+from trade.symbol_scheduler import SymbolScheduler
 
 from trade.log import setup_logger
 
 
 class SpreadTrading:
-    def __init__(self, api_key=None, api_secret=None, db_url=None, Test=False):
+    def __init__(self, api_key=None, api_secret=None, db_url=None, Test=False, order_book=False,
+                 user_stream=False, context=None, asset_list=None, gateway=None,
+                 replace_orders=False, stream_url=None, server_clock=False):
         self.api_key = api_key
         self.api_secret = api_secret
         self.db_url = db_url
 
         self.test = Test
         self.order_id = 0
-
-        self.market_data = MarketData(self.api_key, self.api_secret)
-        self.order = Order(self.api_key, self.api_secret)
-        self.db = DataBase(self.db_url)
+        self._test_order_ids = itertools.count(1)
+
+        # server_clock stamps signed requests with the exchange time, unless a context is given
+        self.context = context or TradeContext(
+            self.api_key, self.api_secret, clock=True if server_clock else None)
+        self.market_data = MarketData(
+            self.api_key, self.api_secret, context=self.context)
+        self.order = Order(self.api_key, self.api_secret, context=self.context)
+        self.db = None
         self.asset_list = {}
-        self.trade_history = {}
-        self.lock = threading.Lock()
+        self.trade_history = OrderStore()
 
         self.log = setup_logger()
-        self.retrieve_assets()
+        if asset_list is not None:
+            # assets given directly (e.g. benchmarks, mock exchange runs) skip the database
+            self.asset_list = asset_list
+        else:
+            self.db = DataBase(self.db_url)
+            self.retrieve_assets()
+
+        self.order_books = None
+        if order_book:
+            self.order_books = OrderBookManager(
+                self.market_data, symbols=list(self.asset_list), stream_url=stream_url)
+            self.order_books.start()
+
+        self.order_tracker = None
+        if user_stream and not self.test:
+            self.order_tracker = OrderTracker(self.order, stream_url=stream_url)
+            self.order_tracker.start()
+
+        # OrderGateway submitting orders, cancels and queries concurrently
+        self.gateway = gateway
+        # re-price resting orders with Order.replace instead of query, cancel and a later new order
+        self.replace_orders = replace_orders
+        self.scheduler = None
+        # last top two bid and ask prices seen by the event-driven mode, per asset
+        self._quotes = {}
+
+    def submit_order(self, process_type, data):
+        """_summary_
+        Sends an order request through the gateway when one is set, else
+        synchronously through Order.process_order.
+
+        Args:
+            process_type (str): new_order, cancel_order or query_order
+            data (dict): arguments of Order.process_order
+
+        Returns:
+            concurrent.futures.Future: resolves to the (status code, body) response
+        """
+        if self.gateway is not None:
+            return self.gateway.submit(process_type, data)
+        future = concurrent.futures.Future()
+        future.set_result(self.order.process_order(
+            process_type=process_type, data=data))
+        return future
+
+    def replace_order(self, asset, type, order_id, new_price, quantity=None):
+        """_summary_
+        Re-prices a resting order with Order.replace, through the gateway when
+        one is set. The order's state comes from the order tracker when the user
+        stream is enabled, else from the trade history refreshed by check_status.
+
+        Args:
+            asset (str): symbol of the order
+            type (str): buy/sell side
+            order_id (int): order to re-price
+            new_price (str): price of the replacement
+            quantity (float, optional): re-sizes the order instead, the replacement then
+                waits for the cancel and is sized from what is left
+
+        Returns:
+            concurrent.futures.Future: resolves to the Order.replace report
+        """
+        state = None
+        if self.order_tracker is not None and quantity is None:
+            state = self.order_tracker.get(order_id)
+        if state is None:
+            # open as of check_status; the executed quantity is unknown
+            state = {"status": "wait"}
+        if quantity is None:
+            quantity = self.asset_list[asset]["quantity"]
+        args = (order_id, new_price, asset, type, quantity, "limit", state)
+        if self.gateway is not None:
+            return self.gateway.replace(*args)
+        future = concurrent.futures.Future()
+        future.set_result(self.order.replace(*args))
+        return future
 
     def retrieve_assets(self):
         """_summary_
-        Retrieves the asset list from the 'asset' table in the 'wazirx' database and
-        initializes the trade history for each asset.
+        Retrieves the asset list from the 'asset' table in the 'wazirx' database.
 
         The function retrieves the asset list from the 'asset' table in the 'wazirx'
         database using the 'query' method of the 'db' object. The retrieved data is
-        stored in the 'asset_list' attribute of the instance. The function also calls
-        the 'init_trade_history' method to initialize the trade history for each asset.
+        stored in the 'asset_list' attribute of the instance.
 
         Args: NONE
         Returns: NONE
@@ -47,27 +132,6 @@ class SpreadTrading:
         except Exception:
             self.log.critical(traceback.format_exc())
             exit()
-        # initiate trade history
-        self.init_trade_history()
-
-    def init_trade_history(self):
-        """_summary_
-        Initializes the trade history for each asset in the asset list.
-
-        For each asset in the asset list, if it does not already exist in the trade history,
-        a new entry is created with empty "buy" and "sell" dictionaries, as well as a "meta"
-        dictionary with "buy_count" and "sell_count" keys initialized to zero.
-
-        Args: NONE
-        Returns: NONE
-        """
-        for asset in self.asset_list:
-            if asset not in self.trade_history:
-                self.trade_history[asset] = {
-                    "buy": {},
-                    "sell": {},
-                    "meta": {"buy_count": 0, "sell_count": 0},
-                }
 
     def asset_price_calculator(self, asset_price):
         """_summary_
@@ -107,76 +171,164 @@ class SpreadTrading:
         """_summary_
         Trades each asset in the asset list by buying and selling it based on the current market depth.
 
-        The function loops through each asset in the asset list and retrieves the current market depth
-        using the 'get_symbol_depth' method of the 'market_data' object. If the market depth is retrieved
-        successfully, the function calls the 'buy_asset' and 'sell_asset' methods of the instance with
-        the corresponding bid and ask prices retrieved from the market depth.
-
-        If the market depth retrieval or any of the trading operations fail, the function logs the
-        exception message to the file and continues to the next asset.
+        The function loops through each asset in the asset list and calls 'trade_symbol'. If any of
+        the trading operations fail, the function logs the exception message to the file and
+        continues to the next asset.
 
         Args: NONE
         Returns: NONE
         """
         for asset in self.asset_list:
             try:
-                sleep(1)
-                depth = self.market_data.get_symbol_depth(
-                    symbol=asset, limit=5)
-
-                if depth[0] == 200:
-                    self.buy_asset(
-                        asset=asset,
-                        buy_price=depth[1]["bids"][0][0],
-                        rival_buy_price=depth[1]["bids"][1][0],
-                    )
-
-                    self.sell_asset(
-                        asset=asset,
-                        sell_price=depth[1]["asks"][0][0],
-                        rival_sell_price=depth[1]["asks"][1][0],
-                    )
+                self.trade_symbol(asset)
             except Exception:
                 self.log.error(traceback.format_exc())
 
-    def remove_completed_orders(self, asset, type=None):
+    def trade_symbol(self, asset):
         """_summary_
-        Removes completed orders of a specific type for a given asset from the trade history.
+        Trades one asset: retrieves its market depth using 'get_depth', which reads the local order
+        book when it is enabled, and calls 'buy_asset' and 'sell_asset' with the corresponding bid
+        and ask prices. Only the asset's own orders are read and updated, so different assets can
+        be traded concurrently.
 
-        The function first retrieves the order list of the specified type for the given asset from
-        the trade history. If the order list exists, the function creates a copy of it and iterates
-        over each order in the list. For each completed order, the function removes the order from the
-        copy of the order list.
+        Args:
+            asset (str): The symbol of the asset.
+        Returns: NONE
+        """
+        depth = self.get_depth(asset)
 
-        Once all completed orders are removed, the function updates the trade history with the modified
-        order list using a lock to ensure thread safety. The function returns both the original and the
-        modified order list.
+        if depth[0] == 200:
+            self.buy_asset(
+                asset=asset,
+                buy_price=depth[1]["bids"][0][0],
+                rival_buy_price=depth[1]["bids"][1][0],
+            )
 
-        If the specified type or asset does not exist in the trade history, the function returns empty
-        dictionaries.
+            self.sell_asset(
+                asset=asset,
+                sell_price=depth[1]["asks"][0][0],
+                rival_sell_price=depth[1]["asks"][1][0],
+            )
+
+    def run(self, interval=1.0, workers=None, events=False, debounce=0.05):
+        """_summary_
+        Trades every asset as an independent worker instead of the sequential trade_asset loop.
+        A SymbolScheduler runs trade_symbol for each asset every `interval` seconds on a thread
+        pool, and the rate limiter shares the REST budget between the assets, so a pass over
+        the asset list no longer grows with its length.
+
+        With events=True an asset is also traded as soon as its top two bid or ask prices change
+        in the local order book, or one of its orders is filled according to the user stream.
+        Events of an asset within `debounce` seconds, or during its run, lead to a single run.
 
         Args:
-            asset (str): The symbol of the asset to remove completed orders for.
-            type (str, optional): The type of orders to remove (buy or sell).
+            interval (float, optional): seconds between two passes over an asset, None to trade
+                only on events
+            workers (int, optional): worker threads, defaults to one per asset up to 32
+            events (bool): react to book and fill events, requires order_book=True and
+                user_stream=True
+            debounce (float): seconds between an event and the run it triggers
+        Returns:
+            SymbolScheduler: the running scheduler, see its stats()
+        """
+        if events and (self.order_books is None or self.order_tracker is None):
+            raise MissingAttributeError("order_book=True and user_stream=True required for events")
+        if not events and interval is None:
+            raise MissingAttributeError("interval required without events")
+        if self.scheduler is None:
+            self.scheduler = SymbolScheduler(
+                self.trade_symbol, list(self.asset_list), interval, workers, debounce)
+            if events:
+                self.order_books.add_listener(self.handle_book)
+                self.order_tracker.add_listener(self.handle_order)
+            self.scheduler.start()
+        return self.scheduler
+
+    def stop(self):
+        """_summary_
+        Stops the workers started by run() and its book and fill listeners.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self.order_books is not None:
+            self.order_books.remove_listener(self.handle_book)
+        if self.order_tracker is not None:
+            self.order_tracker.remove_listener(self.handle_order)
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        self._quotes.clear()
+
+    def handle_book(self, book):
+        """_summary_
+        OrderBookManager listener: triggers a run of the book's asset when the prices its quotes
+        are computed from (top two bids and asks) change. Runs on the stream thread.
+
+        Args:
+            book (OrderBook): the updated book
+        Returns: NONE
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
+            return
+        levels = book.levels(2)
+        quotes = (tuple(level[0] for level in levels["bids"]),
+                  tuple(level[0] for level in levels["asks"]))
+        if self._quotes.get(book.symbol) != quotes:
+            self._quotes[book.symbol] = quotes
+            scheduler.trigger(book.symbol)
+
+    def handle_order(self, order_id, state):
+        """_summary_
+        OrderTracker listener: triggers a run of an asset when one of its orders is filled, so
+        the filled side is re-quoted at once. Runs on the stream thread.
+
+        Args:
+            order_id (int): unique order id
+            state (dict): order state
+        Returns: NONE
+        """
+        scheduler = self.scheduler
+        if scheduler is not None and state.get("status") == "done" and order_id in self.trade_history:
+            scheduler.trigger(state["symbol"])
+
+    def get_depth(self, asset, limit=5):
+        """_summary_
+        Returns the top levels of an asset's book, read from the local order book
+        when it is enabled and requested over REST otherwise.
+
+        Args:
+            asset (str): The symbol of the asset.
+            limit (int): number of levels per side.
 
         Returns:
-            tuple: A tuple containing two dictionaries. The first dictionary contains the original
-                order list, and the second dictionary contains the modified order list with completed
-                orders removed.
+            tuple: (status code, {"bids": [...], "asks": [...]}), status 503 while the local book is resyncing.
         """
-        order_list = self.trade_history[asset].get(type)
-        if order_list is not None:
-            order_list_copy = order_list.copy()
+        if self.order_books is None:
+            return self.market_data.get_symbol_depth(symbol=asset, limit=limit)
 
-            for order in order_list:
-                if order_list[order]["status"] is True:
-                    del order_list_copy[order]
+        levels = self.order_books.levels(asset, limit)
+        if levels is None or len(levels["bids"]) < 2 or len(levels["asks"]) < 2:
+            return 503, {}
+        return 200, levels
 
-            with self.lock:
-                self.trade_history[asset][type] = order_list_copy
+    def remove_completed_orders(self, asset, type=None):
+        """_summary_
+        Removes the filled orders of a specific type for a given asset from the trade history.
 
-            return order_list, order_list_copy
-        return {}, {}
+        Args:
+            asset (str): The symbol of the asset to remove completed orders for.
+            type (str, optional): The type of orders to remove (buy or sell).
+
+        Returns:
+            list: The removed OrderRecords.
+        """
+        removed = self.trade_history.remove_filled(asset, type)
+        if self.order_tracker is not None:
+            for record in removed:
+                self.order_tracker.forget(record.order_id)
+        return removed
 
     def check_rival_orders(
             self,
@@ -188,7 +340,9 @@ class SpreadTrading:
             completed_orders=None):
         """_summary_
         Compares the current market price of an asset against a rival price and the price of open orders
-        associated with the asset, and cancels any orders that should be cancelled.
+        associated with the asset, and cancels any orders that should be cancelled. With the user stream
+        the cancel is decided from the order tracker's state, otherwise from a query_order. With
+        replace_orders they are re-priced with Order.replace instead, without a query_order beforehand.
 
         Args:
             asset (str): The name of the asset to trade.
@@ -206,67 +360,137 @@ class SpreadTrading:
 
         order_remove_count = 0
         order_price = current_price
-
-        order_list = self.trade_history[asset].get(type)
-        if order_list is not None:
-            for order_id in order_list.copy():
-                order_cancel = False
-
-                rival_bid = self.asset_price_calculator(rival_price)
-                order_status = self.trade_history[asset][type][order_id]["status"]
-
-                # below prices are in float
-                order_price = self.trade_history[asset][type][order_id]["price"]
-
-                if float(current_price) == order_price:
-                    order_price = current_price
-
-                elif (float(current_price) > order_price) and (order_status is False):
-                    order_cancel = True
-                    order_price = current_price
-
-                elif (
-                    (order_price > rival_bid)
-                    and (order_status is False)
-                    and (buy is True)
+        queries = []
+        cancels = []
+        replaces = []
+
+        rival_bid = self.asset_price_calculator(rival_price)
+        for record in self.trade_history.orders_for(asset, type):
+            order_cancel = False
+            order_id = record.order_id
+            order_open = record.status == OPEN
+
+            # below prices are in float
+            order_price = record.price
+
+            if float(current_price) == order_price:
+                order_price = current_price
+
+            elif (float(current_price) > order_price) and order_open:
+                order_cancel = True
+                order_price = current_price
+
+            elif (
+                (order_price > rival_bid)
+                and order_open
+                and (buy is True)
+            ):
+                order_cancel = True
+                order_price = rival_price
+
+            if order_cancel is True:
+                if self.test:
+                    order_remove_count += 1
+                    self.trade_history.remove(order_id)
+
+                    if completed_orders:
+                        completed_orders[order_id] = {
+                            'status': True, 'price': order_price}
+                elif self.replace_orders:
+                    replaces.append((order_id, order_price, self.replace_order(
+                        asset, type, order_id, order_price)))
+                else:
+                    state = None
+                    if self.order_tracker is not None:
+                        state = self.order_tracker.get(order_id)
+                    if state is None:
+                        queries.append((order_id, order_price, self.submit_order(
+                            "query_order", {"order_id": order_id})))
+                    elif (
+                        state["status"] not in FINAL_STATUSES
+                        and max(state["executedQty"], state["tradedQty"]) == 0
+                    ):
+                        cancels.append((order_id, order_price, self.submit_order(
+                            "cancel_order", {"symbol": asset, "order_id": order_id})))
+
+        # every query is in flight before the first answer is awaited, and
+        # every cancel before the first acknowledgement
+        for order_id, cancel_price, query in queries:
+            order_info = query.result()
+            if order_info[0] == 200:
+                if (
+                    order_info[1]["status"] != "done"
+                    and float(order_info[1]["executedQty"]) == 0
                 ):
-                    order_cancel = True
-                    order_price = rival_price
-
-                if order_cancel is True:
-                    if self.test:
-                        order_remove_count += 1
-                        with self.lock:
-                            del self.trade_history[asset][type][order_id]
-
-                        if completed_orders:
-                            completed_orders[order_id] = {
-                                'status': True, 'price': order_price}
-                    else:
-                        order_info = self.order.process_order(
-                            process_type="query_order", data={"order_id": order_id}
-                        )
-                        if order_info[0] == 200:
-                            if (
-                                order_info[1]["status"] != "done"
-                                and float(order_info[1]["executedQty"]) == 0
-                            ):
-                                response = self.order.process_order(
-                                    process_type="cancel_order",
-                                    data={"symbol": asset,
-                                          "order_id": order_id},
-                                )
-
-                                if response[0] == 200:
-                                    order_remove_count += 1
-
-                                    with self.lock:
-                                        del self.trade_history[asset][type][order_id]
-                                    if completed_orders:
-                                        completed_orders[order_id] = {
-                                            "status": True,
-                                            "price": order_price,
-                                        }
+                    cancels.append((order_id, cancel_price, self.submit_order(
+                        "cancel_order", {"symbol": asset, "order_id": order_id})))
+
+        for order_id, cancel_price, cancel in cancels:
+            response = cancel.result()
+            if response[0] == 200:
+                order_remove_count += 1
+
+                self.trade_history.remove(order_id)
+                if self.order_tracker is not None:
+                    self.order_tracker.forget(order_id)
+                if completed_orders:
+                    completed_orders[order_id] = {
+                        "status": True,
+                        "price": cancel_price,
+                    }
+
+        resizes = []
+        for order_id, new_price, replace in replaces:
+            report = replace.result()
+            cancel, new = report["cancel"], report["new"]
+            replaced = new is not None and new[0] in (200, 201)
+            self.log.debug(
+                f"replace {order_id} at {new_price}: cancel {cancel[0]}, "
+                f"new {new[0] if new else None}, excess {report['excess']}, "
+                f"{report['latency']:.3f}s")
+            if cancel[0] == 200:
+                self.trade_history.remove(order_id)
+                if self.order_tracker is not None:
+                    self.order_tracker.forget(order_id)
+                if not replaced:
+                    order_remove_count += 1
+                    if completed_orders:
+                        completed_orders[order_id] = {
+                            "status": True,
+                            "price": new_price,
+                        }
+            if replaced:
+                self.trade_history.add(
+                    new[1]["id"], asset, type, float(new[1]["price"]),
+                    self.asset_list[asset]["quantity"])
+                if self.order_tracker is not None:
+                    self.order_tracker.track(
+                        new[1]["id"], asset, type, float(new[1]["price"]),
+                        self.asset_list[asset]["quantity"])
+                if report["excess"] > 0:
+                    # the old order filled, partly or completely, before its cancel
+                    # landed: shrink the replacement to what is left, cancelling it
+                    # when nothing is
+                    remaining = max(self.asset_list[asset]["quantity"] - report["excess"], 0)
+                    resizes.append((new[1]["id"], new[1]["price"], self.replace_order(
+                        asset, type, new[1]["id"], new[1]["price"], quantity=remaining)))
+
+        for order_id, new_price, resize in resizes:
+            report = resize.result()
+            cancel, new = report["cancel"], report["new"]
+            if cancel[0] != 200:
+                # the replacement filled meanwhile; check_status picks it up
+                continue
+            self.trade_history.remove(order_id)
+            if self.order_tracker is not None:
+                self.order_tracker.forget(order_id)
+            if new is not None and new[0] in (200, 201):
+                quantity = float(new[1]["origQty"])
+                self.trade_history.add(
+                    new[1]["id"], asset, type, float(new[1]["price"]), quantity)
+                if self.order_tracker is not None:
+                    self.order_tracker.track(
+                        new[1]["id"], asset, type, float(new[1]["price"]), quantity)
 
         if completed_orders is None:
             return order_remove_count, str(order_price)
@@ -283,35 +507,20 @@ class SpreadTrading:
 
         Returns: None
         """
-        self.check_status(type="sell")
-        previous_state, current_state = self.remove_completed_orders(
-            asset=asset, type="sell"
-        )
-
-        completed_sell_count = len(previous_state) - len(current_state)
-
-        if self.trade_history[asset]["meta"]["sell_count"] != 0:
-            self.trade_history[asset]["meta"]["sell_count"] -= completed_sell_count
+        self.check_status(type="sell", symbol=asset)
+        self.remove_completed_orders(asset=asset, type="sell")
 
-        (
-            remove_count,
-            order_price,
-        ) = self.check_rival_orders(
+        _, order_price = self.check_rival_orders(
             asset=asset,
             type="buy",
             current_price=buy_price,
             rival_price=rival_buy_price,
         )
 
-        self.trade_history[asset]["meta"]["buy_count"] -= remove_count
-
         trade_limit = self.asset_list[asset]["trade_limit"]
         trade_quantity = self.asset_list[asset]["quantity"]
 
-        if (
-            self.trade_history[asset]["meta"]["buy_count"]
-            + self.trade_history[asset]["meta"]["sell_count"]
-        ) < trade_limit:
+        if self.trade_history.count(asset) < trade_limit:
             data = {
                 "symbol": asset,
                 "side": "buy",
@@ -322,21 +531,20 @@ class SpreadTrading:
             }
 
             if self.test:
-                self.trade_history[asset]["meta"]["buy_count"] += 1
-                self.order_id += 1
-                self.trade_history[asset]["buy"][self.order_id] = {"status": False,
-                                                                   "price": float(order_price)}
+                self.order_id = next(self._test_order_ids)
+                self.trade_history.add(
+                    self.order_id, asset, "buy", float(order_price), trade_quantity)
             else:
-                response = self.order.process_order(
-                    process_type="new_order", data=data)
+                response = self.submit_order("new_order", data).result()
 
                 if response[0] == 201 or response[0] == 200:
-                    self.trade_history[asset]["meta"]["buy_count"] += 1
-
-                    self.trade_history[asset]["buy"][response[1]["id"]] = {
-                        "status": False,
-                        "price": float(response[1]["price"]),
-                    }
+                    self.trade_history.add(
+                        response[1]["id"], asset, "buy",
+                        float(response[1]["price"]), trade_quantity)
+                    if self.order_tracker is not None:
+                        self.order_tracker.track(
+                            response[1]["id"], asset, "buy",
+                            float(response[1]["price"]), trade_quantity)
 
     def sell_asset(self, asset, sell_price, rival_sell_price):
         """_summary_
@@ -370,49 +578,23 @@ class SpreadTrading:
 
             return completed_orders
 
-        def _filter_completed_orders(previous_state, current_state):
-            """_summary_
-            Filters the completed orders from the previous and current state of orders.
-
-            Args:
-                previous_state (dict): A dictionary representing the previous state of orders.
-                current_state (dict): A dictionary representing the current state of orders.
-
-            Returns:
-                dict: The completed orders from the previous and current state.
-            """
-            completed_orders = {}
-            difference = set(previous_state.keys()).symmetric_difference(
-                set(current_state.keys())
-            )
-            for id in difference:
-                completed_orders[id] = previous_state.get(id)
-            return completed_orders
-
-        self.check_status(type="buy")
-        previous_state, current_state = self.remove_completed_orders(
-            asset=asset, type="buy"
-        )
+        self.check_status(type="buy", symbol=asset)
+        filled_buys = self.remove_completed_orders(asset=asset, type="buy")
 
-        completed_buy_count = len(previous_state) - len(current_state)
-        if self.trade_history[asset]["meta"]["buy_count"] != 0:
-            self.trade_history[asset]["meta"]["buy_count"] -= completed_buy_count
-
-        remove_count, order_price, completed_orders = self.check_rival_orders(
+        _, order_price, completed_orders = self.check_rival_orders(
             asset=asset,
             type="sell",
             current_price=sell_price,
             rival_price=rival_sell_price,
             buy=False,
-            completed_orders=_filter_completed_orders(
-                previous_state, current_state),
+            completed_orders={record.order_id: {"status": True, "price": record.price}
+                              for record in filled_buys},
         )
 
-        completed_buy_count += remove_count
-
         trade_quantity = self.asset_list[asset]["quantity"]
         completed_orders = _price_computation(
             float(order_price), completed_orders)
+        new_orders = []
         for order_id in completed_orders:
             data = {
                 "symbol": asset,
@@ -424,44 +606,56 @@ class SpreadTrading:
             }
 
             if self.test:
-                self.trade_history[asset]["meta"]["sell_count"] += 1
-                self.order_id += 1
-                self.trade_history[asset]["sell"][self.order_id] = {"status": False,
-                                                                    "price": float(order_price)}
+                self.order_id = next(self._test_order_ids)
+                self.trade_history.add(
+                    self.order_id, asset, "sell", float(order_price), trade_quantity)
             else:
-                response = self.order.process_order(
-                    process_type="new_order", data=data)
-
-                if response[0] == 201 or response[0] == 200:
-                    self.trade_history[asset]["meta"]["sell_count"] += 1
-                    self.trade_history[asset]["sell"][response[1]["id"]] = {
-                        "status": False,
-                        "price": float(response[1]["price"]),
-                    }
-
-    def check_status(self, type):
+                new_orders.append(self.submit_order("new_order", data))
+
+        for new_order in new_orders:
+            response = new_order.result()
+            if response[0] == 201 or response[0] == 200:
+                self.trade_history.add(
+                    response[1]["id"], asset, "sell",
+                    float(response[1]["price"]), trade_quantity)
+                if self.order_tracker is not None:
+                    self.order_tracker.track(
+                        response[1]["id"], asset, "sell",
+                        float(response[1]["price"]), trade_quantity)
+
+    def check_status(self, type, symbol=None):
         """_summary_
-        Checks the status of open orders of a given type (buy or sell) for all assets in the asset list.
-        Updates the status of the orders that have been filled in the trade history.
+        Checks the status of open orders of a given type (buy or sell) for one asset, or for all
+        assets in the asset list. Updates the status of the orders that have been filled in the
+        trade history.
+
+        With the user stream enabled, fills are read from the order tracker's cache and REST
+        query_order is only used by its periodic reconciliation of orders the stream is silent about.
 
         Args:
             type (str): Type of order to check status for (either "buy" or "sell").
+            symbol (str, optional): Asset to check, all assets if None.
 
         Returns:
             None
         """
-        for symbol in self.trade_history:
-            order_list = self.trade_history[symbol][type]
+        queries = []
+        for record in self.trade_history.orders_for(symbol, side=type, status=OPEN):
+            order_id = record.order_id
+            if self.test:
+                self.trade_history.mark_filled(order_id)
+            elif self.order_tracker is not None:
+                if self.order_tracker.is_filled(order_id):
+                    self.trade_history.mark_filled(order_id)
+            else:
+                queries.append((order_id, self.submit_order(
+                    "query_order", {"order_id": order_id})))
 
-            for order_id in order_list:
-                if self.test:
-                    self.trade_history[symbol][type][order_id]["status"] = True
-                else:
-                    order_info = self.order.process_order(
-                        process_type="query_order", data={"order_id": order_id}
-                    )
-
-                    if order_info[0] == 200:
-                        if order_info[1]["status"] == "done":
-                            with self.lock:
-                                self.trade_history[symbol][type][order_id]["status"] = True
+        for order_id, query in queries:
+            order_info = query.result()
+            if order_info[0] == 200:
+                if order_info[1]["status"] == "done":
+                    self.trade_history.mark_filled(order_id)
+
+        if self.order_tracker is not None:
+            self.order_tracker.reconcile()
@@ -2,13 +2,15 @@ from .base import Base
 
 
 class Symbol:
-    def __init__(self):
+    def __init__(self, context=None):
         """_summary_
 
-        Args: NONE
+        Args:
+            context (TradeContext, optional): shared connection context
         Returns:
             symbol_list:  A list of symbols with INR as the quote asset.
         """
+        self.context = context
         self.symbol_list = self.get_updated_symbol_list()
 
     def get_updated_symbol_list(self):
@@ -19,7 +21,7 @@ class Symbol:
         Returns:
             symbol_list:  A list of symbols with INR as the quote asset.
         """
-        data = Base().exchange_info()
+        data = Base(context=self.context).exchange_info()
         symbol_list = [x['symbol']
                        for x in data[1]['symbols'] if x.get('quoteAsset') == 'inr']
         return symbol_list
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+from wazirx.rest.metrics import Histogram
+from wazirx.rest.rate_limit import flow
+
+from .log import setup_logger
+
+# Upper bounds, in seconds, of the run duration and lateness buckets.
+SCHEDULER_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# Upper bounds, in seconds, of the event to run start buckets.
+REACTION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class SymbolStats:
+    __slots__ = ("runs", "errors", "events", "duration", "lateness", "reaction")
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.events = 0
+        self.duration = Histogram(SCHEDULER_BUCKETS)
+        self.lateness = Histogram(SCHEDULER_BUCKETS)
+        self.reaction = Histogram(REACTION_BUCKETS)
+
+
+class SymbolScheduler:
+    def __init__(self, task, symbols=None, interval=1.0, workers=None, debounce=0):
+        """_summary_
+        Runs task(symbol) for every symbol once per `interval` seconds on a pool
+        of worker threads. A symbol is run by one worker at a time, so its state
+        needs no lock shared with the other symbols, and a slow symbol only
+        delays itself. Every run happens inside rate_limit.flow(symbol): queued
+        REST requests of different symbols take turns in the rate limiter, so
+        the order and query budgets are shared fairly between workers.
+
+        trigger(symbol) requests a run `debounce` seconds after an event. Events
+        arriving before that run starts are conflated into it, and events during
+        a run into a single next run, so a burst costs one run per symbol.
+
+        Args:
+            task (callable): task(symbol), one pass over a symbol
+            symbols (list, optional): symbols to schedule
+            interval (float, optional): seconds between the starts of two runs of a symbol,
+                None to run only on trigger() after the first run
+            workers (int, optional): worker threads, defaults to one per symbol up to 32
+            debounce (float): seconds between an event and the run it triggers
+        Returns: NONE
+        """
+        self.task = task
+        self.interval = interval
+        self.workers = workers
+        self.debounce = debounce
+        self.symbols = set()
+        self.stats_by_symbol = {}
+        self.log = setup_logger()
+        # (due, seq, symbol) entries; an entry is stale unless due is _due[symbol]
+        self._queue = []
+        self._due = {}
+        self._running = set()
+        self._triggered = set()
+        # monotonic time of the first event not yet served, per symbol
+        self._events = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopped = False
+        for symbol in symbols or []:
+            self.add(symbol)
+
+    def add(self, symbol):
+        """_summary_
+        Schedules a symbol, first run as soon as a worker is free.
+
+        Args:
+            symbol (str): crypto name
+        Returns: NONE
+        """
+        with self._cond:
+            if symbol in self.symbols:
+                return
+            self.symbols.add(symbol)
+            self.stats_by_symbol.setdefault(symbol, SymbolStats())
+            if symbol not in self._running:
+                self._push(symbol, time.monotonic())
+
+    def _push(self, symbol, due):
+        if symbol in self._due and self._due[symbol] <= due:
+            return
+        self._due[symbol] = due
+        heapq.heappush(self._queue, (due, next(self._seq), symbol))
+        self._cond.notify()
+
+    def trigger(self, symbol):
+        """_summary_
+        Requests a run of a symbol after an event; cheap enough for stream threads.
+
+        Args:
+            symbol (str): crypto name
+        Returns: NONE
+        """
+        now = time.monotonic()
+        with self._cond:
+            if symbol not in self.symbols or self._stopped:
+                return
+            self.stats_by_symbol[symbol].events += 1
+            self._events.setdefault(symbol, now)
+            if symbol in self._running:
+                self._triggered.add(symbol)
+            else:
+                self._push(symbol, now + self.debounce)
+
+    def remove(self, symbol):
+        """_summary_
+        Stops scheduling a symbol; a run in progress completes.
+
+        Args:
+            symbol (str): crypto name
+        Returns: NONE
+        """
+        with self._cond:
+            self.symbols.discard(symbol)
+
+    def _next(self):
+        with self._cond:
+            while not self._stopped:
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                due, _, symbol = self._queue[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+                if self._due.get(symbol) != due:
+                    continue
+                del self._due[symbol]
+                if symbol in self.symbols:
+                    self._running.add(symbol)
+                    return due, symbol, self._events.pop(symbol, None)
+            return None
+
+    def _reschedule(self, due, symbol):
+        with self._cond:
+            self._running.discard(symbol)
+            if symbol not in self.symbols or self._stopped:
+                return
+            now = time.monotonic()
+            if self.interval is not None:
+                self._push(symbol, max(due + self.interval, now))
+            if symbol in self._triggered:
+                self._triggered.discard(symbol)
+                self._push(symbol, now + self.debounce)
+
+    def _worker(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            due, symbol, event = item
+            stats = self.stats_by_symbol[symbol]
+            started = time.monotonic()
+            stats.lateness.observe(started - due)
+            if event is not None:
+                stats.reaction.observe(started - event)
+            try:
+                with flow(symbol):
+                    self.task(symbol)
+            except Exception:
+                stats.errors += 1
+                self.log.error(traceback.format_exc())
+            finally:
+                stats.runs += 1
+                stats.duration.observe(time.monotonic() - started)
+                self._reschedule(due, symbol)
+
+    def start(self):
+        """_summary_
+        Starts the worker threads.
+
+        Args: NONE
+        Returns: NONE
+        """
+        if self._threads:
+            return
+        with self._cond:
+            self._stopped = False
+            now = time.monotonic()
+            self._queue = [(now, next(self._seq), symbol) for symbol in self.symbols]
+            heapq.heapify(self._queue)
+            self._due = dict.fromkeys(self.symbols, now)
+            self._running.clear()
+            self._triggered.clear()
+            self._events.clear()
+        workers = self.workers or min(max(len(self.symbols), 1), 32)
+        for index in range(workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"symbol-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        """_summary_
+        Stops the workers after their current runs.
+
+        Args:
+            timeout (int): seconds to wait for each worker thread
+        Returns: NONE
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """_summary_
+
+        Args: NONE
+        Returns:
+            dict: per symbol run, error and event counts, and run duration, lateness and
+                reaction (first event to run start) histograms in seconds
+        """
+        return {
+            symbol: {
+                "runs": stats.runs,
+                "errors": stats.errors,
+                "events": stats.events,
+                "duration": stats.duration.snapshot(),
+                "lateness": stats.lateness.snapshot(),
+                "reaction": stats.reaction.snapshot(),
+            }
+            for symbol, stats in self.stats_by_symbol.items()
+        }
@@ -1,26 +1,38 @@
-from datetime import datetime
-
-from wazirx.rest.client import Client
-
+from .context import TradeContext
 from .exception import MissingAttributeError
 
 
 class User:
-    def __init__(self, api_key=None, api_secret=None):
+    def __init__(self, api_key=None, api_secret=None, context=None):
         """_summary_
 
         Args:
             api_key (str): wazirx api key
             api_secret (str): wazirx secret key
+            context (TradeContext, optional): shared connection context, used instead of the keys when given
         Returns:
             self.client: obj instance
         """
-        if not api_key:
-            raise MissingAttributeError("api_key required")
-        if not api_secret:
-            raise MissingAttributeError("api_secret required")
+        if context is None:
+            if not api_key:
+                raise MissingAttributeError("api_key required")
+            if not api_secret:
+                raise MissingAttributeError("api_secret required")
+            context = TradeContext(api_key, api_secret)
+
+        self.context = context
+        self.client = context.client
+
+    def account_params(self):
+        """_summary_
+
+        Builds the signed request parameters of the account endpoints.
 
-        self.client = Client(api_key=api_key, secret_key=api_secret)
+        Args: NONE
+        Returns:
+            dict: {"timestamp", "recvWindow"}
+        """
+        return {"timestamp": self.client.timestamp(), "recvWindow": 5000}
 
     def user_info(self):
         """_summary_
@@ -32,11 +44,7 @@ class User:
         Returns:
             dict: {}
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
-        return self.client.send("account_info",
-                                {"timestamp": ts,
-                                 "recvWindow": 5000})
+        return self.client.send("account_info", self.account_params())
 
     def user_funds(self):
         """_summary_
@@ -48,8 +56,4 @@ class User:
         Returns:
             list: [{}, {}]
         """
-        ct = datetime.now().timestamp()
-        ts = int(ct * 1000)
-        return self.client.send("funds_info",
-                                {"timestamp": ts,
-                                 "recvWindow": 5000})
+        return self.client.send("funds_info", self.account_params())
@@ -0,0 +1,4 @@
+from .engine import MatchingEngine
+from .flow import OrderFlow
+from .server import MockExchange
+from .transport import MockAdapter, MockSessionPool
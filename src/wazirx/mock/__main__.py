@@ -0,0 +1,34 @@
+"""Run the mock exchange: python -m wazirx.mock --port 8080 --latency 0.05"""
+import argparse
+import asyncio
+
+from .flow import OrderFlow
+from .server import MockExchange
+
+
+async def main(args):
+    exchange = MockExchange(
+        latency=args.latency, jitter=args.jitter,
+        rate_limits=not args.no_rate_limits, host=args.host, port=args.port)
+    await exchange.start()
+    for symbol in exchange.symbols:
+        exchange.add_task(OrderFlow(exchange.engine, symbol, rate=args.flow_rate).run())
+    print(f"Mock exchange on {exchange.api_url} and {exchange.stream_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await exchange.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local WazirX stand-in exchange")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--flow-rate", type=float, default=10.0)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
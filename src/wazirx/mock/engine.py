@@ -0,0 +1,243 @@
+"""Price-time priority matching engine of the mock exchange"""
+import collections
+import itertools
+import time
+from operator import neg
+
+from sortedcontainers import SortedDict
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def format_number(value):
+    return ("%.8f" % value).rstrip("0").rstrip(".") or "0"
+
+
+class MockOrder(object):
+    __slots__ = ("id", "account", "symbol", "side", "type", "price",
+                 "quantity", "executed", "status", "created", "updated")
+
+    def __init__(self, order_id, account, symbol, side, order_type, price, quantity):
+        self.id = order_id
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.executed = 0.0
+        self.status = "wait"
+        self.created = self.updated = now_ms()
+
+    @property
+    def remaining(self):
+        return self.quantity - self.executed
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "price": format_number(self.price),
+            "stopPrice": "0.0",
+            "origQty": format_number(self.quantity),
+            "executedQty": format_number(self.executed),
+            "status": self.status,
+            "type": self.type,
+            "side": self.side,
+            "createdTime": self.created,
+            "updatedTime": self.updated,
+        }
+
+
+class MockTrade(object):
+    __slots__ = ("id", "symbol", "price", "quantity", "time", "buy_order",
+                 "sell_order", "taker_side")
+
+    def __init__(self, trade_id, symbol, price, quantity, buy_order, sell_order, taker_side):
+        self.id = trade_id
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.time = now_ms()
+        self.buy_order = buy_order
+        self.sell_order = sell_order
+        self.taker_side = taker_side
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "price": format_number(self.price),
+            "qty": format_number(self.quantity),
+            "quoteQty": format_number(self.price * self.quantity),
+            "time": self.time,
+            "isBuyerMaker": self.taker_side == "sell",
+        }
+
+
+class MatchingEngine(object):
+    """Limit order books with price-time priority.
+
+    Listeners are called as listener(event, payload) with the events
+    "depth" (symbol, {"b": [...], "a": [...]} changed levels), "trade"
+    (MockTrade) and "order" (MockOrder, on every status/fill change).
+    """
+
+    def __init__(self, symbols):
+        """
+        Arguments:
+            symbols: {symbol: {"baseAsset": str, "quoteAsset": str}}
+        """
+        self.symbols = symbols
+        self.books = {
+            symbol: {"buy": SortedDict(neg), "sell": SortedDict()}
+            for symbol in symbols}
+        self.orders = {}
+        self.trades = collections.defaultdict(
+            lambda: collections.deque(maxlen=1000))
+        self.stats = {symbol: {"open": None, "high": None, "low": None,
+                               "last": None, "volume": 0.0}
+                      for symbol in symbols}
+        self.listeners = []
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+
+    def _notify(self, event, payload):
+        for listener in self.listeners:
+            listener(event, payload)
+
+    def _level_quantity(self, book, price):
+        return sum(order.remaining for order in book.get(price, ()))
+
+    def _add(self, order):
+        book = self.books[order.symbol][order.side]
+        book.setdefault(order.price, collections.deque()).append(order)
+
+    def _remove(self, order):
+        book = self.books[order.symbol][order.side]
+        level = book.get(order.price)
+        if level is not None:
+            level.remove(order)
+            if not level:
+                del book[order.price]
+
+    def place(self, account, symbol, side, price, quantity, order_type="limit"):
+        """Match a limit order and rest the remainder; returns the order."""
+        if symbol not in self.books:
+            raise ValueError("Invalid symbol")
+        if side not in ("buy", "sell"):
+            raise ValueError("Invalid side")
+        if price <= 0 or quantity <= 0:
+            raise ValueError("Invalid price or quantity")
+
+        order = MockOrder(next(self._order_ids), account, symbol, side,
+                          order_type, price, quantity)
+        self.orders[order.id] = order
+        opposite = self.books[symbol]["sell" if side == "buy" else "buy"]
+        changes = {"b": {}, "a": {}}
+        changed_orders = [order]
+
+        while order.remaining > 1e-12 and opposite:
+            best_price, level = opposite.peekitem(0)
+            if (side == "buy" and best_price > price) or (side == "sell" and best_price < price):
+                break
+            maker = level[0]
+            quantity_filled = min(order.remaining, maker.remaining)
+            maker.executed += quantity_filled
+            order.executed += quantity_filled
+            maker.updated = order.updated = now_ms()
+            trade = MockTrade(
+                next(self._trade_ids), symbol, best_price, quantity_filled,
+                order if side == "buy" else maker,
+                maker if side == "buy" else order, side)
+            self.trades[symbol].append(trade)
+            self._record_trade(symbol, best_price, quantity_filled)
+            if maker.remaining <= 1e-12:
+                maker.status = "done"
+                level.popleft()
+                if not level:
+                    del opposite[best_price]
+            changed_orders.append(maker)
+            changes["a" if side == "buy" else "b"][best_price] = self._level_quantity(
+                opposite, best_price)
+            self._notify("trade", trade)
+
+        if order.remaining <= 1e-12:
+            order.status = "done"
+        else:
+            self._add(order)
+            own = self.books[symbol][side]
+            changes["b" if side == "buy" else "a"][price] = self._level_quantity(
+                own, price)
+
+        for changed in changed_orders:
+            self._notify("order", changed)
+        self._notify_depth(symbol, changes)
+        return order
+
+    def cancel(self, order_id, account=None):
+        """Cancel a resting order; returns it, or None if it is unknown."""
+        order = self.orders.get(order_id)
+        if order is None or (account is not None and order.account != account):
+            return None
+        if order.status in ("wait", "idle"):
+            self._remove(order)
+            order.status = "cancel"
+            order.updated = now_ms()
+            book = self.books[order.symbol][order.side]
+            key = "b" if order.side == "buy" else "a"
+            self._notify("order", order)
+            self._notify_depth(order.symbol, {
+                key: {order.price: self._level_quantity(book, order.price)}})
+        return order
+
+    def open_orders(self, account, symbol=None):
+        return [order for order in self.orders.values()
+                if order.account == account and order.status in ("wait", "idle")
+                and (symbol is None or order.symbol == symbol)]
+
+    def _notify_depth(self, symbol, changes):
+        if changes.get("b") or changes.get("a"):
+            self._notify("depth", (symbol, {
+                side: [[format_number(price), format_number(quantity)]
+                       for price, quantity in levels.items()]
+                for side, levels in changes.items()}))
+
+    def _record_trade(self, symbol, price, quantity):
+        stats = self.stats[symbol]
+        if stats["open"] is None:
+            stats["open"] = stats["high"] = stats["low"] = price
+        stats["high"] = max(stats["high"], price)
+        stats["low"] = min(stats["low"], price)
+        stats["last"] = price
+        stats["volume"] += quantity
+
+    def depth(self, symbol, limit=20):
+        books = self.books[symbol]
+
+        def _levels(book):
+            return [[format_number(price), format_number(sum(o.remaining for o in level))]
+                    for price, level in book.items()[:limit]]
+
+        return {"timestamp": now_ms(), "asks": _levels(books["sell"]),
+                "bids": _levels(books["buy"])}
+
+    def ticker(self, symbol):
+        books = self.books[symbol]
+        stats = self.stats[symbol]
+        bid = books["buy"].peekitem(0)[0] if books["buy"] else 0
+        ask = books["sell"].peekitem(0)[0] if books["sell"] else 0
+        return {
+            "symbol": symbol,
+            "baseAsset": self.symbols[symbol]["baseAsset"],
+            "quoteAsset": self.symbols[symbol]["quoteAsset"],
+            "openPrice": format_number(stats["open"] or 0),
+            "lowPrice": format_number(stats["low"] or 0),
+            "highPrice": format_number(stats["high"] or 0),
+            "lastPrice": format_number(stats["last"] or 0),
+            "volume": format_number(stats["volume"]),
+            "bidPrice": format_number(bid),
+            "askPrice": format_number(ask),
+            "at": now_ms(),
+        }
@@ -0,0 +1,86 @@
+"""Synthetic order flow for the mock exchange"""
+import asyncio
+import collections
+import random
+
+FLOW_ACCOUNT = "__flow__"
+
+
+class OrderFlow(object):
+    """Random-walk market maker and taker for one symbol.
+
+    Every tick the mid price moves by a normally distributed return; the
+    generator quotes `levels` bids and asks around it, replaces its oldest
+    resting orders, and with probability `aggression` sends an order that
+    crosses the spread so the book trades.
+    """
+
+    def __init__(
+            self, engine, symbol, price=None, rate=10.0, spread=0.002,
+            volatility=0.0005, levels=10, quantity=1.0, aggression=0.2,
+            max_orders=200, seed=None
+    ):
+        """
+        Arguments:
+            engine: MatchingEngine to trade on
+            symbol: symbol to generate flow for
+            price: starting mid price, defaults to the symbol's "price"
+            rate: ticks per second
+            spread: relative distance between the best bid and ask
+            volatility: standard deviation of the mid price per tick
+            levels: price levels quoted per side
+            quantity: mean order quantity
+            aggression: probability of a crossing order per tick
+            max_orders: resting orders kept before the oldest are cancelled
+        """
+        self.engine = engine
+        self.symbol = symbol
+        self.mid = float(price or engine.symbols[symbol].get("price", 100.0))
+        self.rate = rate
+        self.spread = spread
+        self.volatility = volatility
+        self.levels = levels
+        self.quantity = quantity
+        self.aggression = aggression
+        self.max_orders = max_orders
+        self.random = random.Random(seed)
+        self.resting = collections.deque()
+        self.ticks = 0
+
+    def _quantity(self):
+        return round(self.random.expovariate(1.0 / self.quantity), 4) or self.quantity
+
+    def _price(self, offset):
+        return round(self.mid * (1 + offset), 8)
+
+    def seed_book(self):
+        """Quote every level on both sides around the starting mid."""
+        for level in range(1, self.levels + 1):
+            offset = self.spread / 2 * level
+            self._place("buy", self._price(-offset))
+            self._place("sell", self._price(offset))
+
+    def _place(self, side, price):
+        order = self.engine.place(FLOW_ACCOUNT, self.symbol, side, price, self._quantity())
+        if order.status == "wait":
+            self.resting.append(order.id)
+
+    def step(self):
+        """Advance the flow by one tick."""
+        self.ticks += 1
+        self.mid *= 1 + self.random.gauss(0, self.volatility)
+        side = self.random.choice(("buy", "sell"))
+        level = self.random.randint(1, self.levels)
+        offset = self.spread / 2 * level
+        if self.random.random() < self.aggression:
+            offset = -self.spread
+        self._place(side, self._price(-offset if side == "buy" else offset))
+
+        while len(self.resting) > self.max_orders:
+            self.engine.cancel(self.resting.popleft())
+
+    async def run(self):
+        self.seed_book()
+        while True:
+            await asyncio.sleep(1.0 / self.rate)
+            self.step()
@@ -0,0 +1,526 @@
+"""aiohttp stand-in for api.wazirx.com and stream.wazirx.com"""
+import asyncio
+import collections
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+
+from aiohttp import WSMsgType, web
+
+from wazirx.rest.endpoints import ENDPOINTS
+from wazirx.rest.rate_limit import SHARED_BUDGETS, TokenBucket
+from wazirx.rest.registry import load_api_mapper
+
+from .engine import MatchingEngine, format_number, now_ms
+
+DEFAULT_SYMBOLS = {
+    "btcinr": {"baseAsset": "btc", "quoteAsset": "inr", "price": 2500000.0},
+    "ethinr": {"baseAsset": "eth", "quoteAsset": "inr", "price": 180000.0},
+    "xrpinr": {"baseAsset": "xrp", "quoteAsset": "inr", "price": 45.0},
+    "btcusdt": {"baseAsset": "btc", "quoteAsset": "usdt", "price": 30000.0},
+}
+
+SIDES = {"buy": "bid", "sell": "ask"}
+
+# WazirX error codes returned by the mock
+INVALID_SIGNATURE = 2005
+OUTSIDE_RECV_WINDOW = 2098
+TOO_MANY_REQUESTS = 2136
+INVALID_PARAMETER = 1999
+ORDER_NOT_FOUND = 2062
+INVALID_API_KEY = 2112
+
+
+class ApiError(Exception):
+    def __init__(self, status, code, message):
+        super(ApiError, self).__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class StreamSession(object):
+    """One /stream connection; frames are written in order, each no
+    earlier than `latency` after it was produced."""
+
+    def __init__(self, websocket, api_key=None):
+        self.websocket = websocket
+        self.api_key = api_key
+        self.streams = set()
+        self.outbox = asyncio.Queue()
+
+    def push(self, frame, due):
+        self.outbox.put_nowait((due, frame))
+
+    async def write(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due, frame = await self.outbox.get()
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.websocket.send_str(frame)
+
+
+class MockExchange(object):
+    """Local WazirX exchange for load tests and offline runs.
+
+    Serves every endpoint of wazirx.rest.endpoints under /sapi/ with HMAC
+    signature and recvWindow checks, the /stream websocket (subscribe,
+    unsubscribe, ping; depth, trades, !ticker@arr, orderUpdate and
+    ownTrade frames) and answers 429 once an api_mapper rate limit is
+    exceeded. Point Client(api_url=exchange.api_url) and
+    WebsocketClient.connect(uri=exchange.stream_url) at it.
+    """
+
+    def __init__(
+            self, symbols=None, accounts=None, latency=0.0, jitter=0.0,
+            rate_limits=True, balance=1000000.0, ticker_interval=1.0,
+            host="127.0.0.1", port=8080
+    ):
+        """
+        Arguments:
+            symbols: {symbol: {"baseAsset", "quoteAsset", "price"}}
+            accounts: {api_key: secret_key} accepted by signed endpoints
+            latency: seconds added to every response and stream frame
+            jitter: extra uniformly distributed delay, in seconds
+            rate_limits: answer 429 when an api_mapper rate limit is hit
+            balance: starting free balance of every asset of every account
+            ticker_interval: seconds between !ticker@arr frames
+        """
+        self.symbols = symbols or DEFAULT_SYMBOLS
+        self.accounts = dict(accounts or {"mock_api_key": "mock_secret_key"})
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = rate_limits
+        self.ticker_interval = ticker_interval
+        self.host = host
+        self.port = port
+        self.engine = MatchingEngine(self.symbols)
+        self.engine.listeners.extend([self._settle, self._on_engine_event])
+        self.balances = collections.defaultdict(
+            lambda: collections.defaultdict(lambda: balance))
+        self.auth_keys = {}
+        self.sessions = set()
+        self.requests = collections.Counter()
+        self.rate_limited = collections.Counter()
+        self._buckets = {}
+        self.api_mapper = load_api_mapper()
+        self._routes = {}
+        for name, api_detail in self.api_mapper.items():
+            key = (api_detail["action"].upper(), "/sapi/" + ENDPOINTS[api_detail["endpoint"]])
+            self._routes.setdefault(key, name)
+        self._handlers = {
+            ENDPOINTS[endpoint]: getattr(self, method) for endpoint, method in (
+                ("ping", "ping"), ("time", "time"), ("system_status", "system_status"),
+                ("exchange_info", "exchange_info"), ("tickers", "tickers"),
+                ("ticker", "ticker"), ("depth", "depth"), ("trades", "trades"),
+                ("historical_trades", "trades"), ("order", "order"),
+                ("test_order", "test_order"), ("open_orders", "open_orders"),
+                ("all_orders", "all_orders"), ("account", "account"),
+                ("funds", "funds"), ("create_auth_token", "create_auth_token"))}
+        self._lock = threading.RLock()
+        self._runner = None
+        self._tasks = []
+
+    @property
+    def api_url(self):
+        return f"http://{self.host}:{self.port}/sapi/"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def _delay(self):
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    # REST
+
+    def build_app(self):
+        app = web.Application()
+        for path, handler in self._handlers.items():
+            app.router.add_route("*", "/sapi/" + path, self._wrap(handler))
+        app.router.add_get("/stream", self.stream)
+        return app
+
+    def _wrap(self, handler):
+        async def _handle(request):
+            delay = self._delay()
+            if delay:
+                await asyncio.sleep(delay)
+            if request.method == "GET":
+                raw = request.query_string
+            else:
+                raw = await request.text()
+            status, body = self.handle(
+                request.method, request.path, raw, request.headers, request.remote, handler)
+            return web.json_response(body, status=status)
+        return _handle
+
+    def handle(self, method, path, raw, headers, remote="127.0.0.1", handler=None):
+        """Serve one REST call without a socket; returns (status, body).
+
+        `raw` is the query string of a GET or the form body otherwise.
+        """
+        name = self._routes.get((method, path), path)
+        if handler is None:
+            handler = self._handlers.get(path[len("/sapi/"):])
+            if handler is None:
+                return 404, {"code": 404, "message": "Not found."}
+        self.requests[name] += 1
+        try:
+            params, api_key = self._read_params(raw, headers, name)
+            with self._lock:
+                self._check_rate_limit(name, api_key or remote)
+                return handler(method, params, api_key)
+        except ApiError as error:
+            return error.status, {"code": error.code, "message": error.message}
+
+    def _read_params(self, raw, headers, name):
+        pairs = urllib.parse.parse_qsl(raw, keep_blank_values=True)
+        params = dict(pairs)
+        api_detail = self.api_mapper.get(name, {})
+        if api_detail.get("client") != "signed":
+            return params, None
+
+        api_key = headers.get("X-Api-Key", "")
+        secret_key = self.accounts.get(api_key)
+        if secret_key is None:
+            raise ApiError(401, INVALID_API_KEY, "Invalid api key.")
+        payload = urllib.parse.urlencode([pair for pair in pairs if pair[0] != "signature"])
+        expected = hmac.new(
+            bytes(secret_key, "latin-1"), msg=bytes(payload, "latin-1"),
+            digestmod=hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, params.get("signature", "")):
+            raise ApiError(401, INVALID_SIGNATURE, "Signature is incorrect.")
+        try:
+            timestamp = int(params["timestamp"])
+            recv_window = int(params.get("recvWindow", 5000))
+        except (KeyError, ValueError):
+            raise ApiError(400, INVALID_PARAMETER, "timestamp is missing or invalid.")
+        server_time = now_ms()
+        if timestamp > server_time + 1000 or server_time - timestamp > recv_window:
+            raise ApiError(400, OUTSIDE_RECV_WINDOW, "Request out of receiving window.")
+        return params, api_key
+
+    def _check_rate_limit(self, name, owner):
+        if not self.rate_limits or name not in self.api_mapper:
+            return
+        api_detail = self.api_mapper[name]
+        buckets = []
+        if api_detail.get("rate_limit"):
+            buckets.append(self._bucket((owner, name), api_detail["rate_limit"]))
+        budget = api_detail.get("budget")
+        if budget in SHARED_BUDGETS:
+            buckets.append(self._bucket((owner, budget), SHARED_BUDGETS[budget]))
+        now = time.monotonic()
+        if any(bucket.delay(now) > 0 for bucket in buckets):
+            self.rate_limited[name] += 1
+            raise ApiError(429, TOO_MANY_REQUESTS, "Too many api request")
+        for bucket in buckets:
+            bucket.take(now)
+
+    def _bucket(self, key, rate):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate)
+        return bucket
+
+    def _symbol(self, params):
+        symbol = params.get("symbol")
+        if symbol not in self.symbols:
+            raise ApiError(400, INVALID_PARAMETER, "Invalid symbol.")
+        return symbol
+
+    def _limit(self, params, default, maximum):
+        try:
+            return max(1, min(int(params.get("limit", default)), maximum))
+        except ValueError:
+            raise ApiError(400, INVALID_PARAMETER, "Invalid limit.")
+
+    def ping(self, method, params, api_key):
+        return 200, {}
+
+    def time(self, method, params, api_key):
+        return 200, {"serverTime": now_ms()}
+
+    def system_status(self, method, params, api_key):
+        return 200, {"status": "normal", "message": "System is running normally."}
+
+    def exchange_info(self, method, params, api_key):
+        return 200, {
+            "timezone": "UTC",
+            "serverTime": now_ms(),
+            "symbols": [{
+                "symbol": symbol,
+                "status": "trading",
+                "baseAsset": detail["baseAsset"],
+                "quoteAsset": detail["quoteAsset"],
+                "baseAssetPrecision": 5,
+                "quoteAssetPrecision": 2,
+                "orderTypes": ["limit", "stop_limit"],
+                "isSpotTradingAllowed": True,
+                "filters": [],
+            } for symbol, detail in self.symbols.items()],
+        }
+
+    def tickers(self, method, params, api_key):
+        return 200, [self.engine.ticker(symbol) for symbol in self.symbols]
+
+    def ticker(self, method, params, api_key):
+        return 200, self.engine.ticker(self._symbol(params))
+
+    def depth(self, method, params, api_key):
+        return 200, self.engine.depth(self._symbol(params), self._limit(params, 20, 1000))
+
+    def trades(self, method, params, api_key):
+        symbol = self._symbol(params)
+        limit = self._limit(params, 500, 1000)
+        return 200, [trade.to_dict() for trade in list(self.engine.trades[symbol])[-limit:]][::-1]
+
+    def _get_order(self, params, api_key):
+        try:
+            order = self.engine.orders.get(int(params.get("orderId", 0)))
+        except ValueError:
+            order = None
+        if order is None or order.account != api_key:
+            raise ApiError(400, ORDER_NOT_FOUND, "Order not found.")
+        return order
+
+    def _order_args(self, params):
+        symbol = self._symbol(params)
+        if params.get("side") not in SIDES:
+            raise ApiError(400, INVALID_PARAMETER, "Invalid side.")
+        if params.get("type") not in ("limit", "stop_limit"):
+            raise ApiError(400, INVALID_PARAMETER, "Invalid order type.")
+        try:
+            price = float(params["price"])
+            quantity = float(params["quantity"])
+        except (KeyError, ValueError):
+            raise ApiError(400, INVALID_PARAMETER, "Invalid price or quantity.")
+        if price <= 0 or quantity <= 0:
+            raise ApiError(400, INVALID_PARAMETER, "Invalid price or quantity.")
+        return symbol, params["side"], price, quantity, params["type"]
+
+    def order(self, method, params, api_key):
+        if method == "POST":
+            symbol, side, price, quantity, order_type = self._order_args(params)
+            order = self.engine.place(api_key, symbol, side, price, quantity, order_type)
+            return 201, order.to_dict()
+        if method == "DELETE":
+            order = self._get_order(params, api_key)
+            if order.status not in ("wait", "idle"):
+                raise ApiError(400, ORDER_NOT_FOUND, "Order is not open.")
+            return 200, self.engine.cancel(order.id, api_key).to_dict()
+        return 200, self._get_order(params, api_key).to_dict()
+
+    def test_order(self, method, params, api_key):
+        self._order_args(params)
+        return 200, {}
+
+    def open_orders(self, method, params, api_key):
+        symbol = params.get("symbol")
+        orders = self.engine.open_orders(api_key, symbol)
+        if method == "DELETE":
+            self._symbol(params)
+            return 200, [self.engine.cancel(order.id, api_key).to_dict() for order in orders]
+        return 200, [order.to_dict() for order in orders]
+
+    def all_orders(self, method, params, api_key):
+        symbol = self._symbol(params)
+        limit = self._limit(params, 500, 1000)
+        orders = [order.to_dict() for order in self.engine.orders.values()
+                  if order.account == api_key and order.symbol == symbol]
+        return 200, orders[-limit:]
+
+    def account(self, method, params, api_key):
+        return 200, {"accountType": "default", "canTrade": True,
+                     "canWithdraw": True, "updateTime": now_ms()}
+
+    def funds(self, method, params, api_key):
+        assets = set()
+        for detail in self.symbols.values():
+            assets.update((detail["baseAsset"], detail["quoteAsset"]))
+        balances = self.balances[api_key]
+        locked = collections.Counter()
+        for order in self.engine.open_orders(api_key):
+            detail = self.symbols[order.symbol]
+            if order.side == "buy":
+                locked[detail["quoteAsset"]] += order.remaining * order.price
+            else:
+                locked[detail["baseAsset"]] += order.remaining
+        return 200, [{
+            "asset": asset,
+            "free": format_number(balances[asset] - locked[asset]),
+            "locked": format_number(locked[asset]),
+        } for asset in sorted(assets)]
+
+    def create_auth_token(self, method, params, api_key):
+        auth_key = secrets.token_urlsafe(24)
+        self.auth_keys[auth_key] = api_key
+        return 200, {"auth_key": auth_key, "timeout_duration": 900}
+
+    # Websocket
+
+    async def stream(self, request):
+        websocket = web.WebSocketResponse(autoping=True)
+        await websocket.prepare(request)
+        session = StreamSession(websocket)
+        self.sessions.add(session)
+        writer = asyncio.ensure_future(session.write())
+        self._send(session, {"event": "connected", "data": {"timeout_duration": 1800}})
+        try:
+            async for message in websocket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    self._handle_frame(session, json.loads(message.data))
+                except (ValueError, AttributeError):
+                    self._send(session, {"event": "error", "data": {
+                        "code": INVALID_PARAMETER, "errorMessage": "Invalid message."}})
+        finally:
+            self.sessions.discard(session)
+            writer.cancel()
+        return websocket
+
+    def _handle_frame(self, session, frame):
+        event = frame.get("event")
+        if event == "ping":
+            self._send(session, {"event": "pong"})
+            return
+        if event not in ("subscribe", "unsubscribe"):
+            self._send(session, {"event": "error", "id": frame.get("id", 0), "data": {
+                "code": INVALID_PARAMETER, "errorMessage": f"Unknown event {event}."}})
+            return
+
+        streams = frame.get("streams") or []
+        if frame.get("auth_key"):
+            session.api_key = self.auth_keys.get(frame["auth_key"], session.api_key)
+        private = [s for s in streams if s in ("orderUpdate", "ownTrade", "outboundAccountPosition")]
+        if event == "subscribe" and private and session.api_key is None:
+            self._send(session, {"event": "error", "id": frame.get("id", 0), "data": {
+                "code": INVALID_API_KEY, "errorMessage": "Invalid auth_key."}})
+            streams = [s for s in streams if s not in private]
+        if event == "subscribe":
+            session.streams.update(streams)
+        else:
+            session.streams.difference_update(streams)
+        self._send(session, {"event": event + "d", "id": frame.get("id", 0),
+                             "data": {"streams": streams}})
+
+    def _send(self, session, frame):
+        session.push(json.dumps(frame), asyncio.get_running_loop().time() + self._delay())
+
+    def _publish(self, stream, data, api_key=None):
+        frame = None
+        for session in self.sessions:
+            if stream not in session.streams:
+                continue
+            if api_key is not None and session.api_key != api_key:
+                continue
+            if frame is None:
+                frame = json.dumps({"stream": stream, "data": data})
+                due = asyncio.get_running_loop().time() + self._delay()
+            session.push(frame, due)
+
+    def _on_engine_event(self, event, payload):
+        if not self.sessions:
+            return
+        if event == "depth":
+            symbol, changes = payload
+            self._publish(symbol + "@depth", {
+                "E": now_ms(), "s": symbol,
+                "b": changes.get("b", []), "a": changes.get("a", [])})
+        elif event == "trade":
+            trade = payload
+            self._publish(trade.symbol + "@trades", {"trades": [{
+                "E": trade.time, "S": trade.taker_side,
+                "a": trade.buy_order.id, "b": trade.sell_order.id,
+                "m": trade.taker_side == "sell", "p": format_number(trade.price),
+                "q": format_number(trade.quantity), "s": trade.symbol, "t": trade.id,
+            }]})
+            for order in (trade.buy_order, trade.sell_order):
+                self._publish("ownTrade", {
+                    "E": trade.time, "S": SIDES[order.side],
+                    "U": self.symbols[trade.symbol]["quoteAsset"],
+                    "a": trade.buy_order.id, "b": trade.sell_order.id,
+                    "f": "0", "m": order.side != trade.taker_side,
+                    "o": order.id, "p": format_number(trade.price),
+                    "q": format_number(trade.quantity), "s": trade.symbol,
+                    "t": trade.id, "w": format_number(trade.price * trade.quantity),
+                }, api_key=order.account)
+        elif event == "order":
+            order = payload
+            self._publish("orderUpdate", {
+                "E": order.updated, "O": order.created, "S": SIDES[order.side],
+                "V": format_number(order.remaining), "X": order.status,
+                "i": order.id, "m": True, "o": order.type,
+                "p": format_number(order.price), "q": format_number(order.quantity),
+                "s": order.symbol, "v": format_number(order.executed),
+            }, api_key=order.account)
+
+    def _settle(self, event, payload):
+        if event != "trade":
+            return
+        trade = payload
+        detail = self.symbols[trade.symbol]
+        notional = trade.price * trade.quantity
+        buyer = self.balances[trade.buy_order.account]
+        seller = self.balances[trade.sell_order.account]
+        buyer[detail["baseAsset"]] += trade.quantity
+        buyer[detail["quoteAsset"]] -= notional
+        seller[detail["baseAsset"]] -= trade.quantity
+        seller[detail["quoteAsset"]] += notional
+
+    async def _publish_tickers(self):
+        while True:
+            await asyncio.sleep(self.ticker_interval)
+            if not self.sessions:
+                continue
+            tickers = []
+            for symbol in self.symbols:
+                ticker = self.engine.ticker(symbol)
+                tickers.append({
+                    "E": ticker["at"], "U": ticker["quoteAsset"], "a": ticker["askPrice"],
+                    "b": ticker["bidPrice"], "c": ticker["lastPrice"], "h": ticker["highPrice"],
+                    "l": ticker["lowPrice"], "o": ticker["openPrice"], "q": ticker["volume"],
+                    "s": symbol,
+                })
+            self._publish("!ticker@arr", tickers)
+
+    # Lifecycle
+
+    def add_task(self, coroutine):
+        """Run a coroutine (e.g. an OrderFlow) for as long as the exchange."""
+        self._tasks.append(asyncio.ensure_future(coroutine))
+
+    async def start(self):
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = site._server.sockets[0].getsockname()[1]
+        self.add_task(self._publish_tickers())
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for session in list(self.sessions):
+            await session.websocket.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
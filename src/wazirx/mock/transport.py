@@ -0,0 +1,59 @@
+"""In-process transport serving Client calls from a MockExchange"""
+import json
+import urllib.parse
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from wazirx.rest.session import SessionPool
+
+
+class MockAdapter(BaseAdapter):
+    """requests transport adapter answering from MockExchange.handle.
+
+    Requests go through the real requests/Client stack (encoding, signing,
+    decoding) but never touch a socket, which keeps benchmarks free of
+    network noise.
+    """
+
+    def __init__(self, exchange):
+        super(MockAdapter, self).__init__()
+        self.exchange = exchange
+
+    def send(self, request, **kwargs):
+        url = urllib.parse.urlsplit(request.url)
+        if request.method == "GET":
+            raw = url.query
+        else:
+            raw = request.body or ""
+            if isinstance(raw, bytes):
+                raw = raw.decode("latin-1")
+        status, body = self.exchange.handle(
+            request.method, url.path, raw, request.headers)
+
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(
+            {"Content-Type": "application/json; charset=utf-8"})
+        response._content = json.dumps(body).encode()
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class MockSessionPool(SessionPool):
+    """SessionPool whose session is wired to a MockExchange in-process."""
+
+    def __init__(self, exchange, **kwargs):
+        super(MockSessionPool, self).__init__(**kwargs)
+        self.exchange = exchange
+
+    def _build_session(self):
+        session = super(MockSessionPool, self)._build_session()
+        session.mount(self.exchange.api_url, MockAdapter(self.exchange))
+        return session
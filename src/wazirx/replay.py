@@ -0,0 +1,231 @@
+"""Record-and-replay transport for Client, AsyncClient and WebsocketClient.
+
+A recording is an append-only file of JSON lines (gzip compressed when the
+path ends with .gz), one compact array per event:
+
+    ["h", time, duration, name, params, status, body]   REST call
+    ["w", time, connection, frame]                       websocket frame received
+    ["o", time, connection, frame]                       websocket frame sent
+
+`params` are the request parameters without timestamp, recvWindow and
+signature; api keys and secrets are never written, and websocket auth
+keys (the create_auth_token response, subscribe frames) are redacted.
+
+    set_default_transport(RecordingTransport("day.jsonl.gz"))   # capture
+    set_default_transport(ReplayTransport("day.jsonl.gz"))      # replay
+
+Every Client and WebsocketClient created afterwards uses the transport, so
+strategies run unchanged against a captured session.
+"""
+import asyncio
+import collections
+import gzip
+import itertools
+import json
+import threading
+import time
+
+# Parameters that change on every call and are ignored when matching.
+VOLATILE_PARAMS = ("timestamp", "recvWindow", "signature")
+
+# Fields whose values are replaced by REDACTED in recorded bodies and frames.
+SECRET_FIELDS = ("auth_key",)
+REDACTED = "<redacted>"
+
+# Recorded responses scanned for an exact parameter match before the
+# oldest response of the endpoint is used instead.
+MATCH_WINDOW = 64
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _params(kwargs):
+    return {k: v for k, v in kwargs.items()
+            if v is not None and k not in VOLATILE_PARAMS}
+
+
+def _redact(value):
+    if isinstance(value, dict) and any(field in value for field in SECRET_FIELDS):
+        return {k: REDACTED if k in SECRET_FIELDS else v for k, v in value.items()}
+    return value
+
+
+def _redact_frame(frame):
+    if not any(f'"{field}"' in frame for field in SECRET_FIELDS):
+        return frame
+    try:
+        data = json.loads(frame)
+    except ValueError:
+        return frame
+    return json.dumps(_redact(data))
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class RecordingTransport(object):
+    """Sends through the real client and appends every exchange to `path`."""
+
+    replaying = False
+    rate_limited = True
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._file = _open(path, "a")
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def _write(self, record, flush=False):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.records += 1
+            now = time.monotonic()
+            if flush or now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+
+    def _record_http(self, endpoint, kwargs, start, response):
+        self._write(["h", start, time.time() - start, endpoint.name,
+                     _params(kwargs), response[0], _redact(response[1])], flush=True)
+
+    def request(self, client, endpoint, kwargs):
+        start = time.time()
+        response = client._send_direct(endpoint, kwargs)
+        self._record_http(endpoint, kwargs, start, response)
+        return response
+
+    async def arequest(self, client, endpoint, kwargs):
+        start = time.time()
+        response = await client._send_direct(endpoint, kwargs)
+        self._record_http(endpoint, kwargs, start, response)
+        return response
+
+    def frame_received(self, connection, frame):
+        self._write(["w", time.time(), connection, _redact_frame(frame)])
+
+    def frame_sent(self, connection, frame):
+        self._write(["o", time.time(), connection, _redact_frame(frame)])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayTransport(object):
+    """Serves a recording back.
+
+    REST calls get the recorded response of the same endpoint, preferring
+    one with the same parameters, in recorded order. Websocket connections
+    receive the recorded frames, at recorded speed multiplied by `speed`,
+    or as fast as possible when `speed` is None.
+    """
+
+    replaying = True
+    rate_limited = False
+
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+        self.responses = collections.defaultdict(collections.deque)
+        self.served = collections.Counter()
+        self.frames_served = 0
+        self._lock = threading.Lock()
+        with _open(path, "r") as recording:
+            for line in recording:
+                record = json.loads(line)
+                if record[0] == "h":
+                    _, _, duration, name, params, status, body = record
+                    self.responses[name].append(
+                        (_params_key(params), duration, status, body))
+
+    def _next(self, endpoint, kwargs):
+        key = _params_key(_params(kwargs))
+        with self._lock:
+            queue = self.responses.get(endpoint.name)
+            if not queue:
+                raise ReplayError(f"No recorded response left for '{endpoint.name}'")
+            match = None
+            for index, entry in enumerate(itertools.islice(queue, MATCH_WINDOW)):
+                if entry[0] == key:
+                    match = index
+                    break
+            if match is None:
+                entry = queue.popleft()
+            else:
+                entry = queue[match]
+                del queue[match]
+            self.served[endpoint.name] += 1
+        return entry[1], (entry[2], entry[3])
+
+    def request(self, client, endpoint, kwargs):
+        duration, response = self._next(endpoint, kwargs)
+        if self.speed:
+            time.sleep(duration / self.speed)
+        return response
+
+    async def arequest(self, client, endpoint, kwargs):
+        duration, response = self._next(endpoint, kwargs)
+        if self.speed:
+            await asyncio.sleep(duration / self.speed)
+        return response
+
+    async def frames(self):
+        """Yield the recorded incoming frames, paced by `speed`."""
+        loop = asyncio.get_running_loop()
+        first = None
+        started = loop.time()
+        with _open(self.path, "r") as recording:
+            for count, line in enumerate(recording):
+                if not line.startswith('["w"'):
+                    continue
+                _, recorded_at, _, frame = json.loads(line)
+                if self.speed:
+                    if first is None:
+                        first = recorded_at
+                    delay = started + (recorded_at - first) / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif count % 256 == 0:
+                    # let handlers and other tasks run during a fast replay
+                    await asyncio.sleep(0)
+                self.frames_served += 1
+                yield frame
+
+    def frame_received(self, connection, frame):
+        pass
+
+    def frame_sent(self, connection, frame):
+        pass
+
+    def close(self):
+        pass
+
+
+_default_transport = None
+
+
+def set_default_transport(transport):
+    """Use `transport` for every Client, AsyncClient and WebsocketClient
+    created afterwards without an explicit one; None restores the network."""
+    global _default_transport
+    _default_transport = transport
+
+
+def get_default_transport():
+    return _default_transport
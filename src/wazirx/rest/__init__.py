@@ -1,4 +1,10 @@
+from .async_client import AsyncClient
+from .cache import AsyncResponseCache, ResponseCache
 from .client import Client
+from .clock import ServerClock
+from .metrics import ClientMetrics, JsonSnapshotExporter, PrometheusExporter
+from .rate_limit import AsyncRateLimiter, RateBudget, RateLimiter
+from .session import SessionPool, configure_session_pool, get_session_pool
 import sys
 
 version = sys.version_info
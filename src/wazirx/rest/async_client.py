@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from wazirx.replay import get_default_transport
+
+from .client import BaseClient
+from .rate_limit import RETRIES, AsyncRateLimiter, get_rate_budget
+
+
+class AsyncClient(BaseClient):
+    """asyncio counterpart of Client with the same send(name, kwargs) contract.
+
+    Each AsyncClient owns an aiohttp connection pool, created lazily on the
+    running loop, so many depth/order/query calls can be in flight at once,
+    and its own AsyncRateLimiter keeping them within the exchange budget.
+    The limiter draws on the process-wide RateBudget, which the Client
+    limiter shares, so sync and async requests count against one budget.
+    Requests answered 429 are sent again up to `retries` times.
+    """
+
+    def __init__(
+            self, api_key="", secret_key="", limit=100, limit_per_host=0,
+            timeout=10, keepalive_timeout=30, rate_limiter=None, api_url=None,
+            cache=None, clock=None, metrics=None, transport=None, retries=RETRIES
+    ):
+        super(AsyncClient, self).__init__(api_key, secret_key, api_url, clock)
+        if transport is None:
+            transport = get_default_transport()
+        if rate_limiter is None and getattr(transport, "rate_limited", True):
+            rate_limiter = AsyncRateLimiter(
+                self.api_mapper, budget=get_rate_budget(self.api_mapper))
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.transport = transport
+        self.retries = retries
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def send(self, name="", kwargs=None):
+        if kwargs is None:
+            kwargs = {}
+        endpoint = self._get_api_detail(name)
+        if self.cache is not None and self.cache.cacheable(endpoint):
+            return await self.cache.fetch(
+                endpoint, kwargs, lambda: self._send_limited(endpoint, kwargs))
+        return await self._send_limited(endpoint, kwargs)
+
+    async def _send_limited(self, endpoint, kwargs):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = await self.rate_limiter.acquire(endpoint.name)
+                if self.metrics is not None:
+                    self.metrics.record_wait(endpoint.name, waited)
+            if self.transport is not None:
+                output = await self.transport.arequest(self, endpoint, kwargs)
+            else:
+                output = await self._send_direct(endpoint, kwargs)
+            if output[0] != 429 or attempt >= self.retries:
+                return output
+            delay = self._backoff(endpoint, attempt)
+            if delay:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_direct(self, endpoint, kwargs):
+        if self.metrics is not None:
+            return await self._send_measured(endpoint, kwargs)
+        return await self._send_request(endpoint, kwargs)
+
+    async def _send_request(self, endpoint, kwargs):
+        request_method, url, query, headers = self._prepare_request(
+            endpoint, kwargs)
+        session = self._get_session()
+        if request_method == "GET":
+            if query:
+                url = url + "?" + query
+            request = session.request("GET", url, headers=headers)
+        else:
+            request = session.request(
+                request_method, url, data=query, headers=headers)
+        async with request as response:
+            return response.status, await response.json(content_type=None)
+
+    async def _send_measured(self, endpoint, kwargs):
+        request_method, url, query, headers = self._prepare_request(
+            endpoint, kwargs)
+        session = self._get_session()
+        data = query
+        if request_method == "GET":
+            if query:
+                url = url + "?" + query
+            data = None
+        start = time.perf_counter()
+        try:
+            async with session.request(
+                    request_method, url, data=data, headers=headers) as response:
+                body = await response.read()
+                output = response.status, json.loads(body) if body else None
+        except Exception as error:
+            self.metrics.record_error(
+                endpoint.name, time.perf_counter() - start, error)
+            raise
+        self.metrics.record(
+            endpoint.name, time.perf_counter() - start, response.status,
+            len(query), len(body))
+        return output
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -0,0 +1,169 @@
+import asyncio
+import collections
+import threading
+import time
+
+# Entries kept before the least recently used one is evicted.
+DEFAULT_MAXSIZE = 1024
+
+
+class _Call(object):
+    """One in-flight request shared by every caller asking for the same key."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BaseResponseCache(object):
+    """TTL + LRU cache of (status_code, body) responses of public endpoints.
+
+    Only endpoints with a TTL (an api_mapper "cache_ttl" or an entry of
+    `ttls`) are cached, and only 200 responses are stored. Identical
+    requests arriving while one is in flight wait for it instead of
+    sending their own. Cached bodies are shared between callers and must
+    be treated as read-only. depth has no default TTL: OrderBookManager
+    resyncs a book from it and needs a snapshot newer than the gap.
+    """
+
+    def __init__(self, ttls=None, maxsize=DEFAULT_MAXSIZE):
+        self.ttls = dict(ttls or {})
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._inflight = {}
+        self.counters = collections.defaultdict(collections.Counter)
+
+    def ttl(self, endpoint):
+        if endpoint.name in self.ttls:
+            return self.ttls[endpoint.name]
+        return endpoint.get("cache_ttl")
+
+    def cacheable(self, endpoint):
+        return not endpoint.signed and bool(self.ttl(endpoint))
+
+    @staticmethod
+    def key(endpoint, kwargs):
+        return endpoint.name, tuple(sorted(
+            (k, v) for k, v in kwargs.items() if v is not None))
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= now:
+            del self._entries[key]
+            self.counters[key[0]]["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store(self, key, response, ttl):
+        if response[0] != 200:
+            return
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self.counters[evicted[0]]["evictions"] += 1
+
+    def invalidate(self, name=None):
+        """Drop every entry, or only those of endpoint `name`."""
+        for key in list(self._entries):
+            if name is None or key[0] == name:
+                del self._entries[key]
+
+    def stats(self):
+        """Per-endpoint hits, misses, coalesced waits, expirations and evictions,
+        plus the totals under "total"."""
+        output = {name: dict(counter) for name, counter in self.counters.items()}
+        total = collections.Counter()
+        for counter in self.counters.values():
+            total.update(counter)
+        lookups = total["hits"] + total["coalesced"] + total["misses"]
+        output["total"] = dict(
+            total, size=len(self._entries),
+            hit_ratio=(total["hits"] + total["coalesced"]) / lookups if lookups else 0.0)
+        return output
+
+
+class ResponseCache(BaseResponseCache):
+    """Thread-safe cache used by Client."""
+
+    def __init__(self, ttls=None, maxsize=DEFAULT_MAXSIZE):
+        super(ResponseCache, self).__init__(ttls, maxsize)
+        self._lock = threading.Lock()
+
+    def fetch(self, endpoint, kwargs, loader):
+        """Return the cached response of the request or loader()'s result."""
+        key = self.key(endpoint, kwargs)
+        with self._lock:
+            counter = self.counters[endpoint.name]
+            response = self._lookup(key, time.monotonic())
+            if response is not None:
+                counter["hits"] += 1
+                return response
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                counter["misses"] += 1
+            else:
+                counter["coalesced"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+            with self._lock:
+                self._store(key, call.result, self.ttl(endpoint))
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+
+class AsyncResponseCache(BaseResponseCache):
+    """asyncio cache used by AsyncClient; one instance serves one loop."""
+
+    async def fetch(self, endpoint, kwargs, loader):
+        """Return the cached response of the request or `await loader()`."""
+        key = self.key(endpoint, kwargs)
+        counter = self.counters[endpoint.name]
+        response = self._lookup(key, time.monotonic())
+        if response is not None:
+            counter["hits"] += 1
+            return response
+        future = self._inflight.get(key)
+        if future is not None:
+            counter["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        counter["misses"] += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await loader()
+            self._store(key, response, self.ttl(endpoint))
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # retrieved so an exception nobody waited for is not reported
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
@@ -1,16 +1,15 @@
 import hashlib
-import collections
 import hmac
-import json
 import os
-import urllib
+import time
+import urllib.parse
 import sys
 
-import requests
+from wazirx.replay import get_default_transport
 
-from .endpoints import ENDPOINTS
-
-PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+from .rate_limit import RETRIES, get_rate_limiter, retry_delay
+from .registry import PUBLIC_HEADERS, compile_endpoints, load_api_mapper
+from .session import get_session_pool
 
 PATH_TO_ADD = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 if PATH_TO_ADD not in sys.path:
@@ -21,66 +20,165 @@ class BaseClient(object):
     API_URL = 'https://api.wazirx.com/sapi/'
 
     def __init__(
-            self, api_key="", secret_key=""
+            self, api_key="", secret_key="", api_url=None, clock=None
     ):
         self.api_key = api_key
         self.secret_key = secret_key
-        self.api_mapper = json.load(
-            open(PROJECT_ROOT + "/api_mapper.json", "r"))
+        self.clock = clock
+        if api_url:
+            self.API_URL = api_url
+        self.api_mapper = load_api_mapper()
+        self.endpoints = compile_endpoints(self.API_URL)
+        self._signed_headers = dict(PUBLIC_HEADERS, **{"X-Api-Key": api_key})
+        # keyed HMAC state, copied for every signature
+        self._hmac = hmac.new(
+            bytes(secret_key, 'latin-1'), digestmod=hashlib.sha256)
+
+    def _get_api_detail(self, name):
+        endpoint = self.endpoints.get(name) if name else None
+        if endpoint is None:
+            raise BaseException("Valid Api Name Required")
+        return endpoint
+
+    def timestamp(self):
+        """Milliseconds timestamp for signed requests, corrected by the
+        ServerClock when one is set."""
+        if self.clock is not None:
+            return self.clock.timestamp()
+        return int(time.time() * 1000)
+
+    def _prepare_request(self, endpoint, kwargs):
+        """Return (method, url, query, headers); `query` is the urlencoded
+        parameters, signed ones sorted and followed by their signature.
+
+        Signed requests are stamped here, after any rate limiter wait, so
+        the wait does not eat into recvWindow."""
+        if endpoint.signed:
+            if self.clock is not None or "timestamp" in kwargs:
+                kwargs = dict(kwargs, timestamp=self.timestamp())
+            items = sorted(
+                (k, v) for k, v in kwargs.items() if v is not None)
+            query = urllib.parse.urlencode(items)
+            signature = self._get_signature(query)
+            query = (query + "&signature=" if query else "signature=") + signature
+            return endpoint.method, endpoint.url, query, self._signed_headers
+        query = urllib.parse.urlencode(
+            [(k, v) for k, v in kwargs.items() if v is not None])
+        return endpoint.method, endpoint.url, query, PUBLIC_HEADERS
+
+    def _backoff(self, endpoint, attempt):
+        """Hold the limiter back after a 429; returns the delay for the
+        caller to sleep when there is no limiter."""
+        delay = retry_delay(attempt)
+        if self.rate_limiter is not None:
+            self.rate_limiter.backoff(endpoint.name, delay)
+            return 0
+        return delay
+
+    def _get_headers(self, endpoint):
+        return self._signed_headers if endpoint.signed else PUBLIC_HEADERS
+
+    def _get_signature(self, sign_payload):
+        signature = self._hmac.copy()
+        signature.update(bytes(sign_payload, 'latin-1'))
+        return signature.hexdigest()
 
 
 class Client(BaseClient):
     def __init__(
-            self, api_key="", secret_key=""
+            self, api_key="", secret_key="", session_pool=None,
+            rate_limiter=None, api_url=None, cache=None, clock=None,
+            metrics=None, transport=None, retries=RETRIES
     ):
-        super(Client, self).__init__(api_key, secret_key)
+        """
+        Arguments:
+            session_pool: SessionPool to send through, defaults to the
+                process-wide pool
+            rate_limiter: RateLimiter, defaults to the process-wide one
+            api_url: base url, defaults to API_URL
+            cache: optional ResponseCache for the public endpoints with
+                a cache_ttl
+            clock: optional ServerClock stamping the signed requests
+            metrics: optional ClientMetrics recording every request
+            transport: RecordingTransport or ReplayTransport, defaults to
+                wazirx.replay.get_default_transport()
+            retries: times a request answered 429 is sent again, after
+                an exponential backoff
+        """
+        super(Client, self).__init__(api_key, secret_key, api_url, clock)
+        if session_pool is None:
+            session_pool = get_session_pool()
+        if transport is None:
+            transport = get_default_transport()
+        if rate_limiter is None and getattr(transport, "rate_limited", True):
+            rate_limiter = get_rate_limiter(self.api_mapper)
+        self.session_pool = session_pool
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.transport = transport
+        self.retries = retries
 
     def send(self, name="", kwargs=None):
         if kwargs is None:
             kwargs = {}
-        if not all([name, self.api_mapper.get(name, "")]):
-            raise BaseException("Valid Api Name Required")
-
-        api_detail = self.api_mapper[name]
-        return self._send_request(api_detail, kwargs)
-
-    def _send_request(self, api_detail, kwargs):
-        headers = self._get_headers(api_detail)
-        if api_detail.get("client", "") == "signed":
-            kwargs = collections.OrderedDict(
-                sorted(kwargs.items(), key=lambda x: x[0]))
-            kwargs["signature"] = self._get_signature(api_detail, kwargs)
-
-        request_method = api_detail["action"].lower()
-        url = self.API_URL + ENDPOINTS[api_detail["endpoint"]]
-        response = None
-        if request_method == "get":
-            response = requests.get(url, params=kwargs, headers=headers)
-        elif request_method == "post":
-            response = requests.post(url, data=kwargs, headers=headers)
-        elif request_method == "delete":
-            response = requests.delete(url, data=kwargs, headers=headers)
-        if response is not None:
-            return response.status_code, response.json()
-        raise BaseException("Invalid Request Type")
-
-    def _get_headers(self, api_detail):
-        output = {
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-        if api_detail.get("client", "") == "signed":
-            output["X-Api-Key"] = self.api_key
-
+        endpoint = self._get_api_detail(name)
+        if self.cache is not None and self.cache.cacheable(endpoint):
+            return self.cache.fetch(
+                endpoint, kwargs, lambda: self._send_limited(endpoint, kwargs))
+        return self._send_limited(endpoint, kwargs)
+
+    def _send_limited(self, endpoint, kwargs):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire(endpoint.name)
+                if self.metrics is not None:
+                    self.metrics.record_wait(endpoint.name, waited)
+            if self.transport is not None:
+                output = self.transport.request(self, endpoint, kwargs)
+            else:
+                output = self._send_direct(endpoint, kwargs)
+            if output[0] != 429 or attempt >= self.retries:
+                return output
+            delay = self._backoff(endpoint, attempt)
+            if delay:
+                time.sleep(delay)
+            attempt += 1
+
+    def _send_direct(self, endpoint, kwargs):
+        if self.metrics is not None:
+            return self._send_measured(endpoint, kwargs)
+        return self._send_request(endpoint, kwargs)
+
+    def _send_request(self, endpoint, kwargs):
+        response, _ = self._request(endpoint, kwargs)
+        return response.status_code, response.json()
+
+    def _request(self, endpoint, kwargs):
+        request_method, url, query, headers = self._prepare_request(
+            endpoint, kwargs)
+        if request_method == "GET":
+            if query:
+                url = url + "?" + query
+            response = self.session_pool.request(
+                "GET", url, headers=headers)
+        else:
+            response = self.session_pool.request(
+                request_method, url, data=query, headers=headers)
+        return response, query
+
+    def _send_measured(self, endpoint, kwargs):
+        start = time.perf_counter()
+        try:
+            response, query = self._request(endpoint, kwargs)
+            output = response.status_code, response.json()
+        except Exception as error:
+            self.metrics.record_error(
+                endpoint.name, time.perf_counter() - start, error)
+            raise
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        self.metrics.record(
+            endpoint.name, time.perf_counter() - start, response.status_code,
+            len(query), len(response.content), len(retries))
         return output
-
-    def _get_signature(self, api_detail, kwargs={}):
-        sign_payload = urllib.parse.urlencode(kwargs)
-        signature = hmac.new(
-            bytes(
-                self.secret_key,
-                'latin-1'),
-            msg=bytes(
-                sign_payload,
-                'latin-1'),
-            digestmod=hashlib.sha256).hexdigest()
-        return signature
@@ -0,0 +1,128 @@
+import collections
+import threading
+import time
+
+
+class ServerClock(object):
+    """Exchange clock estimated from samples of the public `time` endpoint.
+
+    Every sample measures the round trip of one request on the monotonic
+    clock and takes offset = server time - midpoint of the round trip. As
+    in NTP's clock filter, the estimate is the offset of the sample with
+    the lowest RTT among the last `window` ones, since its error is bounded
+    by RTT / 2. Timestamps are derived from time.monotonic(), so a step of
+    the host clock between syncs does not move them.
+    """
+
+    def __init__(self, client=None, window=8, interval=60, burst=4, api_url=None):
+        """
+        Arguments:
+            client: Client used to query the time endpoint, defaults to a
+                public Client without cache
+            window: samples kept for the min-RTT filter
+            interval: seconds between samples of the background thread
+            burst: samples taken by sync() when the window is empty
+            api_url: base url of the default client, e.g. a local
+                MockExchange, defaults to Client.API_URL
+
+        Nothing is sampled until sync() or start() is called; until then
+        timestamps are the local clock. TradeContext(clock=True) creates a
+        clock on the context's api_url and starts it.
+        """
+        if client is None:
+            from .client import Client
+            client = Client(api_url=api_url)
+        self.client = client
+        self.window = window
+        self.interval = interval
+        self.burst = burst
+        self.samples = collections.deque(maxlen=window)
+        self.offset = 0.0
+        self.rtt = None
+        self.synced_at = None
+        self.failures = 0
+        self._wall_anchor = time.time()
+        self._mono_anchor = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _local(self, monotonic):
+        return self._wall_anchor + (monotonic - self._mono_anchor)
+
+    def sample(self):
+        """Query the time endpoint once; returns (offset, rtt) in seconds or None."""
+        endpoint = self.client._get_api_detail("time")
+        if self.client.rate_limiter is not None:
+            # waits for the budget outside the measured round trip
+            self.client.rate_limiter.acquire(endpoint.name)
+        start = time.monotonic()
+        try:
+            if self.client.transport is not None:
+                status_code, response = self.client.transport.request(
+                    self.client, endpoint, {})
+            else:
+                status_code, response = self.client._send_request(endpoint, {})
+        except Exception:
+            status_code, response = None, None
+        end = time.monotonic()
+        if status_code != 200 or "serverTime" not in (response or {}):
+            self.failures += 1
+            return None
+
+        rtt = end - start
+        offset = response["serverTime"] / 1000.0 - self._local((start + end) / 2)
+        with self._lock:
+            self.samples.append((rtt, offset, end))
+            best_rtt, best_offset, _ = min(self.samples)
+            self.offset = best_offset
+            self.rtt = best_rtt
+            self.synced_at = end
+        return offset, rtt
+
+    def sync(self, samples=None):
+        """Take `samples` samples (default: `burst` if never synced, else 1)."""
+        if samples is None:
+            samples = self.burst if not self.samples else 1
+        for _ in range(samples):
+            self.sample()
+        return self.offset
+
+    def time(self):
+        """Estimated exchange time in seconds."""
+        return self._local(time.monotonic()) + self.offset
+
+    def timestamp(self):
+        """Estimated exchange time in milliseconds, for signed requests."""
+        return int(self.time() * 1000)
+
+    def stats(self):
+        """Offset (server - local), RTT of the selected sample, spread of the
+        offsets in the window and age of the last sample, in milliseconds."""
+        with self._lock:
+            offsets = [offset for _, offset, _ in self.samples]
+            return {
+                "offset_ms": self.offset * 1000,
+                "rtt_ms": self.rtt * 1000 if self.rtt is not None else None,
+                "dispersion_ms": (max(offsets) - min(offsets)) * 1000 if offsets else None,
+                "age_ms": (time.monotonic() - self.synced_at) * 1000
+                if self.synced_at is not None else None,
+                "samples": len(self.samples),
+                "failures": self.failures,
+            }
+
+    def _run(self):
+        self.sync()
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def start(self):
+        """Sample in a daemon thread every `interval` seconds."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
@@ -0,0 +1,255 @@
+import bisect
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rate limiter waits shorter than this are lock overhead, not throttling.
+MIN_WAIT = 0.001
+
+
+class Histogram(object):
+    """Fixed-bucket histogram; counts[i] holds observations <= buckets[i],
+    the last slot the ones above every bucket."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class EndpointMetrics(object):
+    __slots__ = ("latency", "statuses", "errors", "bytes_out", "bytes_in",
+                 "retries", "rate_limit_waits", "rate_limit_wait_time")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.latency = Histogram(buckets)
+        self.statuses = collections.Counter()
+        self.errors = collections.Counter()
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.retries = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_time = 0.0
+
+    def snapshot(self):
+        return {
+            "latency": self.latency.snapshot(),
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "errors": dict(self.errors),
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "retries": self.retries,
+            "rate_limit_waits": self.rate_limit_waits,
+            "rate_limit_wait_time": self.rate_limit_wait_time,
+        }
+
+
+class ClientMetrics(object):
+    """Per-endpoint request metrics recorded by Client and AsyncClient.
+
+    Clients only record when given a ClientMetrics (metrics=...), so the
+    cost of instrumentation when disabled is a single `is None` check.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.endpoints = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _endpoint(self, name):
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints.setdefault(name, EndpointMetrics(self.buckets))
+        return metrics
+
+    def record(self, name, latency, status, bytes_out=0, bytes_in=0, retries=0):
+        with self._lock:
+            metrics = self._endpoint(name)
+            metrics.latency.observe(latency)
+            metrics.statuses[status] += 1
+            metrics.bytes_out += bytes_out
+            metrics.bytes_in += bytes_in
+            metrics.retries += retries
+
+    def record_error(self, name, latency, error):
+        with self._lock:
+            metrics = self._endpoint(name)
+            metrics.latency.observe(latency)
+            metrics.errors[type(error).__name__] += 1
+
+    def record_wait(self, name, waited):
+        if waited < MIN_WAIT:
+            return
+        with self._lock:
+            metrics = self._endpoint(name)
+            metrics.rate_limit_waits += 1
+            metrics.rate_limit_wait_time += waited
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "started": self.started,
+                "endpoints": {name: metrics.snapshot()
+                              for name, metrics in self.endpoints.items()},
+            }
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text(snapshot, prefix="wazirx"):
+    """Render a ClientMetrics snapshot in the Prometheus text format."""
+    lines = []
+
+    def _family(name, kind, help_text):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+    endpoints = snapshot["endpoints"]
+    _family("request_duration_seconds", "histogram", "REST request latency.")
+    for endpoint, metrics in endpoints.items():
+        latency = metrics["latency"]
+        cumulative = 0
+        for bound, count in zip(latency["buckets"] + ["+Inf"], latency["counts"]):
+            cumulative += count
+            lines.append(f"{prefix}_request_duration_seconds_bucket"
+                         f"{_labels(endpoint=endpoint, le=bound)} {cumulative}")
+        lines.append(f"{prefix}_request_duration_seconds_sum{_labels(endpoint=endpoint)} {latency['sum']}")
+        lines.append(f"{prefix}_request_duration_seconds_count{_labels(endpoint=endpoint)} {latency['count']}")
+
+    _family("requests_total", "counter", "REST responses by status code.")
+    for endpoint, metrics in endpoints.items():
+        for status, count in metrics["statuses"].items():
+            lines.append(f"{prefix}_requests_total{_labels(endpoint=endpoint, status=status)} {count}")
+
+    _family("request_errors_total", "counter", "REST requests that raised, by exception type.")
+    for endpoint, metrics in endpoints.items():
+        for error, count in metrics["errors"].items():
+            lines.append(f"{prefix}_request_errors_total{_labels(endpoint=endpoint, error=error)} {count}")
+
+    _family("request_bytes_total", "counter", "REST payload bytes sent and received.")
+    for endpoint, metrics in endpoints.items():
+        lines.append(f"{prefix}_request_bytes_total{_labels(endpoint=endpoint, direction='out')} "
+                     f"{metrics['bytes_out']}")
+        lines.append(f"{prefix}_request_bytes_total{_labels(endpoint=endpoint, direction='in')} "
+                     f"{metrics['bytes_in']}")
+
+    for name, key, help_text in (
+            ("request_retries_total", "retries", "Transport level retries."),
+            ("rate_limit_waits_total", "rate_limit_waits", "Requests delayed by the rate limiter."),
+            ("rate_limit_wait_seconds_total", "rate_limit_wait_time",
+             "Time spent waiting for the rate limiter.")):
+        _family(name, "counter", help_text)
+        for endpoint, metrics in endpoints.items():
+            lines.append(f"{prefix}_{name}{_labels(endpoint=endpoint)} {metrics[key]}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter(object):
+    """Serves the metrics at http://host:port/metrics for a Prometheus scrape."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108, prefix="wazirx"):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self._server = None
+
+    def render(self):
+        return prometheus_text(self.metrics.snapshot(), self.prefix)
+
+    def start(self):
+        exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class JsonSnapshotExporter(object):
+    """Appends a JSON snapshot of the metrics to `path` every `interval` seconds."""
+
+    def __init__(self, metrics, path, interval=60):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def export(self):
+        with open(self.path, "a") as output_file:
+            output_file.write(json.dumps(self.metrics.snapshot()) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+        self.export()
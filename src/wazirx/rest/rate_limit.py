@@ -0,0 +1,288 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+# Account-wide budgets shared by several api_mapper entries through their
+# "budget" key, in requests per second.
+SHARED_BUDGETS = {
+    "orders": 10,
+}
+
+# Entries without a "priority" key queue behind cancels and new orders.
+DEFAULT_PRIORITY = 2
+
+# Fraction of the exchange rate the limiter paces at, so network jitter
+# bunching requests up on the way does not trip the exchange's own bucket.
+HEADROOM = 0.9
+
+# Retries of a request answered 429, and the backoff before the first one in
+# seconds, doubled on every further retry.
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Flow (e.g. a strategy symbol) the current thread or task sends requests for.
+_flow = contextvars.ContextVar("rate_limit_flow", default=None)
+
+
+@contextlib.contextmanager
+def flow(name):
+    """Attribute the requests made in this block to flow `name`.
+
+    Queued requests of the same priority from different flows take turns,
+    so one flow with a long backlog does not starve the others.
+    """
+    token = _flow.set(name)
+    try:
+        yield
+    finally:
+        _flow.reset(token)
+
+
+def current_flow():
+    return _flow.get()
+
+
+class TokenBucket(object):
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """Seconds until one token is available, 0 if one is available now."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain(self, now, delay):
+        """Make the next token available `delay` seconds from now at the earliest."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - delay * self.rate)
+
+
+class RateBudget(object):
+    """Token buckets of every api_mapper entry and shared budget.
+
+    Every entry with a "rate_limit" gets its own bucket; entries naming a
+    "budget" also draw from the shared bucket of that budget. Buckets pace
+    at `headroom` times the exchange rate. One RateBudget can back a
+    RateLimiter and any number of AsyncRateLimiters, which then draw on the
+    same budget; `lock` guards the buckets across their threads.
+    """
+
+    def __init__(self, api_mapper, budgets=None, headroom=HEADROOM):
+        if budgets is None:
+            budgets = SHARED_BUDGETS
+        self.lock = threading.Lock()
+        self.budgets = {
+            name: self._bucket(rate, headroom) for name, rate in budgets.items()}
+        self.routes = {}
+        for name, api_detail in api_mapper.items():
+            buckets = []
+            if api_detail.get("rate_limit"):
+                buckets.append(self._bucket(api_detail["rate_limit"], headroom))
+            if api_detail.get("budget") in self.budgets:
+                buckets.append(self.budgets[api_detail["budget"]])
+            self.routes[name] = (
+                api_detail.get("priority", DEFAULT_PRIORITY), buckets)
+
+    @staticmethod
+    def _bucket(rate, headroom):
+        return TokenBucket(rate * headroom, max(1.0, rate * headroom))
+
+
+class BaseRateLimiter(object):
+    """Queues requests on the buckets of a RateBudget.
+
+    Every bucket has a queue of (priority, turn, seq) tickets in this
+    limiter; only the smallest ticket may take a token, which lets cancels
+    overtake queued new orders and queries, alternates flows within a
+    priority and keeps FIFO order within a flow. Limiters sharing a budget
+    take tokens as their head tickets become due.
+    """
+
+    def __init__(self, api_mapper, budgets=None, budget=None):
+        if budget is None:
+            budget = RateBudget(api_mapper, budgets)
+        self.budget = budget
+        self._seq = itertools.count()
+        self._waiters = {id(bucket): [] for _, buckets in budget.routes.values()
+                         for bucket in buckets}
+        self.waits = 0
+        self.wait_time = 0.0
+        self.throttled = 0
+        self._turn = 0
+        self._flow_turns = {}
+
+    def _enqueue(self, name):
+        priority, buckets = self.budget.routes.get(name, (DEFAULT_PRIORITY, []))
+        # every request of a flow takes the flow's next turn, at the earliest
+        # the turn being served; requests outside flows are served in turn
+        flow = _flow.get()
+        if flow is None:
+            turn = self._turn
+        else:
+            turn = self._flow_turns[flow] = max(self._flow_turns.get(flow, 0), self._turn) + 1
+        ticket = (priority, turn, next(self._seq))
+        for bucket in buckets:
+            heapq.heappush(self._waiters[id(bucket)], ticket)
+        return ticket, buckets
+
+    def _dequeue(self, ticket, buckets):
+        for bucket in buckets:
+            waiters = self._waiters[id(bucket)]
+            if waiters and waiters[0] == ticket:
+                heapq.heappop(waiters)
+            elif ticket in waiters:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+
+    def _try_take(self, ticket, buckets):
+        """Take a token from every bucket, or return how long to wait.
+
+        Returns None when the ticket is not yet at the head of all of its
+        queues; it then waits to be woken by the waiter ahead of it.
+        """
+        if any(self._waiters[id(bucket)][0] != ticket for bucket in buckets):
+            return None
+        with self.budget.lock:
+            now = time.monotonic()
+            delay = max(bucket.delay(now) for bucket in buckets)
+            if delay > 0:
+                return delay
+            for bucket in buckets:
+                bucket.take(now)
+        self._turn = max(self._turn, ticket[1])
+        return 0.0
+
+    def backoff(self, name, delay):
+        """Hold back requests to `name` for `delay` seconds after a 429."""
+        self.throttled += 1
+        _, buckets = self.budget.routes.get(name, (DEFAULT_PRIORITY, []))
+        with self.budget.lock:
+            now = time.monotonic()
+            for bucket in buckets:
+                bucket.drain(now, delay)
+
+    def _record_wait(self, waited):
+        if waited > 0:
+            self.waits += 1
+            self.wait_time += waited
+
+
+class RateLimiter(BaseRateLimiter):
+    """Thread-safe limiter used by Client; acquire() blocks the caller."""
+
+    def __init__(self, api_mapper, budgets=None, budget=None):
+        super(RateLimiter, self).__init__(api_mapper, budgets, budget)
+        self._cond = threading.Condition()
+
+    def acquire(self, name):
+        """Block until a request to `name` fits its budgets.
+
+        Returns the number of seconds spent waiting.
+        """
+        start = time.monotonic()
+        with self._cond:
+            ticket, buckets = self._enqueue(name)
+            if not buckets:
+                return 0.0
+            self._cond.notify_all()
+            try:
+                while True:
+                    delay = self._try_take(ticket, buckets)
+                    if delay == 0:
+                        break
+                    self._cond.wait(delay)
+            finally:
+                self._dequeue(ticket, buckets)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._record_wait(waited)
+        return waited
+
+
+class AsyncRateLimiter(BaseRateLimiter):
+    """asyncio limiter used by AsyncClient; one instance serves one loop."""
+
+    def __init__(self, api_mapper, budgets=None, budget=None):
+        super(AsyncRateLimiter, self).__init__(api_mapper, budgets, budget)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, name):
+        """Wait until a request to `name` fits its budgets.
+
+        Returns the number of seconds spent waiting.
+        """
+        start = time.monotonic()
+        async with self._cond:
+            ticket, buckets = self._enqueue(name)
+            if not buckets:
+                return 0.0
+            self._cond.notify_all()
+            try:
+                while True:
+                    delay = self._try_take(ticket, buckets)
+                    if delay == 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._dequeue(ticket, buckets)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._record_wait(waited)
+        return waited
+
+
+def retry_delay(attempt):
+    """Backoff before retry `attempt` (0 based) of a request answered 429."""
+    return RETRY_BACKOFF * 2 ** attempt
+
+
+_default_budget = None
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def get_rate_budget(api_mapper):
+    """Return the process-wide RateBudget shared by every Client and AsyncClient."""
+    global _default_budget
+    if _default_budget is None:
+        with _default_lock:
+            if _default_budget is None:
+                _default_budget = RateBudget(api_mapper)
+    return _default_budget
+
+
+def get_rate_limiter(api_mapper):
+    """Return the process-wide RateLimiter shared by every Client."""
+    global _default_limiter
+    if _default_limiter is None:
+        budget = get_rate_budget(api_mapper)
+        with _default_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter(api_mapper, budget=budget)
+    return _default_limiter
@@ -0,0 +1,57 @@
+"""Endpoint table compiled once per process from api_mapper.json"""
+import functools
+import json
+import os
+
+from .endpoints import ENDPOINTS
+
+API_MAPPER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "api_mapper.json")
+
+PUBLIC_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+}
+
+
+class Endpoint(object):
+    """api_mapper entry with its method and full URL resolved."""
+
+    __slots__ = ("name", "method", "url", "signed", "detail")
+
+    def __init__(self, name, method, url, signed, detail):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.signed = signed
+        self.detail = detail
+
+    def get(self, key, default=None):
+        return self.detail.get(key, default)
+
+    def __getitem__(self, key):
+        return self.detail[key]
+
+
+@functools.lru_cache(maxsize=None)
+def load_api_mapper():
+    """Parse api_mapper.json once; the returned dict is shared, do not mutate it."""
+    with open(API_MAPPER_PATH, "r") as api_mapper_file:
+        return json.load(api_mapper_file)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_endpoints(api_url):
+    """Return {name: Endpoint} for every api_mapper entry under `api_url`."""
+    endpoints = {}
+    for name, api_detail in load_api_mapper().items():
+        method = api_detail["action"].upper()
+        if method not in ("GET", "POST", "DELETE"):
+            raise BaseException("Invalid Request Type")
+        endpoints[name] = Endpoint(
+            name,
+            method,
+            api_url + ENDPOINTS[api_detail["endpoint"]],
+            api_detail.get("client", "") == "signed",
+            api_detail,
+        )
+    return endpoints
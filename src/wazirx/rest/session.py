@@ -0,0 +1,91 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool(object):
+    """Keep-alive HTTP session shared by every Client in the process.
+
+    A single requests.Session keeps TCP/TLS connections open between calls,
+    so signed orders and depth polls reuse a warm connection instead of
+    paying a handshake per request.
+    """
+
+    def __init__(
+            self, pool_connections=4, pool_maxsize=32, timeout=(3.05, 10),
+            max_retries=0, pool_block=False
+    ):
+        """
+        Arguments:
+            pool_connections: number of hosts to keep connection pools for
+            pool_maxsize: connections kept alive per host
+            timeout: (connect, read) timeout in seconds applied to every call
+            max_retries: retries on connection failures (never on responses)
+            pool_block: block when the pool is exhausted instead of opening
+                a throw-away connection
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_block = pool_block
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            pool_block=self.pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_session_pool():
+    """Return the process-wide SessionPool, creating it on first use."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = SessionPool()
+    return _default_pool
+
+
+def configure_session_pool(**kwargs):
+    """Replace the process-wide SessionPool with one built from kwargs.
+
+    Clients created before this call keep the pool they were given.
+    """
+    global _default_pool
+    with _default_lock:
+        old_pool = _default_pool
+        _default_pool = SessionPool(**kwargs)
+    if old_pool is not None:
+        old_pool.close()
+    return _default_pool
@@ -1,3 +1,7 @@
+from .decoder import DepthFrame, FrameDecoder, TradeFrame
+from .dispatcher import Dispatcher, StreamQueue
+from .feed_metrics import FeedMetrics
+from .subscriptions import SubscriptionManager
 from .websocket_client import WebsocketClient
 import sys
 
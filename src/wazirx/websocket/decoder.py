@@ -0,0 +1,204 @@
+"""Websocket frame decoding with a cheap stream name scan
+
+Frames are routed by the stream name read straight from the raw text, so
+frames nobody consumes are never parsed. The rest are parsed with orjson
+when it is installed (pip install wazir_trader[fast]), else json.
+
+With compact=True, `@depth` and `@trades` frames are delivered as
+DepthFrame / TradeFrame objects instead of dicts. Their numeric columns are
+array('q') of fixed-point ints (value * 10 ** PRICE_DIGITS), built on first
+access: converting every level eagerly costs several times the JSON parse
+itself, while most consumers only look at the first levels.
+"""
+import json
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+    BACKEND = "orjson"
+else:
+    loads = json.loads
+    BACKEND = "json"
+
+# Decimal digits kept by the fixed-point columns.
+PRICE_DIGITS = 8
+
+_STREAM_KEY = '"stream"'
+
+
+def stream_name(message):
+    """Value of the "stream" key of a raw frame, "" when it has none."""
+    index = message.find(_STREAM_KEY)
+    if index < 0:
+        return ""
+    start = message.find('"', index + len(_STREAM_KEY)) + 1
+    if not start:
+        return ""
+    return message[start:message.find('"', start)]
+
+
+def to_fixed(text, digits=PRICE_DIGITS):
+    """Exact fixed-point int of a decimal string, "2400000.5" -> 240000050000000."""
+    negative = text.startswith("-")
+    whole, _, fraction = text.lstrip("-").partition(".")
+    value = int(whole or "0") * 10 ** digits + int(fraction[:digits].ljust(digits, "0"))
+    return -value if negative else value
+
+
+def from_fixed(value, digits=PRICE_DIGITS):
+    return value / 10 ** digits
+
+
+def _column(rows, index):
+    return array("q", [to_fixed(row[index]) for row in rows])
+
+
+class DepthFrame(object):
+    """Compact `@depth` frame; `bids`/`asks` keep the raw [price, quantity] rows."""
+
+    __slots__ = ("stream", "symbol", "event_time", "first_update_id", "last_update_id",
+                 "bids", "asks", "_columns")
+
+    def __init__(self, stream, data):
+        self.stream = stream
+        self.symbol = data.get("s")
+        self.event_time = data.get("E", 0)
+        self.first_update_id = data.get("U")
+        self.last_update_id = data.get("u")
+        self.bids = data.get("b", [])
+        self.asks = data.get("a", [])
+        self._columns = {}
+
+    def _get(self, name, rows, index):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _column(rows, index)
+        return column
+
+    @property
+    def bid_prices(self):
+        return self._get("bid_prices", self.bids, 0)
+
+    @property
+    def bid_quantities(self):
+        return self._get("bid_quantities", self.bids, 1)
+
+    @property
+    def ask_prices(self):
+        return self._get("ask_prices", self.asks, 0)
+
+    @property
+    def ask_quantities(self):
+        return self._get("ask_quantities", self.asks, 1)
+
+    def best_bid(self):
+        """(price, quantity) fixed-point of the first bid row, or None."""
+        if not self.bids:
+            return None
+        price, quantity = self.bids[0]
+        return to_fixed(price), to_fixed(quantity)
+
+    def best_ask(self):
+        if not self.asks:
+            return None
+        price, quantity = self.asks[0]
+        return to_fixed(price), to_fixed(quantity)
+
+    def to_dict(self):
+        data = {"E": self.event_time, "s": self.symbol, "b": self.bids, "a": self.asks}
+        if self.last_update_id is not None:
+            data["U"] = self.first_update_id
+            data["u"] = self.last_update_id
+        return {"stream": self.stream, "data": data}
+
+
+class TradeFrame(object):
+    """Compact `@trades` frame; columns are aligned, side is 1 buy / -1 sell."""
+
+    __slots__ = ("stream", "symbol", "trades", "_columns")
+
+    def __init__(self, stream, data):
+        self.stream = stream
+        self.trades = data.get("trades", [])
+        self.symbol = self.trades[0].get("s") if self.trades else stream.partition("@")[0]
+        self._columns = None
+
+    def _build(self):
+        trades = self.trades
+        self._columns = (
+            array("q", [int(trade["t"]) for trade in trades]),
+            array("q", [trade.get("E", 0) for trade in trades]),
+            array("q", [to_fixed(trade["p"]) for trade in trades]),
+            array("q", [to_fixed(trade["q"]) for trade in trades]),
+            array("b", [1 if trade["S"] == "buy" else -1 for trade in trades]),
+        )
+        return self._columns
+
+    @property
+    def ids(self):
+        return (self._columns or self._build())[0]
+
+    @property
+    def event_times(self):
+        return (self._columns or self._build())[1]
+
+    @property
+    def prices(self):
+        return (self._columns or self._build())[2]
+
+    @property
+    def quantities(self):
+        return (self._columns or self._build())[3]
+
+    @property
+    def sides(self):
+        return (self._columns or self._build())[4]
+
+    def __len__(self):
+        return len(self.trades)
+
+    def to_dict(self):
+        return {"stream": self.stream, "data": {"trades": self.trades}}
+
+
+COMPACT_FRAMES = {
+    "depth": DepthFrame,
+    "trades": TradeFrame,
+}
+
+
+class FrameDecoder(object):
+    """Turns raw frames into (stream, data) for the Dispatcher, or None
+    when no consumer is registered for the stream or the frame is not a
+    JSON object."""
+
+    def __init__(self, dispatcher, compact=False):
+        self.dispatcher = dispatcher
+        self.compact = compact
+
+    def decode(self, message):
+        stream = stream_name(message)
+        if not stream:
+            # control frames: connected, subscribed, pong, errors
+            data = loads(message)
+            if not isinstance(data, dict):
+                return None
+            if "errorMessage" in data:
+                return "error", data
+            return data.get("event") or "", data
+        if not self.dispatcher.has_consumer(stream):
+            self.dispatcher.skip(stream)
+            return None
+        data = loads(message)
+        if not isinstance(data, dict):
+            return None
+        if self.compact:
+            frame_type = COMPACT_FRAMES.get(stream.rpartition("@")[2])
+            if frame_type is not None:
+                return stream, frame_type(stream, data.get("data") or {})
+        return stream, data
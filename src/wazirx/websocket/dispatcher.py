@@ -0,0 +1,152 @@
+"""Routing of decoded websocket frames to handlers and bounded queues"""
+import asyncio
+import collections
+import traceback
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+CONFLATE = "conflate"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, CONFLATE)
+
+# Stream key for frames routed to every consumer regardless of their stream.
+ALL_STREAMS = "*"
+
+
+class StreamQueue:
+    """Bounded asyncio.Queue that never blocks the producer.
+
+    When full, `drop_oldest` evicts the oldest frame, `drop_newest` discards
+    the incoming one, and `conflate` keeps only the latest frame.
+    """
+
+    def __init__(self, maxsize=1000, overflow=DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+        if overflow == CONFLATE:
+            maxsize = 1
+        self.overflow = overflow
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, data):
+        """Queue a frame; returns "queued", "dropped" or "conflated"."""
+        result = "queued"
+        if self.queue.full():
+            if self.overflow == DROP_NEWEST:
+                return "dropped"
+            self.queue.get_nowait()
+            self.queue.task_done()
+            result = "conflated" if self.overflow == CONFLATE else "dropped"
+        self.queue.put_nowait(data)
+        return result
+
+    async def get(self):
+        data = await self.queue.get()
+        self.queue.task_done()
+        return data
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class Dispatcher:
+    """Routes frames by stream name (`btcinr@depth`, `!ticker@arr`,
+    `orderUpdate`, ...) to registered consumers.
+
+    Plain callables run inline on the reader and must be quick. Coroutine
+    handlers are fed through their own StreamQueue by a worker task, so a
+    slow consumer loses or conflates frames instead of stalling the socket.
+    """
+
+    def __init__(self):
+        self.handlers = collections.defaultdict(list)
+        self.queues = collections.defaultdict(list)
+        self.counters = collections.defaultdict(collections.Counter)
+        self._workers = []
+        self._pending_workers = []
+
+    @staticmethod
+    def stream_name(data):
+        return data.get("stream") or data.get("event") or ""
+
+    def register_handler(self, stream, handler, maxsize=1000, overflow=DROP_OLDEST):
+        """Deliver frames of `stream` to handler(data).
+
+        Coroutine functions get a bounded queue drained by a worker task.
+        """
+        if asyncio.iscoroutinefunction(handler):
+            stream_queue = self.register_queue(stream, maxsize, overflow)
+            self._pending_workers.append((stream, stream_queue, handler))
+        else:
+            self.handlers[stream].append(handler)
+
+    def register_queue(self, stream, maxsize=1000, overflow=DROP_OLDEST):
+        """Return a StreamQueue that receives every frame of `stream`."""
+        stream_queue = StreamQueue(maxsize, overflow)
+        self.queues[stream].append(stream_queue)
+        return stream_queue
+
+    def unregister(self, stream):
+        self.handlers.pop(stream, None)
+        self.queues.pop(stream, None)
+
+    def has_consumer(self, stream):
+        return bool(
+            stream in self.handlers or stream in self.queues
+            or ALL_STREAMS in self.handlers or ALL_STREAMS in self.queues)
+
+    def skip(self, stream):
+        """Count a frame of `stream` dropped undecoded for lack of consumers."""
+        counter = self.counters[stream]
+        counter["received"] += 1
+        counter["skipped"] += 1
+
+    def _start_workers(self):
+        while self._pending_workers:
+            stream, stream_queue, handler = self._pending_workers.pop()
+            self._workers.append(asyncio.ensure_future(
+                self._run_worker(stream, stream_queue, handler)))
+
+    async def _run_worker(self, stream, stream_queue, handler):
+        while True:
+            data = await stream_queue.get()
+            try:
+                await handler(data)
+            except Exception:
+                self.counters[stream]["errors"] += 1
+                traceback.print_exc()
+
+    def dispatch(self, data, stream=None):
+        """Route one decoded frame; returns False if nobody consumed it."""
+        if self._pending_workers:
+            self._start_workers()
+        if stream is None:
+            stream = self.stream_name(data)
+        counter = self.counters[stream]
+        counter["received"] += 1
+
+        handlers = self.handlers.get(stream, []) + self.handlers.get(ALL_STREAMS, [])
+        queues = self.queues.get(stream, []) + self.queues.get(ALL_STREAMS, [])
+        if not handlers and not queues:
+            counter["unrouted"] += 1
+            return False
+
+        for handler in handlers:
+            try:
+                handler(data)
+            except Exception:
+                counter["errors"] += 1
+                traceback.print_exc()
+        for stream_queue in queues:
+            counter[stream_queue.put(data)] += 1
+        return True
+
+    def stats(self):
+        """Per-stream counters: received, queued, dropped, conflated, unrouted,
+        skipped, errors."""
+        return {stream: dict(counter) for stream, counter in self.counters.items()}
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
@@ -0,0 +1,226 @@
+"""Per-stream receipt lag, inter-arrival, gap and stall tracking"""
+import asyncio
+import collections
+import json
+import logging
+import time
+
+from wazirx.rest.metrics import Histogram
+
+# Upper bounds, in seconds, of the exchange event to receipt lag buckets.
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Upper bounds, in seconds, of the inter-arrival and processing buckets.
+INTERARRIVAL_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+LOGGER_NAME = "wazirx.websocket.feed"
+
+
+def event_time(data):
+    """Exchange event time (ms) of a dispatched frame, None when it has none."""
+    value = getattr(data, "event_time", None)
+    if value:
+        return value
+    trades = getattr(data, "trades", None)
+    if trades is None and isinstance(data, dict):
+        payload = data.get("data")
+        if isinstance(payload, dict):
+            if payload.get("E"):
+                return payload["E"]
+            trades = payload.get("trades")
+        elif isinstance(payload, list) and payload and isinstance(payload[0], dict):
+            return payload[0].get("E")
+    if trades:
+        return trades[-1].get("E")
+    return None
+
+
+class StreamFeedMetrics(object):
+    __slots__ = ("lag", "interarrival", "processing", "frames", "lag_last", "lag_max",
+                 "gaps", "out_of_order", "stalls", "stalled", "last_received",
+                 "last_event_time", "last_update_id", "subscribed_at", "active")
+
+    def __init__(self):
+        self.lag = Histogram(LAG_BUCKETS)
+        self.interarrival = Histogram(INTERARRIVAL_BUCKETS)
+        self.processing = Histogram(INTERARRIVAL_BUCKETS)
+        self.frames = 0
+        self.lag_last = None
+        self.lag_max = None
+        self.gaps = 0
+        self.out_of_order = 0
+        self.stalls = 0
+        self.stalled = False
+        self.last_received = None
+        self.last_event_time = None
+        self.last_update_id = None
+        # monotonic time of the last subscribe, silence before the first frame counts from it
+        self.subscribed_at = None
+        self.active = True
+
+    def silent_since(self):
+        """Monotonic time since which nothing arrived, None if unknown."""
+        times = [t for t in (self.last_received, self.subscribed_at) if t is not None]
+        return max(times) if times else None
+
+    def snapshot(self, now):
+        since = self.silent_since()
+        return {
+            "frames": self.frames,
+            "lag": self.lag.snapshot(),
+            "lag_last": self.lag_last,
+            "lag_max": self.lag_max,
+            "interarrival": self.interarrival.snapshot(),
+            "processing": self.processing.snapshot(),
+            "gaps": self.gaps,
+            "out_of_order": self.out_of_order,
+            "stalls": self.stalls,
+            "stalled": self.stalled,
+            "silence": now - since if since is not None else None,
+        }
+
+
+class FeedMetrics(object):
+    """Lag of every dispatched frame behind its exchange event time.
+
+    WebsocketClient(feed_metrics=...) stamps each frame on receipt, on the
+    wall clock for the lag (exchange time from `clock` when a ServerClock
+    is given, so host clock skew is not reported as lag) and on the
+    monotonic clock for inter-arrival times and for `processing`, the
+    decode and dispatch time of the frame including inline handlers.
+
+    A gap is a depth update whose first update id does not follow the
+    previous one; out_of_order counts event times going backwards. A
+    stream is stalled once nothing arrived for `stall_after` seconds (a
+    number, or {stream: seconds}); the watchdog started by connect()
+    reports it once and again on recovery. With log_events=True gaps,
+    stalls, recoveries and lags above `lag_warning` seconds are logged as
+    JSON on the "wazirx.websocket.feed" logger.
+    """
+
+    def __init__(self, clock=None, stall_after=None, lag_warning=None, log_events=False,
+                 logger=None):
+        self.clock = clock
+        self.stall_after = stall_after
+        self.lag_warning = lag_warning
+        self.logger = logger or (logging.getLogger(LOGGER_NAME) if log_events else None)
+        self.streams = collections.defaultdict(StreamFeedMetrics)
+        self.started = time.time()
+        self._watchdog = None
+
+    def now(self):
+        return self.clock.time() if self.clock is not None else time.time()
+
+    def _log(self, event, stream, **fields):
+        if self.logger is not None:
+            fields.update(event=event, stream=stream, time=time.time())
+            self.logger.warning(json.dumps(fields))
+
+    def observe(self, stream, data, received, received_monotonic):
+        """Record a frame stamped `received` (exchange clock, s) and
+        `received_monotonic` on receipt. Frames without an exchange event
+        time (connected, subscribed, pong, errors) are ignored."""
+        exchange_time = event_time(data)
+        if not exchange_time:
+            return
+        metrics = self.streams[stream]
+        metrics.frames += 1
+        if metrics.last_received is not None:
+            metrics.interarrival.observe(received_monotonic - metrics.last_received)
+        metrics.last_received = received_monotonic
+        if metrics.stalled:
+            metrics.stalled = False
+            self._log("recovered", stream)
+
+        lag = received - exchange_time / 1000.0
+        metrics.lag.observe(lag)
+        metrics.lag_last = lag
+        if metrics.lag_max is None or lag > metrics.lag_max:
+            metrics.lag_max = lag
+        if metrics.last_event_time is not None and exchange_time < metrics.last_event_time:
+            metrics.out_of_order += 1
+        metrics.last_event_time = exchange_time
+        if self.lag_warning is not None and lag > self.lag_warning:
+            self._log("lag", stream, lag=lag, event_time=exchange_time)
+
+        first_update_id = getattr(data, "first_update_id", None)
+        last_update_id = getattr(data, "last_update_id", None)
+        payload = data.get("data") if isinstance(data, dict) else None
+        if isinstance(payload, dict) and "u" in payload:
+            first_update_id, last_update_id = payload.get("U"), payload["u"]
+        if last_update_id is not None:
+            if (metrics.last_update_id is not None and first_update_id is not None
+                    and first_update_id > metrics.last_update_id + 1):
+                metrics.gaps += 1
+                self._log("gap", stream, expected=metrics.last_update_id + 1,
+                          received=first_update_id)
+            metrics.last_update_id = last_update_id
+
+    def observe_processing(self, stream, elapsed):
+        metrics = self.streams.get(stream)
+        if metrics is not None:
+            metrics.processing.observe(elapsed)
+
+    def _stall_after(self, stream):
+        if isinstance(self.stall_after, dict):
+            return self.stall_after.get(stream)
+        return self.stall_after
+
+    def subscribed(self, streams, now=None):
+        """Start the silence clock of `streams`, so a subscription that never
+        delivers a frame is reported as stalled too."""
+        now = time.monotonic() if now is None else now
+        for stream in streams:
+            metrics = self.streams[stream]
+            metrics.subscribed_at = now
+            metrics.active = True
+
+    def unsubscribed(self, streams):
+        for stream in streams:
+            if stream in self.streams:
+                self.streams[stream].active = False
+
+    def check_stalls(self, now=None):
+        """Flag subscribed streams silent for longer than stall_after, counted
+        from their last frame or, after a (re)subscribe without frames, from the
+        subscribe; returns the newly stalled."""
+        now = time.monotonic() if now is None else now
+        stalled = []
+        for stream, metrics in list(self.streams.items()):
+            limit = self._stall_after(stream)
+            since = metrics.silent_since()
+            if limit is None or metrics.stalled or not metrics.active or since is None:
+                continue
+            if now - since > limit:
+                metrics.stalled = True
+                metrics.stalls += 1
+                stalled.append(stream)
+                self._log("stall", stream, silence=now - since)
+        return stalled
+
+    async def _watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.check_stalls()
+
+    def start(self):
+        """Run check_stalls() on the running loop, once per client group."""
+        if self.stall_after is None or self._watchdog is not None:
+            return
+        limits = self.stall_after.values() if isinstance(self.stall_after, dict) else [self.stall_after]
+        interval = max(min(limits, default=1.0) / 2, 0.05)
+        self._watchdog = asyncio.ensure_future(self._watch(interval))
+
+    def stop(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            "timestamp": time.time(),
+            "started": self.started,
+            "streams": {stream: metrics.snapshot(now)
+                        for stream, metrics in self.streams.items()},
+        }
@@ -0,0 +1,200 @@
+"""Desired vs active websocket streams, batched and sharded over connections"""
+import asyncio
+import time
+import traceback
+
+# Streams listed in one subscribe/unsubscribe frame.
+MAX_STREAMS_PER_FRAME = 100
+
+# Messages per second assumed for a stream with no observed rate and no
+# observed stream of the same type (`@depth`, `@trades`, ...).
+DEFAULT_RATE = 1.0
+
+
+def _stream_type(stream):
+    return stream.rpartition("@")[2]
+
+
+class SubscriptionManager:
+    """Tracks the streams a WebsocketClient wants and the ones each of its
+    connections is subscribed to.
+
+    subscribe/unsubscribe calls only update the desired set; the difference
+    with the active streams is sent after `batch_interval` seconds, so a
+    burst of calls costs one subscribe and one unsubscribe frame per
+    connection, and subscribing to an active stream costs none. Requests
+    with an id are flushed at once so their acknowledgement can be matched.
+
+    With several shards every stream is pinned to the connection with the
+    lowest load, the sum of the observed message rates (from the dispatcher
+    counters) of its streams. rebalance() moves streams off a connection
+    whose load exceeds the mean by `threshold`, subscribing on the new
+    connection before unsubscribing on the old one.
+    """
+
+    def __init__(self, client, shards=1, batch_interval=0, smoothing=0.3):
+        self.client = client
+        self.batch_interval = batch_interval
+        self.smoothing = smoothing
+        if shards > 1:
+            self.shards = [client.shard_client() for _ in range(shards)]
+        else:
+            self.shards = [client]
+        self.desired = set()
+        self.assignment = {}
+        self.rates = {}
+        self.frames_sent = 0
+        self.moves = 0
+        self._received = {}
+        self._sampled_at = None
+        self._flush = None
+
+    async def request(self, event, streams, id=0):
+        for stream in streams:
+            if event == "subscribe":
+                self.desired.add(stream)
+            else:
+                self.desired.discard(stream)
+        if id:
+            await self.flush(id)
+        elif self._flush is None:
+            self._flush = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_interval)
+        self._flush = None
+        try:
+            await self.flush()
+        except Exception:
+            traceback.print_exc()
+
+    def sample_rates(self):
+        """Update the smoothed message rate of every assigned stream."""
+        now = time.monotonic()
+        counters = self.client.dispatcher.counters
+        elapsed = now - self._sampled_at if self._sampled_at is not None else 0
+        for stream in self.assignment:
+            counter = counters.get(stream)
+            received = counter["received"] if counter else 0
+            previous = self._received.get(stream)
+            self._received[stream] = received
+            if previous is None or elapsed <= 0:
+                continue
+            rate = (received - previous) / elapsed
+            smoothed = self.rates.get(stream)
+            self.rates[stream] = rate if smoothed is None else smoothed + self.smoothing * (rate - smoothed)
+        self._sampled_at = now
+
+    def rate(self, stream):
+        """Observed rate of `stream`, else the mean rate of its type."""
+        rate = self.rates.get(stream)
+        if rate is not None:
+            return rate
+        stream_type = _stream_type(stream)
+        known = [rate for name, rate in self.rates.items() if _stream_type(name) == stream_type]
+        return sum(known) / len(known) if known else DEFAULT_RATE
+
+    def loads(self):
+        loads = [0.0] * len(self.shards)
+        for stream, index in self.assignment.items():
+            if stream in self.desired:
+                loads[index] += self.rate(stream)
+        return loads
+
+    def _assign(self):
+        loads = self.loads()
+        counters = self.client.dispatcher.counters
+        for stream in sorted(self.desired - self.assignment.keys(), key=self.rate, reverse=True):
+            index = loads.index(min(loads))
+            self.assignment[stream] = index
+            loads[index] += self.rate(stream)
+            counter = counters.get(stream)
+            self._received[stream] = counter["received"] if counter else 0
+
+    async def flush(self, id=0):
+        """Send the pending differences, subscriptions first."""
+        self.sample_rates()
+        self._assign()
+        wanted = [set() for _ in self.shards]
+        for stream, index in self.assignment.items():
+            if stream in self.desired:
+                wanted[index].add(stream)
+
+        unsubscribes = []
+        for index, shard in enumerate(self.shards):
+            # replayed by _resubscribe after every (re)connect
+            shard.connections["subscriptions"] = sorted(wanted[index])
+            if shard.connections["websocket"] is None:
+                continue
+            active = shard.connections["active"]
+            if shard is not self.client:
+                shard.auth_key = self.client.auth_key
+            await self._send(shard, "subscribe", wanted[index] - active, id)
+            active |= wanted[index]
+            unsubscribes.append((shard, active - wanted[index]))
+        for shard, streams in unsubscribes:
+            await self._send(shard, "unsubscribe", streams, id)
+            shard.connections["active"] -= streams
+
+        for stream, index in list(self.assignment.items()):
+            if stream not in self.desired and stream not in self.shards[index].connections["active"]:
+                del self.assignment[stream]
+                self._received.pop(stream, None)
+
+    async def _send(self, shard, event, streams, id=0):
+        streams = sorted(streams)
+        for start in range(0, len(streams), MAX_STREAMS_PER_FRAME):
+            await shard._send_streams(event, streams[start:start + MAX_STREAMS_PER_FRAME], id)
+            self.frames_sent += 1
+
+    async def rebalance(self, threshold=1.25):
+        """Move streams off overloaded connections; returns how many moved."""
+        if len(self.shards) < 2:
+            return 0
+        self.sample_rates()
+        loads = self.loads()
+        mean = sum(loads) / len(loads)
+        moved = 0
+        while mean:
+            heaviest = loads.index(max(loads))
+            lightest = loads.index(min(loads))
+            if loads[heaviest] <= threshold * mean:
+                break
+            gap = loads[heaviest] - loads[lightest]
+            candidates = [stream for stream, index in self.assignment.items()
+                          if index == heaviest and stream in self.desired
+                          and 0 < self.rate(stream) < gap]
+            if not candidates:
+                break
+            # the stream closest to half the gap evens the pair out best
+            stream = min(candidates, key=lambda name: abs(self.rate(name) - gap / 2))
+            self.assignment[stream] = lightest
+            loads[heaviest] -= self.rate(stream)
+            loads[lightest] += self.rate(stream)
+            moved += 1
+        if moved:
+            self.moves += moved
+            await self.flush()
+        return moved
+
+    async def run_rebalancer(self, interval=60, threshold=1.25):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebalance(threshold)
+            except Exception:
+                traceback.print_exc()
+
+    def stats(self):
+        """Streams, observed load and connection state of every shard."""
+        loads = self.loads()
+        output = []
+        for index, shard in enumerate(self.shards):
+            output.append({
+                "streams": len(shard.connections["subscriptions"]),
+                "active": len(shard.connections["active"]),
+                "load": loads[index],
+                "connected": shard.connections["websocket"] is not None,
+                "reconnects": shard.reconnects,
+            })
+        return output
@@ -1,12 +1,15 @@
 """WazirX websockets"""
+from wazirx.replay import get_default_transport
 from wazirx.rest import Client
+from .decoder import FrameDecoder
+from .dispatcher import DROP_OLDEST, Dispatcher
+from .subscriptions import SubscriptionManager
 import asyncio
 import json
 import sys
 import os
-import time
 import socket
-import threading
+import time
 
 import websockets
 
@@ -18,49 +21,168 @@ if PATH_TO_ADD not in sys.path:
 class BaseWebsocketClient:
     """Wazirx Websocket client implementation"""
 
-    def __init__(self, api_key="", secret_key=""):
+    def __init__(
+            self, api_key="", secret_key="", heartbeat_interval=15 * 60,
+            stale_timeout=None, reconnect=True, reconnect_delay=1,
+            max_reconnect_delay=60, api_url=None, clock=None, transport=None,
+            shards=1, batch_interval=0, rebalance_interval=None, compact=False,
+            feed_metrics=None
+    ):
         """
         Initialize the object.
         Arguments:
+            heartbeat_interval: seconds between application level pings
+            stale_timeout: reconnect when no frame arrives for this many
+                seconds, None to rely on the protocol level keepalive only
+            reconnect: reconnect automatically when the connection drops
+            reconnect_delay: first reconnect delay, doubled on every failure
+            max_reconnect_delay: upper bound of the reconnect delay
+            api_url: REST base url used for auth tokens, defaults to
+                Client.API_URL
+            clock: ServerClock stamping the auth token request
+            transport: RecordingTransport or ReplayTransport, defaults to
+                wazirx.replay.get_default_transport()
+            shards: connections the subscribed streams are spread over
+            batch_interval: seconds subscription changes are collected
+                before their frames are sent
+            rebalance_interval: seconds between rebalances of the streams
+                over the shards by message rate, None to disable
+            compact: deliver @depth and @trades frames as DepthFrame and
+                TradeFrame objects with fixed-point columns instead of dicts
+            feed_metrics: FeedMetrics recording the receipt lag, arrival
+                gaps and stalls of every dispatched frame
         """
         self.api_key = api_key
         self.secret_key = secret_key
         self.auth_key = ""
-        self.connections = {"websocket": None}
+        self.connections = {"websocket": None, "subscriptions": [], "active": set()}
         self.ping_started = False
+        self.dispatcher = Dispatcher()
+        self.decoder = FrameDecoder(self.dispatcher, compact)
+        self.feed_metrics = feed_metrics
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_timeout = stale_timeout
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self.api_url = api_url
+        self.clock = clock
+        self.transport = transport if transport is not None else get_default_transport()
+        self.rebalance_interval = rebalance_interval
+        self._closing = False
+        self.subscriptions = SubscriptionManager(self, shards, batch_interval)
 
 
 class WebsocketClient(BaseWebsocketClient):
-    def __init__(self, api_key="", secret_key=""):
-        super(WebsocketClient, self).__init__(api_key, secret_key)
+    def __init__(self, api_key="", secret_key="", **kwargs):
+        super(WebsocketClient, self).__init__(api_key, secret_key, **kwargs)
+
+    def on(self, stream, handler, maxsize=1000, overflow=DROP_OLDEST):
+        """Route frames of `stream` to handler, see Dispatcher.register_handler."""
+        self.dispatcher.register_handler(stream, handler, maxsize, overflow)
+
+    def queue(self, stream, maxsize=1000, overflow=DROP_OLDEST):
+        """Return a bounded StreamQueue fed with the frames of `stream`."""
+        return self.dispatcher.register_queue(stream, maxsize, overflow)
+
+    def shard_client(self):
+        """Connection of a sharded client, sharing its dispatcher."""
+        shard = WebsocketClient(
+            self.api_key, self.secret_key,
+            heartbeat_interval=self.heartbeat_interval,
+            stale_timeout=self.stale_timeout, reconnect=self.reconnect,
+            reconnect_delay=self.reconnect_delay,
+            max_reconnect_delay=self.max_reconnect_delay,
+            api_url=self.api_url, clock=self.clock, transport=self.transport,
+            feed_metrics=self.feed_metrics)
+        shard.dispatcher = self.dispatcher
+        shard.decoder = FrameDecoder(self.dispatcher, self.decoder.compact)
+        return shard
 
     def get_auth_token(self):
-        rest_client = Client(self.api_key, self.secret_key)
+        rest_client = Client(
+            self.api_key, self.secret_key, api_url=self.api_url,
+            clock=self.clock, transport=self.transport)
         status_code, response = rest_client.send(
             "create_auth_token", {
-                "recvWindow": 10000, "timestamp": int(
-                    time.time() * 1000)})
+                "recvWindow": 10000, "timestamp": rest_client.timestamp()})
         if status_code == 200:
             self.auth_key = response["auth_key"]
         return self.auth_key
 
     async def connect(self, uri="wss://stream.wazirx.com/stream"):
-        websocket = await websockets.connect(uri=uri)
-        self.connections = dict()
-        self.connections["websocket"] = websocket
-        self.connections["subscriptions"] = []
-        _thread = threading.Thread(
-            target=asyncio.run, args=(self.send_heartbeat(),))
-        _thread.start()
+        """Read frames until disconnect(), reconnecting with exponential
+        backoff and replaying connections["subscriptions"] after every
+        (re)connect."""
+        self._closing = False
+        if self.feed_metrics is not None:
+            self.feed_metrics.start()
+        if self.transport is not None and self.transport.replaying:
+            await self._replay()
+            return
+        if self.subscriptions.shards[0] is not self:
+            await self._connect_shards(uri)
+            return
+        delay = self.reconnect_delay
+        while not self._closing:
+            try:
+                websocket = await websockets.connect(uri=uri)
+            except (OSError, asyncio.TimeoutError,
+                    websockets.InvalidHandshake) as error:
+                print(f"WebSockets connect failed: {error}")
+                if not self.reconnect:
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            self.connections["websocket"] = websocket
+            self.connections["active"] = set()
+            delay = self.reconnect_delay
+            heartbeat = asyncio.ensure_future(self.send_heartbeat())
+            try:
+                await self._resubscribe()
+                await self._read(websocket)
+            finally:
+                heartbeat.cancel()
+                self.connections["websocket"] = None
+                self.connections["active"] = set()
+                await websocket.close()
+
+            if self._closing or not self.reconnect:
+                return
+            self.reconnects += 1
+            print(f"WebSockets reconnecting in {delay}s...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _connect_shards(self, uri):
+        shards = self.subscriptions.shards
+        tasks = [asyncio.ensure_future(shard.connect(uri)) for shard in shards]
+        if self.rebalance_interval:
+            tasks.append(asyncio.ensure_future(
+                self.subscriptions.run_rebalancer(self.rebalance_interval)))
+        try:
+            await asyncio.gather(*tasks[:len(shards)])
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _read(self, websocket):
         while True:
             try:
-                message = await websocket.recv()
-                if "errorMessage" in message:
-                    error = json.loads(message)
-                    print(error)
-                else:
-                    data = json.loads(message)
-                    print(data)
+                message = await asyncio.wait_for(
+                    websocket.recv(), self.stale_timeout)
+                received = None
+                if self.feed_metrics is not None:
+                    received = (self.feed_metrics.now(), time.monotonic())
+                if self.transport is not None:
+                    self.transport.frame_received(id(self), message)
+                self._handle_frame(message, received)
+            except asyncio.TimeoutError:
+                print(f"No message for {self.stale_timeout}s, connection stale")
+                return
             except socket.gaierror:
                 print("Socket gaia error")
                 return
@@ -73,13 +195,62 @@ class WebsocketClient(BaseWebsocketClient):
             except ConnectionResetError:
                 print("Connection reset error")
                 return
+            except Exception as error:
+                # anything else ends this connection; connect() reconnects
+                print(f"WebSockets read error: {error!r}")
+                return
+
+    def _handle_frame(self, message, received=None):
+        """Handle one frame, skipping it when it is not valid JSON."""
+        try:
+            self._handle_message(message, received)
+        except ValueError as error:
+            print(f"Skipping undecodable frame: {error}")
+
+    def _handle_message(self, message, received=None):
+        frame = self.decoder.decode(message)
+        if frame is None:
+            return
+        stream, data = frame
+        if not self.dispatcher.dispatch(data, stream) and stream == "error":
+            print(data)
+        if received is not None:
+            self.feed_metrics.observe(stream, data, *received)
+            self.feed_metrics.observe_processing(stream, time.monotonic() - received[1])
+
+    async def _replay(self):
+        """Dispatch the frames of a ReplayTransport until they run out or
+        disconnect() is called."""
+        async for message in self.transport.frames():
+            if self._closing:
+                return
+            self._handle_frame(message)
+
+    async def _resubscribe(self):
+        streams = list(self.connections["subscriptions"])
+        if not streams:
+            return
+        if all([self.api_key, self.secret_key]):
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.get_auth_token)
+            except Exception as error:
+                print(f"Auth token refresh failed, reusing the old one: {error}")
+        await self._send_streams("subscribe", streams)
+        self.connections["active"] = set(streams)
 
     async def send_heartbeat(self, *args):
         while True:
-            await self.connections["websocket"].send(json.dumps({'event': 'ping'}))
-            time.sleep(15 * 60)
+            await self._send({'event': 'ping'})
+            await asyncio.sleep(self.heartbeat_interval)
 
     async def disconnect(self):
+        self._closing = True
+        if self.feed_metrics is not None:
+            self.feed_metrics.stop()
+        for shard in self.subscriptions.shards:
+            if shard is not self:
+                await shard.disconnect()
         if self.connections["websocket"] is not None:
             try:
                 await self.connections["websocket"].close()
@@ -91,13 +262,16 @@ class WebsocketClient(BaseWebsocketClient):
                 print("WebSockets connection closed ok, let's disconnect anyway...")
             except ConnectionResetError:
                 print("Connection reset error, let's disconnect anyway...")
-            del self.connections
+            self.connections["websocket"] = None
 
     async def _send(self, data: dict) -> None:
         while not self.connections["websocket"]:
             await asyncio.sleep(0.1)
         try:
-            await self.connections["websocket"].send(json.dumps(data))
+            message = json.dumps(data)
+            await self.connections["websocket"].send(message)
+            if self.transport is not None:
+                self.transport.frame_sent(id(self), message)
         except socket.gaierror:
             print("Socket gaia error, message not sent...")
         except websockets.ConnectionClosedError:
@@ -107,22 +281,31 @@ class WebsocketClient(BaseWebsocketClient):
         except ConnectionResetError:
             print("Connection reset error, message not sent...")
 
-    async def _sub_unsub(
-            self,
-            event,
-            subscription,
-            id=0
-    ):
+    async def _send_streams(self, event, streams, id=0):
         data = {
             "event": event,
-            "streams": subscription,
+            "streams": streams,
         }
         if self.auth_key:
             data["auth_key"] = self.auth_key
         if id:
             data["id"] = id
-
         await self._send(data=data)
+        if self.feed_metrics is not None:
+            if event == "subscribe":
+                self.feed_metrics.subscribed(streams)
+            else:
+                self.feed_metrics.unsubscribed(streams)
+
+    async def _sub_unsub(
+            self,
+            event,
+            subscription,
+            id=0
+    ):
+        # batched and deduplicated by the SubscriptionManager; streams
+        # subscribed while disconnected are sent on (re)connect
+        await self.subscriptions.request(event, subscription, id)
 
     async def subscribe(
             self,
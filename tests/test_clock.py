@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.context import TradeContext  # noqa: E402
+from wazirx.rest import ServerClock  # noqa: E402
+
+API_URL = "http://127.0.0.1:1/sapi/"
+
+
+def test_default_clock_samples_the_given_api_url():
+    assert ServerClock(api_url=API_URL).client.API_URL == API_URL
+    assert ServerClock().client.API_URL == "https://api.wazirx.com/sapi/"
+
+
+def test_context_clock_follows_its_api_url_and_stops_on_close():
+    context = TradeContext(api_url=API_URL, clock=True)
+    try:
+        assert context.clock.client.API_URL == API_URL
+        assert context.client.clock is context.clock
+        assert context.clock._thread is not None
+    finally:
+        context.close()
+    assert context.clock._thread is None
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.order_book import OrderBookManager  # noqa: E402
+from trade.shared_feed import SharedFeed, SharedFeedReader, SharedFeedWriter  # noqa: E402
+from wazirx.websocket import DepthFrame, TradeFrame, WebsocketClient  # noqa: E402
+
+SYMBOL = "btcinr"
+
+
+def _decode(client, stream, data):
+    return client.decoder.decode(json.dumps({"stream": stream, "data": data}))[1]
+
+
+def test_order_book_applies_compact_depth_frames():
+    client = WebsocketClient(compact=True)
+    manager = OrderBookManager(None, [SYMBOL], websocket_client=client)
+    book = manager.books[SYMBOL]
+    book.apply_snapshot([["100", "1"]], [["101", "1"]], 1, update_id=10)
+
+    frame = _decode(client, SYMBOL + "@depth", {
+        "E": 2, "s": SYMBOL, "U": 11, "u": 11, "b": [["100.5", "2"]], "a": [["101", "0"]]})
+    assert isinstance(frame, DepthFrame)
+    manager.handle_message(frame)
+    assert book.synced
+    assert book.best_bid() == ["100.5", "2"]
+    assert book.best_ask() is None
+
+    gap = _decode(client, SYMBOL + "@depth", {
+        "E": 3, "s": SYMBOL, "U": 13, "u": 13, "b": [], "a": [["102", "1"]]})
+    manager.handle_message(gap)
+    assert not book.synced
+
+
+def test_shared_feed_writer_publishes_compact_trade_frames():
+    client = WebsocketClient(compact=True)
+    client.on(SYMBOL + "@trades", lambda frame: None)
+    feed = SharedFeed.create([SYMBOL], capacity=8)
+    reader = SharedFeedReader(feed.name)
+    try:
+        frame = _decode(client, SYMBOL + "@trades", {"trades": [
+            {"E": 5, "S": "buy", "p": "100", "q": "0.5", "s": SYMBOL, "t": 7},
+            {"E": 6, "S": "sell", "p": "99", "q": "1", "s": SYMBOL, "t": 8}]})
+        assert isinstance(frame, TradeFrame)
+        SharedFeedWriter(feed).handle_trades(frame)
+        trades, cursor, lost = reader.trades(SYMBOL)
+        assert [trade[0] for trade in trades] == [7, 8]
+        assert cursor == 2 and lost == 0
+    finally:
+        reader.close()
+        feed.close()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from wazirx.websocket import FeedMetrics  # noqa: E402
+
+STREAM = "btcinr@depth"
+
+
+def test_subscription_without_frames_is_reported_as_stalled():
+    metrics = FeedMetrics(stall_after=5)
+    metrics.subscribed([STREAM], now=100)
+    assert metrics.check_stalls(now=104) == []
+    assert metrics.check_stalls(now=106) == [STREAM]
+    assert metrics.streams[STREAM].stalls == 1
+    assert metrics.check_stalls(now=200) == []
+
+
+def test_resubscribe_restarts_the_silence_clock_and_unsubscribe_stops_it():
+    metrics = FeedMetrics(stall_after=5)
+    metrics.subscribed([STREAM], now=100)
+    metrics.subscribed([STREAM], now=104)
+    assert metrics.check_stalls(now=108) == []
+    metrics.unsubscribed([STREAM])
+    assert metrics.check_stalls(now=200) == []
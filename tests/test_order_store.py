@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.order_store import FILLED, OPEN, OrderStore  # noqa: E402
+
+SYMBOL = "btcinr"
+
+
+def _store():
+    store = OrderStore()
+    store.add(1, SYMBOL, "buy", 100.0, 1.0)
+    store.add(2, SYMBOL, "buy", 102.0, 1.0)
+    store.add(3, SYMBOL, "buy", 101.0, 1.0)
+    store.add(4, SYMBOL, "sell", 105.0, 1.0)
+    store.add(5, SYMBOL, "sell", 104.0, 1.0)
+    store.add(6, "ethinr", "buy", 10.0, 1.0)
+    return store
+
+
+def _ids(records):
+    return [record.order_id for record in records]
+
+
+def test_set_status_moves_records_between_indexes():
+    store = _store()
+    assert store.mark_filled(2)
+    assert store.get(2).status == FILLED
+    assert store.count(SYMBOL, "buy", OPEN) == 2
+    assert store.count(SYMBOL, "buy", FILLED) == 1
+    assert store.open_count(SYMBOL) == 4
+    assert _ids(store.orders_for(SYMBOL, "buy", FILLED)) == [2]
+    assert _ids(store.orders_for(SYMBOL, "buy", OPEN)) == [1, 3]
+    assert store.set_status(2, OPEN)
+    assert store.count(SYMBOL, "buy", FILLED) == 0
+    assert not store.set_status(99, FILLED)
+
+
+def test_remove_keeps_the_price_lists_in_sync():
+    store = _store()
+    assert store.remove(2).price == 102.0
+    assert store.remove(2) is None
+    assert 2 not in store
+    assert _ids(store.by_price(SYMBOL, "buy")) == [3, 1]
+    assert store.best(SYMBOL, "buy").order_id == 3
+    store.mark_filled(3)
+    assert _ids(store.remove_filled(SYMBOL, "buy")) == [3]
+    assert _ids(store.by_price(SYMBOL, "buy")) == [1]
+    assert store.count(SYMBOL) == 3
+    assert len(store) == 4
+
+
+def test_add_replaces_a_record_with_the_same_id():
+    store = _store()
+    store.add(1, SYMBOL, "sell", 103.0, 2.0)
+    assert store.count(SYMBOL, "buy") == 2
+    assert _ids(store.by_price(SYMBOL, "buy")) == [2, 3]
+    assert _ids(store.by_price(SYMBOL, "sell")) == [1, 5, 4]
+
+
+def test_by_price_and_best_start_from_the_best_price():
+    store = _store()
+    assert _ids(store.by_price(SYMBOL, "buy")) == [2, 3, 1]
+    assert _ids(store.by_price(SYMBOL, "sell")) == [5, 4]
+    assert store.best(SYMBOL, "sell").order_id == 5
+    assert store.best("xrpinr", "buy") is None
+    assert store.by_price("xrpinr", "buy") == []
+    assert store.count("xrpinr") == 0
@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.order_tracker import OrderTracker  # noqa: E402
+from wazirx.websocket import WebsocketClient  # noqa: E402
+
+
+class FakeOrder:
+    def __init__(self, block=None):
+        self.queried = []
+        self.block = block
+        self.entered = threading.Event()
+
+    def process_order(self, process_type, data):
+        self.queried.append(data["order_id"])
+        self.entered.set()
+        if self.block is not None:
+            self.block.wait(5)
+        return 200, {"status": "wait", "executedQty": "0"}
+
+
+def _tracker(order, orders=4):
+    tracker = OrderTracker(order, websocket_client=WebsocketClient(),
+                           reconcile_interval=30, reconcile_batch=2)
+    for order_id in range(orders):
+        tracker.track(order_id, "btcinr", "buy", 100.0, 1.0)
+        tracker.orders[order_id]["updated"] = order_id
+    return tracker
+
+
+def test_reconcile_queries_each_stale_order_once_per_interval():
+    order = FakeOrder()
+    tracker = _tracker(order)
+    assert tracker.reconcile(now=100) == 2
+    assert tracker.reconcile(now=100) == 2
+    assert tracker.reconcile(now=100) == 0
+    assert sorted(order.queried) == [0, 1, 2, 3]
+
+
+def test_reconcile_runs_in_one_caller_at_a_time():
+    block = threading.Event()
+    order = FakeOrder(block)
+    tracker = _tracker(order)
+    worker = threading.Thread(target=tracker.reconcile, kwargs={"now": 100})
+    worker.start()
+    assert order.entered.wait(5)
+    assert tracker.reconcile(now=100) == 0
+    block.set()
+    worker.join(5)
+    assert order.queried == [0, 1]
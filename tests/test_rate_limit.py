@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from wazirx.rest import rate_limit  # noqa: E402
+from wazirx.rest.rate_limit import (  # noqa: E402
+    AsyncRateLimiter, BaseRateLimiter, RateBudget, RateLimiter, flow)
+
+API_MAPPER = {
+    "cancel_order": {"rate_limit": 1, "budget": "orders", "priority": 0},
+    "new_order": {"rate_limit": 1, "budget": "orders", "priority": 1},
+    "query_order": {"rate_limit": 1, "budget": "orders"},
+    "depth": {"rate_limit": 1},
+}
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return fake
+
+
+def _limiter(rate=1):
+    budget = RateBudget(API_MAPPER, budgets={"orders": rate}, headroom=1)
+    return BaseRateLimiter(API_MAPPER, budget=budget)
+
+
+def _serve(limiter, clock, queued):
+    """Serve queued (ticket, buckets) in the order the limiter grants them."""
+    served = []
+    while queued:
+        granted = None
+        for index, (ticket, buckets) in enumerate(queued):
+            delay = limiter._try_take(ticket, buckets)
+            if delay == 0:
+                granted = index
+                break
+            if delay is not None:
+                clock.now += delay
+                break
+        if granted is not None:
+            ticket, buckets = queued.pop(granted)
+            limiter._dequeue(ticket, buckets)
+            served.append(ticket)
+    return served
+
+
+def test_cancels_overtake_queued_new_orders(clock):
+    limiter = _limiter()
+    new = limiter._enqueue("new_order")
+    query = limiter._enqueue("query_order")
+    cancel = limiter._enqueue("cancel_order")
+    served = _serve(limiter, clock, [new, query, cancel])
+    assert served == [cancel[0], new[0], query[0]]
+
+
+def test_flows_take_turns_within_a_priority(clock):
+    limiter = _limiter(rate=100)
+    queued = []
+    with flow("btcinr"):
+        for _ in range(3):
+            queued.append(("btcinr", limiter._enqueue("query_order")))
+    with flow("ethinr"):
+        queued.append(("ethinr", limiter._enqueue("query_order")))
+    names = {ticket: name for name, (ticket, _) in queued}
+    served = _serve(limiter, clock, [item for _, item in queued])
+    assert [names[ticket] for ticket in served] == ["btcinr", "ethinr", "btcinr", "btcinr"]
+
+
+def test_backoff_drains_the_buckets_of_the_endpoint(clock):
+    limiter = _limiter(rate=10)
+    limiter.backoff("new_order", 2.0)
+    assert limiter.throttled == 1
+    priority, buckets = limiter.budget.routes["new_order"]
+    assert all(bucket.delay(clock.now) == pytest.approx(2.0) for bucket in buckets)
+    # the shared orders bucket holds back cancels too, depth is untouched
+    assert limiter._try_take(*limiter._enqueue("cancel_order")) == pytest.approx(2.0)
+    assert limiter._try_take(*limiter._enqueue("depth")) == 0
+
+
+def test_sync_and_async_limiters_share_one_budget():
+    rate, requests = 50, 40
+    budget = RateBudget({"new_order": {"budget": "orders"}}, budgets={"orders": rate}, headroom=1)
+    sync_limiter = RateLimiter({}, budget=budget)
+    async_limiter = AsyncRateLimiter({}, budget=budget)
+    granted = []
+
+    def sync_side():
+        for _ in range(requests):
+            sync_limiter.acquire("new_order")
+            granted.append(time.monotonic())
+
+    async def async_side():
+        for _ in range(requests):
+            await async_limiter.acquire("new_order")
+            granted.append(time.monotonic())
+
+    start = time.monotonic()
+    thread = threading.Thread(target=sync_side)
+    thread.start()
+    asyncio.run(async_side())
+    thread.join(10)
+
+    # each side alone fits in the burst; together they are paced at `rate`
+    assert len(granted) == 2 * requests
+    assert max(granted) - start >= (2 * requests - rate) / rate * 0.9
+    for index, at in enumerate(sorted(granted)):
+        assert index + 1 <= rate + (at - start) * rate + 1
@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from wazirx.replay import REDACTED, RecordingTransport  # noqa: E402
+
+AUTH_KEY = "secret-auth-key-123"
+
+
+def test_recording_redacts_auth_keys(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    transport = RecordingTransport(path)
+    transport._record_http(SimpleNamespace(name="create_auth_token"), {"recvWindow": 10000},
+                           time.time(), (200, {"auth_key": AUTH_KEY, "timeout": 900}))
+    transport.frame_sent(1, json.dumps(
+        {"event": "subscribe", "streams": ["orderUpdate"], "auth_key": AUTH_KEY}))
+    transport.frame_received(1, json.dumps({"stream": "btcinr@trades", "data": {"trades": []}}))
+    transport.close()
+
+    with open(path, encoding="utf-8") as recording:
+        text = recording.read()
+    assert AUTH_KEY not in text
+    http, sent, received = [json.loads(line) for line in text.splitlines()]
+    assert http[6] == {"auth_key": REDACTED, "timeout": 900}
+    assert json.loads(sent[3])["streams"] == ["orderUpdate"]
+    assert json.loads(received[3])["stream"] == "btcinr@trades"
@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.shared_feed import SharedFeed, SharedFeedReader, SharedFeedWriter  # noqa: E402
+
+SYMBOL = "btcinr"
+UPDATES = 50000
+
+
+def _publish(name, ready):
+    feed = SharedFeed.attach(name, untrack=False)
+    writer = SharedFeedWriter(feed)
+    writer.publish_top(SYMBOL, 1.0, 1.0, 2.0, 1.0)
+    ready.set()
+    for n in range(1, UPDATES + 1):
+        writer.publish_top(SYMBOL, float(n), 1.0, float(n + 1), 1.0)
+        writer.publish_trade(SYMBOL, n, float(n), 1.0, "buy")
+    feed.close()
+
+
+def test_reader_in_another_process_never_sees_a_torn_or_empty_record():
+    feed = SharedFeed.create([SYMBOL], capacity=UPDATES * 2)
+    ready = multiprocessing.Event()
+    writer = multiprocessing.Process(target=_publish, args=(feed.name, ready))
+    writer.start()
+    reader = SharedFeedReader(feed.name)
+    try:
+        assert ready.wait(10)
+        cursor = 0
+        trade_ids = []
+        lost = 0
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            top = reader.top(SYMBOL)
+            assert top is not None
+            assert top["ask"] == top["bid"] + 1
+            trades, next_cursor, missed = reader.trades(SYMBOL, cursor)
+            assert next_cursor >= cursor
+            trade_ids.extend(trade[0] for trade in trades)
+            lost += missed
+            cursor = next_cursor
+            if not writer.is_alive() and cursor == UPDATES:
+                break
+        writer.join(10)
+        assert lost == 0
+        assert trade_ids == list(range(1, UPDATES + 1))
+        assert reader.top(SYMBOL)["bid"] == UPDATES
+    finally:
+        reader.close()
+        if writer.is_alive():
+            writer.terminate()
+        feed.close()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade.order_book import OrderBookManager  # noqa: E402
+from trade.order_tracker import OrderTracker  # noqa: E402
+from trade.strategy.spread_trading import SpreadTrading  # noqa: E402
+from wazirx.websocket import WebsocketClient  # noqa: E402
+
+SYMBOL = "btcinr"
+
+
+def test_stop_removes_the_event_listeners():
+    strategy = SpreadTrading(asset_list={SYMBOL: {"trade_limit": 1, "quantity": 1.0}})
+    strategy.order_books = OrderBookManager(
+        strategy.market_data, [SYMBOL], websocket_client=WebsocketClient())
+    strategy.order_tracker = OrderTracker(strategy.order, websocket_client=WebsocketClient())
+
+    strategy.run(interval=None, events=True)
+    assert strategy.order_books.listeners == [strategy.handle_book]
+    assert strategy.order_tracker.listeners == [strategy.handle_order]
+    strategy.stop()
+    assert strategy.order_books.listeners == []
+    assert strategy.order_tracker.listeners == []
+
+    scheduler = strategy.run(interval=3600, events=False)
+    try:
+        assert strategy.order_books.listeners == []
+        assert strategy.order_tracker.listeners == []
+    finally:
+        strategy.stop()
+    assert scheduler.stats()[SYMBOL]["events"] == 0
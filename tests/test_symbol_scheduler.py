@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from trade import symbol_scheduler  # noqa: E402
+from trade.symbol_scheduler import SymbolScheduler  # noqa: E402
+
+SYMBOL = "btcinr"
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(symbol_scheduler, "time", fake)
+    return fake
+
+
+def _live(scheduler):
+    return [entry for entry in scheduler._queue if scheduler._due.get(entry[2]) == entry[0]]
+
+
+def test_runs_are_rescheduled_from_their_due_time(clock):
+    scheduler = SymbolScheduler(lambda symbol: None, [SYMBOL], interval=1.0)
+    assert scheduler._next() == (100.0, SYMBOL, None)
+    clock.now = 100.3
+    scheduler._reschedule(100.0, SYMBOL)
+    assert scheduler._due[SYMBOL] == 101.0
+    clock.now = 101.0
+    due, _, _ = scheduler._next()
+    # a run ending past its next due time is rescheduled now, not in a burst
+    clock.now = 103.5
+    scheduler._reschedule(due, SYMBOL)
+    assert scheduler._due[SYMBOL] == 103.5
+
+
+def test_events_are_debounced_and_conflated(clock):
+    scheduler = SymbolScheduler(lambda symbol: None, [SYMBOL], interval=None, debounce=0.05)
+    due, _, _ = scheduler._next()
+    scheduler._reschedule(due, SYMBOL)
+    assert _live(scheduler) == []
+
+    for _ in range(3):
+        scheduler.trigger(SYMBOL)
+        clock.now += 0.01
+    assert len(_live(scheduler)) == 1
+    assert scheduler._due[SYMBOL] == pytest.approx(100.05)
+
+    clock.now = 100.05
+    due, symbol, event = scheduler._next()
+    assert (symbol, event) == (SYMBOL, 100.0)
+    # events during the run lead to a single run after it
+    scheduler.trigger(SYMBOL)
+    scheduler.trigger(SYMBOL)
+    assert _live(scheduler) == []
+    clock.now = 100.2
+    scheduler._reschedule(due, SYMBOL)
+    assert len(_live(scheduler)) == 1
+    assert scheduler._due[SYMBOL] == pytest.approx(100.25)
+    assert scheduler.stats_by_symbol[SYMBOL].events == 5
+
+
+def test_an_event_does_not_delay_an_earlier_run(clock):
+    scheduler = SymbolScheduler(lambda symbol: None, [SYMBOL], interval=1.0, debounce=5)
+    due, _, _ = scheduler._next()
+    scheduler._reschedule(due, SYMBOL)
+    scheduler.trigger(SYMBOL)
+    assert scheduler._due[SYMBOL] == 101.0
+    assert len(_live(scheduler)) == 1
+
+
+def test_removed_symbols_stop_running(clock):
+    scheduler = SymbolScheduler(lambda symbol: None, [SYMBOL, "ethinr"], interval=1.0)
+    scheduler.remove(SYMBOL)
+    assert scheduler._next()[1] == "ethinr"
+    scheduler.trigger(SYMBOL)
+    assert SYMBOL not in scheduler._due
+    assert scheduler.stats_by_symbol[SYMBOL].events == 0
+
+
+def test_workers_conflate_a_burst_into_one_run():
+    runs = []
+    done = threading.Event()
+
+    def task(symbol):
+        runs.append(symbol)
+        if len(runs) == 2:
+            done.set()
+
+    scheduler = SymbolScheduler(task, [SYMBOL], interval=None, debounce=0.05)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not runs and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for _ in range(20):
+            scheduler.trigger(SYMBOL)
+        assert done.wait(5)
+        time.sleep(0.2)
+    finally:
+        scheduler.stop()
+    stats = scheduler.stats()[SYMBOL]
+    assert runs == [SYMBOL, SYMBOL]
+    assert stats["runs"] == 2 and stats["events"] == 20 and stats["errors"] == 0
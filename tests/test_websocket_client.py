@@ -0,0 +1,42 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from wazirx.websocket import WebsocketClient  # noqa: E402
+
+
+class FakeWebsocket:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    async def recv(self):
+        frame = self.frames.pop(0)
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+
+def test_read_skips_undecodable_frames_and_ends_on_unexpected_errors():
+    client = WebsocketClient()
+    received = []
+    client.on("btcinr@trades", received.append)
+    trades = json.dumps({"stream": "btcinr@trades", "data": {"trades": []}})
+    websocket = FakeWebsocket([
+        '{"stream": "btcinr@trades", "data": {',
+        "[1, 2]",
+        '"x"',
+        "null",
+        '["stream", "btcinr@trades"]',
+        trades,
+        RuntimeError("boom"),
+        trades,
+    ])
+
+    asyncio.run(client._read(websocket))
+
+    assert len(received) == 1
+    # the connection ended at the error, leaving the last frame unread
+    assert len(websocket.frames) == 1